@@ -6,13 +6,33 @@ except PackageNotFoundError:  # pragma: no cover
     __version__ = "unknown"
 
 
-from ._graph import DiGraph, Graph, GraphBase
-from ._rtree import LineRTree, PointRTree
-from ._spatial_graph import SpatialDiGraph, SpatialGraph, SpatialGraphBase
+from ._graph import (
+    DiGraph,
+    FrozenDiGraph,
+    FrozenGraph,
+    FrozenGraphBase,
+    Graph,
+    GraphBase,
+)
+from ._rtree import LineRTree, PointRTree, UndirectedLineRTree
+from ._spatial_graph import (
+    FrozenSpatialDiGraph,
+    FrozenSpatialGraph,
+    FrozenSpatialGraphBase,
+    SpatialDiGraph,
+    SpatialGraph,
+    SpatialGraphBase,
+)
 from ._util import create_graph
 
 __all__ = [
     "DiGraph",
+    "FrozenDiGraph",
+    "FrozenGraph",
+    "FrozenGraphBase",
+    "FrozenSpatialDiGraph",
+    "FrozenSpatialGraph",
+    "FrozenSpatialGraphBase",
     "Graph",
     "GraphBase",
     "LineRTree",
@@ -20,5 +40,6 @@ __all__ = [
     "SpatialDiGraph",
     "SpatialGraph",
     "SpatialGraphBase",
+    "UndirectedLineRTree",
     "create_graph",
 ]
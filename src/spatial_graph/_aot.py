@@ -0,0 +1,138 @@
+"""Lookup of ahead-of-time compiled graph and tree modules.
+
+Modules built with `python -m spatial_graph.precompile` are stored in a
+directory together with a `manifest.json`, which maps the signature of each
+module (its kind and dtypes) to the module file and a hash of the sources it
+was built from. `_compile_graph` and `_compile_tree` consult these directories
+before compiling a module with witty.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import importlib.machinery
+import importlib.util
+import json
+import os
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+    from types import ModuleType
+
+# environment variable with (os.pathsep separated) directories of precompiled
+# modules, searched before the directory shipped with the package
+AOT_DIR_ENV = "SPATIAL_GRAPH_AOT_DIR"
+
+PACKAGE_AOT_DIR = Path(__file__).parent / "_precompiled"
+
+# decides how attribute types are rendered into the wrapper templates, and is
+# therefore part of the sources of every module
+DTYPES_SOURCE = Path(__file__).parent / "_dtypes.py"
+
+MANIFEST_NAME = "manifest.json"
+
+# parsed manifests, by directory
+_manifests: dict[Path, dict[str, Any]] = {}
+
+# if set, modules are compiled into this directory and added to its manifest
+_output_dir: Path | None = None
+
+
+def source_hash(*sources: str | Path, args: Sequence[str] = ()) -> str:
+    """Hash the content of source files (given as paths) or code snippets
+    (given as strings), together with the compile arguments."""
+    hash_obj = hashlib.md5()
+    for source in sources:
+        if isinstance(source, Path):
+            source = source.read_text()
+        hash_obj.update(source.encode())
+    hash_obj.update(json.dumps(list(args)).encode())
+    return hash_obj.hexdigest()
+
+
+def aot_dirs() -> list[Path]:
+    """Get all directories that are searched for precompiled modules."""
+    dirs = [Path(d) for d in os.environ.get(AOT_DIR_ENV, "").split(os.pathsep) if d]
+    return [*dirs, PACKAGE_AOT_DIR]
+
+
+def output_dir() -> Path | None:
+    """The directory to compile modules into, if `compiling_into` is active."""
+    return _output_dir
+
+
+@contextlib.contextmanager
+def compiling_into(directory: Path) -> Iterator[None]:
+    """Compile all modules requested in this context into `directory` and
+    register them in its manifest, regardless of whether they are available
+    already."""
+    global _output_dir
+    previous, _output_dir = _output_dir, Path(directory)
+    try:
+        yield
+    finally:
+        _output_dir = previous
+
+
+def load_module(signature: tuple, sources_hash: str) -> ModuleType | None:
+    """Load a precompiled module for the given signature.
+
+    Returns `None` if no module was precompiled for this signature, or if it
+    was built from different sources or for a different Python ABI.
+    """
+    key = json.dumps(signature)
+    for directory in aot_dirs():
+        entry = _read_manifest(directory).get(key)
+        if entry is None or entry["sources_hash"] != sources_hash:
+            continue
+        module_file = directory / entry["file"]
+        if not module_file.is_file() or not any(
+            module_file.name.endswith(suffix)
+            for suffix in importlib.machinery.EXTENSION_SUFFIXES
+        ):
+            continue
+        return _load_dynamic(entry["name"], module_file)
+    return None
+
+
+def register_module(
+    directory: Path, signature: tuple, sources_hash: str, module: ModuleType
+) -> None:
+    """Add a module compiled into `directory` to the directory's manifest."""
+    manifest = dict(_read_manifest(directory))
+    manifest[json.dumps(signature)] = {
+        "name": module.__name__,
+        "file": Path(module.__file__).name,  # type: ignore[arg-type]
+        "sources_hash": sources_hash,
+    }
+    manifest_file = directory / MANIFEST_NAME
+    tmp_file = manifest_file.with_suffix(".tmp")
+    tmp_file.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    tmp_file.replace(manifest_file)
+    _manifests[directory] = manifest
+
+
+def _read_manifest(directory: Path) -> dict[str, Any]:
+    if directory not in _manifests:
+        manifest_file = directory / MANIFEST_NAME
+        if manifest_file.is_file():
+            _manifests[directory] = json.loads(manifest_file.read_text())
+        else:
+            _manifests[directory] = {}
+    return _manifests[directory]
+
+
+def _load_dynamic(name: str, module_file: Path) -> ModuleType:
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, module_file)
+    if spec is None or spec.loader is None:  # pragma: no cover
+        raise ImportError(f"Failed to load module {name} from {module_file}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -67,6 +67,11 @@ class DType:
         """Convert the base of this DType into the equivalent C/C++ type."""
         return VALID_BASE_TYPES[self.base]
 
+    @property
+    def is_integer(self) -> bool:
+        """Whether this DType is a scalar integer type."""
+        return not self.is_array and self.base_c_type.endswith("_t")
+
     def to_c_decl(self, name: str) -> str:
         """Convert this dtype to the equivalent C/C++ declaration with the given name.
 
@@ -1,3 +1,11 @@
+from .frozen import FrozenDiGraph, FrozenGraph, FrozenGraphBase
 from .graph import DiGraph, Graph, GraphBase
 
-__all__ = ["DiGraph", "Graph", "GraphBase"]
+__all__ = [
+    "DiGraph",
+    "FrozenDiGraph",
+    "FrozenGraph",
+    "FrozenGraphBase",
+    "Graph",
+    "GraphBase",
+]
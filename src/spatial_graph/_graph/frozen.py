@@ -0,0 +1,574 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Literal
+
+import numpy as np
+
+from spatial_graph._dtypes import DType
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+
+class FrozenGraphBase:
+    """A read-only graph, stored in compressed sparse row (CSR) format.
+
+    Nodes are sorted by their ID, and the position of a node in `nodes` is its
+    index in the CSR arrays: the neighbors of the node with index `i` are
+    `nodes[indices[indptr[i] : indptr[i + 1]]]`, sorted by ID. Node and edge
+    attributes are stored as one read-only array per attribute.
+
+    Frozen graphs are created with `GraphBase.freeze` and provide the same
+    query and attribute API as regular graphs, except for modifications.
+
+    Parameters
+    ----------
+    node_dtype : str
+        The data type of the node IDs.
+    node_attr_dtypes : Mapping[str, str]
+        A mapping of node attribute names to their data types.
+    edge_attr_dtypes : Mapping[str, str]
+        A mapping of edge attribute names to their data types.
+    nodes : np.ndarray
+        Array of shape `(n,)` with the IDs of all nodes.
+    edges : np.ndarray
+        Array of shape `(m, 2)` with all edges, each edge given once.
+    node_attrs : Mapping[str, np.ndarray]
+        The value of each node attribute, aligned with `nodes`.
+    edge_attrs : Mapping[str, np.ndarray]
+        The value of each edge attribute, aligned with `edges`.
+    """
+
+    directed: bool = False
+
+    def __init__(
+        self,
+        node_dtype: str,
+        node_attr_dtypes: Mapping[str, str],
+        edge_attr_dtypes: Mapping[str, str],
+        nodes: np.ndarray,
+        edges: np.ndarray,
+        node_attrs: Mapping[str, np.ndarray],
+        edge_attrs: Mapping[str, np.ndarray],
+    ) -> None:
+        self.node_dtype = node_dtype
+        self.node_attr_dtypes = dict(node_attr_dtypes)
+        self.edge_attr_dtypes = dict(edge_attr_dtypes)
+
+        nodes = np.asarray(nodes, dtype=DType(node_dtype).base)
+        node_order = np.argsort(nodes, kind="stable")
+        self._nodes = _read_only(nodes[node_order])
+        # if node IDs are consecutive integers, the index of a node is its
+        # offset to the first ID
+        self._consecutive = (
+            np.issubdtype(self._nodes.dtype, np.integer)
+            and len(self._nodes) > 0
+            and int(self._nodes[-1]) - int(self._nodes[0]) == len(self._nodes) - 1
+        )
+        self._node_columns = {
+            name: _read_only(np.asarray(values)[node_order])
+            for name, values in node_attrs.items()
+        }
+
+        num_nodes = len(self._nodes)
+        index_dtype = np.int32 if num_nodes < 2**31 else np.int64
+        edges = np.asarray(edges).reshape((-1, 2))
+        us = self._node_indices(edges[:, 0]).astype(np.int64)
+        vs = self._node_indices(edges[:, 1]).astype(np.int64)
+        if not self.directed:
+            us, vs = np.minimum(us, vs), np.maximum(us, vs)
+
+        # edges are sorted by the indices of their nodes, such that the key
+        # "u * num_nodes + v" identifies an edge
+        edge_keys = us * num_nodes + vs
+        edge_order = np.argsort(edge_keys, kind="stable")
+        us, vs = us[edge_order], vs[edge_order]
+        edge_index_dtype = np.int32 if len(us) < 2**31 else np.int64
+        self._edge_keys = _read_only(edge_keys[edge_order])
+        self._edge_columns = {
+            name: _read_only(np.asarray(values)[edge_order])
+            for name, values in edge_attrs.items()
+        }
+
+        if self.directed:
+            # out-edges are the edges in order, in-edges are sorted by target
+            self.indptr = _indptr(us, num_nodes)
+            self.indices = _read_only(vs.astype(index_dtype))
+            self._edge_ids = None
+            in_order = np.argsort(vs * num_nodes + us, kind="stable")
+            self.in_indptr = _indptr(vs[in_order], num_nodes)
+            self.in_indices = _read_only(us[in_order].astype(index_dtype))
+            self._in_edge_ids = _read_only(in_order.astype(edge_index_dtype))
+        else:
+            # each edge appears in the rows of both of its nodes (once for
+            # self-loops)
+            loops = us == vs
+            edge_ids = np.arange(len(us), dtype=edge_index_dtype)
+            rows = np.concatenate((us, vs[~loops]))
+            cols = np.concatenate((vs, us[~loops]))
+            ids = np.concatenate((edge_ids, edge_ids[~loops]))
+            slot_order = np.argsort(rows * num_nodes + cols, kind="stable")
+            self.indptr = _indptr(rows[slot_order], num_nodes)
+            self.indices = _read_only(cols[slot_order].astype(index_dtype))
+            self._edge_ids = _read_only(ids[slot_order])
+
+        self.node_attrs = FrozenNodeAttrs(self)
+        self.edge_attrs = FrozenEdgeAttrs(self)
+
+    @property
+    def nodes(self) -> np.ndarray:
+        """Get all node IDs in the graph.
+
+        Returns
+        -------
+        np.ndarray
+            Read-only array containing all node identifiers in the graph,
+            sorted by ID. The position of a node in this array is its index in
+            the CSR arrays.
+        """
+        return self._nodes
+
+    def nodes_data(self, nodes: np.ndarray | None = None) -> Iterator[tuple[Any, Any]]:
+        """Iterate over nodes and their associated data.
+
+        Parameters
+        ----------
+        nodes : np.ndarray, optional
+            Array of specific node identifiers to iterate over. If None,
+            iterates over all nodes in the graph.
+
+        Yields
+        ------
+        tuple[Any, Any]
+            Tuples of (node_id, node_data) where node_data is a view object
+            providing access to the node's attributes.
+        """
+        nodes = self._nodes if nodes is None else nodes
+        for node in nodes:
+            yield node, self.node_attrs[node]
+
+    def num_edges(self) -> int:
+        """Get the total number of edges in the graph.
+
+        Returns
+        -------
+        int
+            The number of edges in the graph.
+        """
+        return len(self._edge_keys)
+
+    def has_nodes(self, nodes: np.ndarray) -> np.ndarray:
+        """Check which of the given nodes are in the graph.
+
+        Parameters
+        ----------
+        nodes : np.ndarray
+            Array of node identifiers to look up.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean array, `True` for each node that is in the graph.
+        """
+        return self._find_nodes(nodes)[1]
+
+    def has_edges(self, edges: np.ndarray) -> np.ndarray:
+        """Check which of the given edges are in the graph.
+
+        For undirected graphs, the order of the nodes in an edge does not
+        matter.
+
+        Parameters
+        ----------
+        edges : np.ndarray
+            Array of shape `(n, 2)` with the edges to look up.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean array, `True` for each edge that is in the graph.
+        """
+        edges = np.asarray(edges, dtype=self._nodes.dtype).reshape((-1, 2))
+        return self._find_edges(edges[:, 0], edges[:, 1])[1]
+
+    def __len__(self) -> int:
+        """Return the number of nodes in the graph.
+
+        Returns
+        -------
+        int
+            The number of nodes in the graph.
+        """
+        return len(self._nodes)
+
+    def _find_nodes(self, nodes: Any) -> tuple[np.ndarray, np.ndarray]:
+        # the index of each node, and whether it was found (the index is
+        # meaningless otherwise)
+        nodes = np.asarray(nodes, dtype=self._nodes.dtype)
+        flat_nodes = nodes.ravel()
+        if self._consecutive:
+            # unsigned offsets of smaller IDs wrap around
+            offsets = flat_nodes - self._nodes[0]
+            found = (offsets >= 0) & (offsets < len(self._nodes))
+            indices = offsets.astype(np.int64)
+        else:
+            indices = np.searchsorted(self._nodes, flat_nodes)
+            found = indices < len(self._nodes)
+            found[found] = self._nodes[indices[found]] == flat_nodes[found]
+        return indices.reshape(nodes.shape), found.reshape(nodes.shape)
+
+    def _node_indices(self, nodes: Any) -> np.ndarray:
+        indices, found = self._find_nodes(nodes)
+        if not np.all(found):
+            missing = np.asarray(nodes, dtype=self._nodes.dtype)[~found]
+            raise IndexError(f"Nodes {missing} not in graph")
+        return indices
+
+    def _find_edges(self, us: Any, vs: Any) -> tuple[np.ndarray, np.ndarray]:
+        # the index of each edge, and whether it was found (the index is
+        # meaningless otherwise)
+        us, us_found = self._find_nodes(us)
+        vs, vs_found = self._find_nodes(vs)
+        found = (us_found & vs_found).ravel()
+        us = np.where(found, us.ravel(), 0)
+        vs = np.where(found, vs.ravel(), 0)
+        if not self.directed:
+            us, vs = np.minimum(us, vs), np.maximum(us, vs)
+        keys = us * len(self._nodes) + vs
+        indices = np.searchsorted(self._edge_keys, keys)
+        found &= indices < len(self._edge_keys)
+        found[found] = self._edge_keys[indices[found]] == keys[found]
+        return indices.reshape(us_found.shape), found.reshape(us_found.shape)
+
+    def _edge_indices(self, us: Any, vs: Any) -> np.ndarray:
+        indices, found = self._find_edges(us, vs)
+        if not np.all(found):
+            raise IndexError(f"{np.sum(~found)} edges not in graph")
+        return indices
+
+    def _rows(
+        self, indptr: np.ndarray, nodes: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # for each CSR entry of the given nodes, the position in the nodes
+        # array and the position in the CSR arrays
+        node_indices = self._node_indices(nodes)
+        starts = indptr[node_indices]
+        counts = indptr[node_indices + 1] - starts
+        rows = np.repeat(np.arange(len(node_indices)), counts)
+        # shift a running index by the start of each row in the CSR arrays
+        shifts = starts - (np.cumsum(counts) - counts)
+        slots = np.arange(len(rows)) + np.repeat(shifts, counts)
+        return rows, slots
+
+    def _edges_of(
+        self, indptr: np.ndarray, indices: np.ndarray, nodes: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        nodes = np.asarray(nodes, dtype=self._nodes.dtype)
+        rows, slots = self._rows(indptr, nodes)
+        return nodes[rows], self._nodes[indices[slots]]
+
+    def _iter_edges(
+        self, edges: np.ndarray, data: bool
+    ) -> Iterator[tuple] | Iterator[tuple[tuple, Any]]:
+        for u, v in edges.tolist():
+            if data:
+                yield (u, v), self.edge_attrs[(u, v)]
+            else:
+                yield (u, v)
+
+
+class FrozenGraph(FrozenGraphBase):
+    """A read-only, undirected graph in CSR format.
+
+    See `FrozenGraphBase` for details.
+    """
+
+    directed: Literal[False] = False
+
+    def num_neighbors(self, nodes: np.ndarray) -> np.ndarray:
+        """Return the number of neighbors for each node.
+
+        Parameters
+        ----------
+        nodes : np.ndarray
+            Array of node identifiers to count neighbors for.
+
+        Returns
+        -------
+        np.ndarray
+            Array of neighbor counts for each node in the input array.
+        """
+        return np.diff(self.indptr)[self._node_indices(nodes)]
+
+    def edges(self, node: Any = None, data: bool = False) -> Iterator[tuple]:
+        """Iterate over edges in the graph.
+
+        Each edge is yielded only once with nodes ordered such that
+        node1 <= node2.
+
+        Parameters
+        ----------
+        node : Any, optional
+            If provided, only iterate over edges incident to this node.
+            If None, iterate over all edges in the graph.
+        data : bool, default False
+            If True, yield (edge, edge_data) tuples. If False, yield
+            only edge tuples.
+
+        Yields
+        ------
+        tuple or tuple[tuple, Any]
+            If `data=False`: tuples of (node1, node2) representing edges.
+            If `data=True`: tuples of ((node1, node2), edge_data) where
+            edge_data provides access to edge attributes.
+        """
+        if node is None:
+            edges = self._edges_by_keys()
+        else:
+            edges = self.edges_by_nodes(np.array([node], dtype=self._nodes.dtype))
+        return self._iter_edges(edges, data)
+
+    def edges_by_nodes(self, nodes: np.ndarray) -> np.ndarray:
+        """Get all edges incident to the specified nodes.
+
+        Edges between nodes in the input array will be reported multiple
+        times (once for each incident node).
+
+        Parameters
+        ----------
+        nodes : np.ndarray
+            Array of node identifiers to find incident edges for.
+
+        Returns
+        -------
+        np.ndarray
+            2D array of shape (n_edges, 2) where each row contains
+            [node1, node2] representing an edge, with node1 <= node2.
+        """
+        us, vs = self._edges_of(self.indptr, self.indices, nodes)
+        return np.stack((np.minimum(us, vs), np.maximum(us, vs)), axis=1)
+
+    def _edges_by_keys(self) -> np.ndarray:
+        num_nodes = max(len(self._nodes), 1)
+        return np.stack(
+            (
+                self._nodes[self._edge_keys // num_nodes],
+                self._nodes[self._edge_keys % num_nodes],
+            ),
+            axis=1,
+        )
+
+
+class FrozenDiGraph(FrozenGraphBase):
+    """A read-only, directed graph in CSR format.
+
+    Next to the CSR arrays `indptr` and `indices` for outgoing edges, the
+    arrays `in_indptr` and `in_indices` hold the incoming edges of each node.
+    See `FrozenGraphBase` for details.
+    """
+
+    directed: Literal[True] = True
+
+    def num_in_neighbors(self, nodes: np.ndarray) -> np.ndarray:
+        """Return the number of incoming neighbors for each node.
+
+        Parameters
+        ----------
+        nodes : np.ndarray
+            Array of node identifiers to count incoming neighbors for.
+
+        Returns
+        -------
+        np.ndarray
+            Array of incoming neighbor counts for each node in the input array.
+        """
+        return np.diff(self.in_indptr)[self._node_indices(nodes)]
+
+    def num_out_neighbors(self, nodes: np.ndarray) -> np.ndarray:
+        """Return the number of outgoing neighbors for each node.
+
+        Parameters
+        ----------
+        nodes : np.ndarray
+            Array of node identifiers to count outgoing neighbors for.
+
+        Returns
+        -------
+        np.ndarray
+            Array of outgoing neighbor counts for each node in the input array.
+        """
+        return np.diff(self.indptr)[self._node_indices(nodes)]
+
+    def in_edges(self, node: Any = None, data: bool = False) -> Iterator[tuple]:
+        """Iterate over incoming edges to a node.
+
+        Parameters
+        ----------
+        node : Any
+            The target node to find incoming edges for. If None, iterate over
+            all edges in the graph.
+        data : bool
+            If True, yield (edge, edge_data) tuples. If False, yield
+            only edge tuples.
+
+        Yields
+        ------
+        tuple or tuple[tuple, Any]
+            If `data=False`: tuples of (source_node, target_node).
+            If `data=True`: tuples of ((source_node, target_node), edge_data)
+            where edge_data provides access to edge attributes.
+        """
+        nodes = (
+            self._nodes if node is None else np.asarray([node], dtype=self._nodes.dtype)
+        )
+        return self._iter_edges(self.in_edges_by_nodes(nodes), data)
+
+    def in_edges_by_nodes(self, nodes: np.ndarray) -> np.ndarray:
+        """Get all incoming edges to the specified nodes.
+
+        Parameters
+        ----------
+        nodes : np.ndarray
+            Array of node identifiers to find incoming edges for.
+
+        Returns
+        -------
+        np.ndarray
+            2D array of shape (n_edges, 2) where each row contains
+            [source_node, target_node] representing an incoming edge
+            to one of the specified nodes.
+        """
+        vs, us = self._edges_of(self.in_indptr, self.in_indices, nodes)
+        return np.stack((us, vs), axis=1)
+
+    def out_edges(self, node: Any = None, data: bool = False) -> Iterator[tuple]:
+        """Iterate over outgoing edges from a node.
+
+        Parameters
+        ----------
+        node : Any
+            The source node to find outgoing edges for. If None, iterate over
+            all edges in the graph.
+        data : bool
+            If True, yield (edge, edge_data) tuples. If False, yield
+            only edge tuples.
+
+        Yields
+        ------
+        tuple or tuple[tuple, Any]
+            If `data=False`: tuples of (source_node, target_node).
+            If `data=True`: tuples of ((source_node, target_node), edge_data)
+            where edge_data provides access to edge attributes.
+        """
+        nodes = (
+            self._nodes if node is None else np.asarray([node], dtype=self._nodes.dtype)
+        )
+        return self._iter_edges(self.out_edges_by_nodes(nodes), data)
+
+    def out_edges_by_nodes(self, nodes: np.ndarray) -> np.ndarray:
+        """Get all outgoing edges from the specified nodes.
+
+        Parameters
+        ----------
+        nodes : np.ndarray
+            Array of node identifiers to find outgoing edges for.
+
+        Returns
+        -------
+        np.ndarray
+            2D array of shape (n_edges, 2) where each row contains
+            [source_node, target_node] representing an outgoing edge
+            from one of the specified nodes.
+        """
+        us, vs = self._edges_of(self.indptr, self.indices, nodes)
+        return np.stack((us, vs), axis=1)
+
+
+class FrozenNodeAttrsView:
+    """Read-only access to the attributes of all, some, or a single node."""
+
+    graph: FrozenGraphBase
+    nodes: Any
+    _indices: np.ndarray | None
+
+    def __init__(self, graph: FrozenGraphBase, nodes: Any = None) -> None:
+        super().__setattr__("graph", graph)
+        if nodes is None:
+            indices = None
+        else:
+            if not np.isscalar(nodes) and not isinstance(nodes, np.ndarray):
+                nodes = np.array(nodes, dtype=graph._nodes.dtype)
+            indices = graph._node_indices(nodes)
+        super().__setattr__("nodes", nodes)
+        super().__setattr__("_indices", indices)
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        if name not in self.graph.node_attr_dtypes:
+            raise AttributeError(name)
+        column = self.graph._node_columns[name]
+        return column if self._indices is None else column[self._indices]
+
+    def __setattr__(self, name: str, values: Any) -> None:
+        raise TypeError("Attributes of a frozen graph can not be modified")
+
+    def __iter__(self) -> Iterator[tuple[Any, Any]]:
+        return self.graph.nodes_data(self.nodes)
+
+
+class FrozenEdgeAttrsView:
+    """Read-only access to the attributes of all, some, or a single edge."""
+
+    graph: FrozenGraphBase
+    edges: Any
+    _indices: np.ndarray | None
+
+    def __init__(self, graph: FrozenGraphBase, edges: Any = None) -> None:
+        super().__setattr__("graph", graph)
+        if edges is None:
+            indices = None
+        else:
+            edges = np.asarray(edges, dtype=graph._nodes.dtype)
+            if edges.ndim == 1:
+                indices = graph._edge_indices(edges[0], edges[1])
+                edges = tuple(edges)
+            else:
+                edges = edges.reshape((-1, 2))
+                indices = graph._edge_indices(edges[:, 0], edges[:, 1])
+        super().__setattr__("edges", edges)
+        super().__setattr__("_indices", indices)
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        if name not in self.graph.edge_attr_dtypes:
+            raise AttributeError(name)
+        column = self.graph._edge_columns[name]
+        return column if self._indices is None else column[self._indices]
+
+    def __setattr__(self, name: str, values: Any) -> None:
+        raise TypeError("Attributes of a frozen graph can not be modified")
+
+
+class FrozenNodeAttrs(FrozenNodeAttrsView):
+    def __init__(self, graph: FrozenGraphBase) -> None:
+        super().__init__(graph, nodes=None)
+
+    def __getitem__(self, nodes: Any) -> FrozenNodeAttrsView:
+        return FrozenNodeAttrsView(self.graph, nodes)
+
+
+class FrozenEdgeAttrs(FrozenEdgeAttrsView):
+    def __init__(self, graph: FrozenGraphBase) -> None:
+        super().__init__(graph, edges=None)
+
+    def __getitem__(self, edges: Any) -> FrozenEdgeAttrsView:
+        return FrozenEdgeAttrsView(self.graph, edges)
+
+
+def _indptr(rows: np.ndarray, num_nodes: int) -> np.ndarray:
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_nodes), out=indptr[1:])
+    return _read_only(indptr)
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
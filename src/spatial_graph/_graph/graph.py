@@ -82,6 +82,33 @@ class Graph(GraphBase):
         """
         return self._cgraph.edges_by_nodes(nodes)
 
+    def neighbors_csr(
+        self, nodes: np.ndarray | None = None, edge_attrs: list[str] | None = None
+    ) -> tuple:
+        """Get the neighbors of nodes in compressed sparse row (CSR) format.
+
+        The neighbors of all nodes are collected in a single pass over the
+        adjacency, into contiguous arrays that can be processed vectorized.
+
+        Parameters
+        ----------
+        nodes : np.ndarray, optional
+            Array of node identifiers to get the neighbors of. If not given,
+            all nodes in the order of `nodes`.
+        edge_attrs : list[str], optional
+            Names of edge attributes to return alongside the neighbors.
+
+        Returns
+        -------
+        tuple
+            `(indptr, indices)` or, if `edge_attrs` is given,
+            `(indptr, indices, columns)`: the neighbors of `nodes[i]` are
+            `indices[indptr[i]:indptr[i + 1]]`, and `columns` maps each name
+            in `edge_attrs` to an array with the attribute value of each edge
+            to those neighbors, aligned with `indices`.
+        """
+        return self._neighbors_csr(self._cgraph.neighbors_csr, nodes, edge_attrs)
+
 
 class DiGraph(GraphBase):
     directed: Literal[True] = True
@@ -174,6 +201,33 @@ class DiGraph(GraphBase):
         """
         return self._cgraph.in_edges_by_nodes(nodes)
 
+    def in_neighbors_csr(
+        self, nodes: np.ndarray | None = None, edge_attrs: list[str] | None = None
+    ) -> tuple:
+        """Get the incoming neighbors (predecessors) of nodes in CSR format.
+
+        The neighbors of all nodes are collected in a single pass over the
+        adjacency, into contiguous arrays that can be processed vectorized.
+
+        Parameters
+        ----------
+        nodes : np.ndarray, optional
+            Array of node identifiers to get the predecessors of. If not given,
+            all nodes in the order of `nodes`.
+        edge_attrs : list[str], optional
+            Names of edge attributes to return alongside the predecessors.
+
+        Returns
+        -------
+        tuple
+            `(indptr, indices)` or, if `edge_attrs` is given,
+            `(indptr, indices, columns)`: the predecessors of `nodes[i]` are
+            `indices[indptr[i]:indptr[i + 1]]`, and `columns` maps each name
+            in `edge_attrs` to an array with the attribute value of each edge
+            to those predecessors, aligned with `indices`.
+        """
+        return self._neighbors_csr(self._cgraph.in_neighbors_csr, nodes, edge_attrs)
+
     @overload
     def out_edges(
         self, node: Any = ..., data: Literal[True] = ...
@@ -225,3 +279,30 @@ class DiGraph(GraphBase):
             from one of the specified nodes.
         """
         return self._cgraph.out_edges_by_nodes(nodes)
+
+    def out_neighbors_csr(
+        self, nodes: np.ndarray | None = None, edge_attrs: list[str] | None = None
+    ) -> tuple:
+        """Get the outgoing neighbors (successors) of nodes in CSR format.
+
+        The neighbors of all nodes are collected in a single pass over the
+        adjacency, into contiguous arrays that can be processed vectorized.
+
+        Parameters
+        ----------
+        nodes : np.ndarray, optional
+            Array of node identifiers to get the successors of. If not given,
+            all nodes in the order of `nodes`.
+        edge_attrs : list[str], optional
+            Names of edge attributes to return alongside the successors.
+
+        Returns
+        -------
+        tuple
+            `(indptr, indices)` or, if `edge_attrs` is given,
+            `(indptr, indices, columns)`: the successors of `nodes[i]` are
+            `indices[indptr[i]:indptr[i + 1]]`, and `columns` maps each name
+            in `edge_attrs` to an array with the attribute value of each edge
+            to those successors, aligned with `indices`.
+        """
+        return self._neighbors_csr(self._cgraph.out_neighbors_csr, nodes, edge_attrs)
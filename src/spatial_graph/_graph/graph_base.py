@@ -1,20 +1,29 @@
 from __future__ import annotations
 
+import json
 import sys
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Literal, TypeVar
 
+import numpy as np
 import witty
 from Cheetah.Template import Template
 
+from spatial_graph import _aot
 from spatial_graph._dtypes import DType
 
+from .frozen import FrozenDiGraph, FrozenGraph
 from .views import EdgeAttrs, NodeAttrs
 
 if TYPE_CHECKING:
     from collections.abc import Iterator, Mapping
+    from os import PathLike
 
-    import numpy as np
+    from .frozen import FrozenGraphBase
+
+
+# the type of a graph, for methods that create a graph of their own type
+GraphT = TypeVar("GraphT", bound="GraphBase")
 
 
 # Set platform-specific compile arguments
@@ -32,12 +41,35 @@ else:
 
 SRC_DIR = Path(__file__).parent
 
+# version of the directory layout written by GraphBase.save
+SAVE_FORMAT_VERSION = 1
+
+# graph_lite containers for the neighbors of a node, by option name
+NEIGHBOR_CONTAINERS = {
+    # vector with linear search: compact and fastest for low-degree nodes
+    "vec": "VEC",
+    # ordered tree: logarithmic search, neighbors are iterated in order
+    "set": "SET",
+    # hash table: constant time search, for graphs with high-degree nodes
+    "unordered_set": "UNORDERED_SET",
+}
+
+# reductions supported by aggregate_edges and aggregate_neighbors, and their
+# codes in the compiled graph
+AGGREGATION_OPS = {"sum": 0, "max": 1, "min": 2, "mean": 3}
+
+# compiled graph classes of this process, by node and attribute dtypes
+_COMPILED_GRAPHS: dict[tuple, type] = {}
+
 
 def _build_wrapper(
     node_dtype: str,
     node_attr_dtypes: Mapping[str, str] | None = None,
     edge_attr_dtypes: Mapping[str, str] | None = None,
     directed: bool = False,
+    columnar: bool = False,
+    dense_ids: bool = False,
+    neighbor_container: str = "vec",
 ) -> str:
     if node_attr_dtypes is None:
         node_attr_dtypes = {}
@@ -47,6 +79,15 @@ def _build_wrapper(
         raise ValueError("Node attribute names must be valid identifiers")
     if not all(str.isidentifier(name) for name in edge_attr_dtypes):
         raise ValueError("Edge attribute names must be valid identifiers")
+    if neighbor_container not in NEIGHBOR_CONTAINERS:
+        raise ValueError(
+            f"Invalid neighbor container {neighbor_container!r}, must be one of "
+            f"{list(NEIGHBOR_CONTAINERS)}"
+        )
+    if dense_ids and not DType(node_dtype).is_integer:
+        raise ValueError(
+            f"Dense node IDs require an integer node dtype, not {node_dtype!r}"
+        )
 
     wrapper_template = Template(
         file=str(SRC_DIR / "wrapper_template.pyx"),
@@ -60,6 +101,10 @@ def _build_wrapper(
         name: DType(dtype) for name, dtype in edge_attr_dtypes.items()
     }
     wrapper_template.directed = directed
+    wrapper_template.columnar = columnar
+    wrapper_template.dense_ids = dense_ids
+    wrapper_template.neighbor_container = NEIGHBOR_CONTAINERS[neighbor_container]
+    wrapper_template.row_dtype = DType("uint64")
 
     return str(wrapper_template)
 
@@ -69,25 +114,73 @@ def _compile_graph(
     node_attr_dtypes: Mapping[str, str] | None = None,
     edge_attr_dtypes: Mapping[str, str] | None = None,
     directed: bool = False,
+    columnar: bool = False,
+    dense_ids: bool = False,
+    neighbor_container: str = "vec",
 ) -> type:
-    wrapper_template = _build_wrapper(
-        node_dtype=node_dtype,
-        node_attr_dtypes=node_attr_dtypes,
-        edge_attr_dtypes=edge_attr_dtypes,
-        directed=directed,
+    key = (
+        node_dtype,
+        tuple((node_attr_dtypes or {}).items()),
+        tuple((edge_attr_dtypes or {}).items()),
+        directed,
+        columnar,
+        dense_ids,
+        neighbor_container,
     )
-    wrapper = witty.compile_cython(
-        wrapper_template,
-        source_files=[str(SRC_DIR / "src" / "graph_lite.h")],
-        extra_compile_args=EXTRA_COMPILE_ARGS,
-        include_dirs=[str(SRC_DIR)],
-        language="c++",
-        quiet=True,
+    output_dir = _aot.output_dir()
+    if key in _COMPILED_GRAPHS and output_dir is None:
+        return _COMPILED_GRAPHS[key]
+
+    signature = ("graph", *key)
+    source_files = [SRC_DIR / "wrapper_template.pyx", SRC_DIR / "src" / "graph_lite.h"]
+    sources_hash = _aot.source_hash(
+        *source_files, _aot.DTYPES_SOURCE, args=EXTRA_COMPILE_ARGS
     )
+    wrapper = None
+    if output_dir is None:
+        wrapper = _aot.load_module(signature, sources_hash)
+
+    if wrapper is None:
+        wrapper_template = _build_wrapper(
+            node_dtype=node_dtype,
+            node_attr_dtypes=node_attr_dtypes,
+            edge_attr_dtypes=edge_attr_dtypes,
+            directed=directed,
+            columnar=columnar,
+            dense_ids=dense_ids,
+            neighbor_container=neighbor_container,
+        )
+        wrapper = witty.compile_cython(
+            wrapper_template,
+            source_files=[str(SRC_DIR / "src" / "graph_lite.h")],
+            extra_compile_args=EXTRA_COMPILE_ARGS,
+            include_dirs=[str(SRC_DIR)],
+            language="c++",
+            quiet=True,
+            output_dir=output_dir,
+        )
+        if output_dir is not None:
+            _aot.register_module(output_dir, signature, sources_hash, wrapper)
+
+    _COMPILED_GRAPHS[key] = wrapper.Graph
     return wrapper.Graph
 
 
 class GraphBase:
+    """Base class of graphs with typed node IDs and node and edge attributes.
+
+    Thread safety: many read-only methods (attribute gathers, neighbor counts,
+    and the spatial queries of spatial graphs) release the GIL, such that
+    reads from several threads run in parallel. Modifying methods (like
+    `add_nodes`, `add_edges`, `remove_nodes`, `remove_edges`, or `move_nodes`)
+    hold the GIL, but that does not exclude the reads that released it. Reads
+    are therefore only thread-safe as long as no other thread modifies the
+    graph at the same time; a modification during a read can free or move
+    memory the read still uses. To read while the graph is modified, create a
+    `copy` (or `freeze` the graph) in the writing thread and hand that to the
+    readers.
+    """
+
     directed: bool = False
 
     def __init__(
@@ -95,17 +188,31 @@ class GraphBase:
         node_dtype: str,
         node_attr_dtypes: Mapping[str, str] | None = None,
         edge_attr_dtypes: Mapping[str, str] | None = None,
+        columnar: bool = False,
+        dense_ids: bool = False,
+        neighbor_container: str = "vec",
     ):
         super().__init__()
         self.node_dtype = node_dtype
         self.node_attr_dtypes = node_attr_dtypes or {}
         self.edge_attr_dtypes = edge_attr_dtypes or {}
+        # store node attributes in one contiguous array per attribute, such
+        # that reading an attribute of all nodes does not need to copy
+        self.columnar = columnar
+        # store nodes in a vector indexed by their ID instead of a hash map,
+        # for graphs with node IDs in [0, n)
+        self.dense_ids = dense_ids
+        # the container for the neighbors of each node, see NEIGHBOR_CONTAINERS
+        self.neighbor_container = neighbor_container
 
         cgraph_cls = _compile_graph(
             node_dtype=self.node_dtype,
             node_attr_dtypes=self.node_attr_dtypes,
             edge_attr_dtypes=self.edge_attr_dtypes,
             directed=self.directed,
+            columnar=self.columnar,
+            dense_ids=self.dense_ids,
+            neighbor_container=self.neighbor_container,
         )
         self._cgraph = cgraph_cls()
 
@@ -219,6 +326,66 @@ class GraphBase:
         """
         return self._cgraph.add_edges(edges, *args, **kwargs)
 
+    def from_arrays(
+        self: GraphT,
+        nodes: np.ndarray,
+        node_attrs: Mapping[str, np.ndarray] | None = None,
+        edges: np.ndarray | None = None,
+        edge_attrs: Mapping[str, np.ndarray] | None = None,
+    ) -> GraphT:
+        """Add nodes and edges with their attributes in bulk.
+
+        Storage for the nodes and for the neighbors of each node is reserved
+        up front, from the number of nodes and the degrees of the nodes in
+        `edges`, before any node or edge is added. On an empty spatial graph,
+        the spatial indices are bulk-loaded.
+
+        Parameters
+        ----------
+        nodes : np.ndarray
+            Array of node identifiers to add to the graph.
+        node_attrs : Mapping[str, np.ndarray], optional
+            Mapping from node attribute names to arrays with one value per
+            node, see `add_nodes`.
+        edges : np.ndarray, optional
+            Array of shape `(n, 2)` with the edges to add. As in `add_edges`,
+            edges involving nodes that are not in the graph are skipped.
+        edge_attrs : Mapping[str, np.ndarray], optional
+            Mapping from edge attribute names to arrays with one value per
+            edge, see `add_edges`.
+
+        Returns
+        -------
+        GraphBase
+            This graph, such that a graph can be created with
+            `create_graph(...).from_arrays(...)`.
+        """
+        nodes = np.ascontiguousarray(nodes, dtype=self.node_dtype)
+        self._cgraph.reserve_nodes(nodes)
+        self.add_nodes(nodes, **(node_attrs or {}))
+        if edges is not None:
+            edges = np.ascontiguousarray(edges, dtype=self.node_dtype).reshape(-1, 2)
+            self._reserve_neighbors(edges)
+            self.add_edges(edges, **(edge_attrs or {}))
+        return self
+
+    def _reserve_neighbors(self, edges: np.ndarray) -> None:
+        # reserve neighbor storage for the nodes of the given edges, skipping
+        # edges between nodes that are not in the graph (as add_edges does)
+        exist = self._cgraph.has_nodes(edges.ravel()).reshape(-1, 2)
+        edges = edges[exist.all(axis=1)]
+        if len(edges) == 0:
+            return
+        nodes, indices = np.unique(edges, return_inverse=True)
+        indices = indices.reshape(-1, 2)
+        num_out = np.bincount(indices[:, 0], minlength=len(nodes))
+        num_in = np.bincount(indices[:, 1], minlength=len(nodes))
+        if not self.directed:
+            num_out += num_in
+        self._cgraph.reserve_neighbors(
+            nodes, num_out.astype(np.int64), num_in.astype(np.int64)
+        )
+
     @property
     def nodes(self) -> np.ndarray:
         """Get all node IDs in the graph.
@@ -230,10 +397,207 @@ class GraphBase:
         -------
         np.ndarray
             Array containing all node identifiers in the graph, ordered
-            by insertion order (earliest added first).
+            by insertion order (earliest added first). For `columnar`
+            graphs, the order is the order of rows in the attribute arrays:
+            removing a node moves the last node into its row. Otherwise,
+            for graphs with `dense_ids`, nodes are ordered by ID.
         """
         return self._cgraph.nodes()
 
+    def copy(self: GraphT) -> GraphT:
+        """Create a copy of this graph.
+
+        The copy holds the same nodes, edges, and attributes, but is
+        independent of this graph: modifications to either one will not
+        affect the other.
+
+        Returns
+        -------
+        GraphBase
+            A new graph of the same type and with the same content.
+        """
+        return self._with_cgraph(self._cgraph.copy())
+
+    def subgraph(self: GraphT, nodes: np.ndarray) -> GraphT:
+        """Create the subgraph induced by the given nodes.
+
+        The subgraph holds the given nodes and all edges between them,
+        together with their attributes, and is independent of this graph.
+
+        Parameters
+        ----------
+        nodes : np.ndarray
+            Array of node IDs to include. Nodes that are not in this graph are
+            ignored.
+
+        Returns
+        -------
+        GraphBase
+            A new graph of the same type, holding the selected part of this
+            graph.
+        """
+        nodes = np.asarray(nodes, dtype=self.node_dtype)
+        return self._with_cgraph(self._cgraph.subgraph(nodes))
+
+    def _with_cgraph(self: GraphT, cgraph: Any) -> GraphT:
+        # create a graph of the same type with the given compiled graph
+        graph = self.__class__.__new__(self.__class__)
+        graph.__dict__.update(self.__dict__)
+        graph._cgraph = cgraph
+        graph.node_attrs = NodeAttrs(graph)
+        graph.edge_attrs = EdgeAttrs(graph)
+        return graph
+
+    def freeze(self) -> FrozenGraphBase:
+        """Create a read-only version of this graph in CSR format.
+
+        The frozen graph stores nodes, edges, and attributes in contiguous
+        arrays, which take less memory and are faster to traverse. It
+        supports the same queries and attribute access as this graph, but
+        can not be modified.
+
+        Returns
+        -------
+        FrozenGraphBase
+            A `FrozenDiGraph` for directed graphs, a `FrozenGraph` otherwise.
+        """
+        cls = FrozenDiGraph if self.directed else FrozenGraph
+        return cls(**self._freeze_args())
+
+    def _freeze_args(self) -> dict[str, Any]:
+        nodes, node_attrs = self.node_arrays()
+        edges, edge_attrs = self.edge_arrays()
+        return {
+            "node_dtype": self.node_dtype,
+            "node_attr_dtypes": self.node_attr_dtypes,
+            "edge_attr_dtypes": self.edge_attr_dtypes,
+            "nodes": nodes,
+            "edges": edges,
+            "node_attrs": node_attrs,
+            "edge_attrs": edge_attrs,
+        }
+
+    def save(self, path: str | PathLike) -> None:
+        """Save this graph to a directory.
+
+        Node IDs, node attributes, edges, and edge attributes are stored as
+        `.npy` files, next to a `metadata.json` file describing the graph.
+        Use `load` to restore the graph.
+
+        Parameters
+        ----------
+        path : str or PathLike
+            The directory to save the graph to. Will be created if it does not
+            exist.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        arrays = self._to_save_arrays()
+        for name, array in arrays.items():
+            np.save(path / f"{name}.npy", array)
+
+        metadata = self._save_metadata()
+        metadata["arrays"] = list(arrays.keys())
+        (path / "metadata.json").write_text(json.dumps(metadata, indent=2))
+
+    @classmethod
+    def load(cls, path: str | PathLike, mmap: bool = True) -> GraphBase:
+        """Load a graph that was stored with `save`.
+
+        The type of the returned graph is the type of the saved graph.
+
+        Parameters
+        ----------
+        path : str or PathLike
+            The directory the graph was saved to.
+        mmap : bool, default True
+            If set, the stored arrays are memory-mapped instead of being read
+            into memory before they are copied into the graph.
+
+        Returns
+        -------
+        GraphBase
+            The loaded graph.
+        """
+        from spatial_graph._util import create_graph
+
+        path = Path(path)
+        metadata = json.loads((path / "metadata.json").read_text())
+        if metadata.get("version") != SAVE_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported graph format version {metadata.get('version')!r} "
+                f"in {path}"
+            )
+
+        graph = create_graph(
+            node_dtype=metadata["node_dtype"],
+            ndims=metadata.get("ndims"),
+            node_attr_dtypes=metadata["node_attr_dtypes"],
+            edge_attr_dtypes=metadata["edge_attr_dtypes"],
+            position_attr=metadata.get("position_attr"),
+            directed=metadata["directed"],
+            columnar=metadata.get("columnar", False),
+            dense_ids=metadata.get("dense_ids", False),
+            neighbor_container=metadata.get("neighbor_container", "vec"),
+        )
+        if not isinstance(graph, cls):
+            raise TypeError(
+                f"Graph stored in {path} is a {type(graph).__name__}, not a "
+                f"{cls.__name__}"
+            )
+
+        # copy-on-write memory maps, since the Cython wrappers expect writeable
+        # buffers
+        mmap_mode: Literal["c"] | None = "c" if mmap else None
+        arrays = {
+            name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode)
+            for name in metadata["arrays"]
+        }
+        graph._from_save_arrays(arrays)
+
+        return graph
+
+    def _save_metadata(self) -> dict[str, Any]:
+        return {
+            "version": SAVE_FORMAT_VERSION,
+            "node_dtype": self.node_dtype,
+            "node_attr_dtypes": dict(self.node_attr_dtypes),
+            "edge_attr_dtypes": dict(self.edge_attr_dtypes),
+            "directed": self.directed,
+            "columnar": self.columnar,
+            "dense_ids": self.dense_ids,
+            "neighbor_container": self.neighbor_container,
+        }
+
+    def _to_save_arrays(self) -> dict[str, np.ndarray]:
+        nodes, node_attrs = self.node_arrays()
+        edges, edge_attrs = self.edge_arrays()
+
+        arrays = {"nodes": nodes, "edges": edges}
+        for name, column in node_attrs.items():
+            arrays[f"node_attr_{name}"] = column
+        for name, column in edge_attrs.items():
+            arrays[f"edge_attr_{name}"] = column
+
+        return arrays
+
+    def _from_save_arrays(self, arrays: Mapping[str, np.ndarray]) -> None:
+        # add nodes and edges to the graph storage only, subclasses restore
+        # their own data structures
+        self._cgraph.reserve_nodes(arrays["nodes"])
+        GraphBase.add_nodes(
+            self,
+            arrays["nodes"],
+            **{name: arrays[f"node_attr_{name}"] for name in self.node_attr_dtypes},
+        )
+        self._reserve_neighbors(arrays["edges"])
+        GraphBase.add_edges(
+            self,
+            arrays["edges"],
+            **{name: arrays[f"edge_attr_{name}"] for name in self.edge_attr_dtypes},
+        )
+
     def remove_node(self, node: Any) -> None:
         """Remove a single node from the graph.
 
@@ -258,6 +622,43 @@ class GraphBase:
         """
         return self._cgraph.remove_nodes(nodes)
 
+    def remove_edge(self, edge: Any) -> int:
+        """Remove a single edge from the graph.
+
+        The nodes of the edge are not removed.
+
+        Parameters
+        ----------
+        edge : Any
+            The edge to remove, as a pair of node identifiers `(u, v)`.
+
+        Returns
+        -------
+        int
+            Number of edges removed (1 if successful, 0 if the edge does not
+            exist).
+        """
+        u, v = edge
+        return self._cgraph.remove_edge(u, v)
+
+    def remove_edges(self, edges: np.ndarray) -> int:
+        """Remove multiple edges from the graph.
+
+        The nodes of the edges are not removed. Edges that do not exist are
+        ignored.
+
+        Parameters
+        ----------
+        edges : np.ndarray
+            Array of shape `(n, 2)` with the edges to remove.
+
+        Returns
+        -------
+        int
+            Number of edges successfully removed.
+        """
+        return self._cgraph.remove_edges(edges)
+
     def nodes_data(self, nodes: np.ndarray | None = None) -> Iterator[tuple[Any, Any]]:
         """Iterate over nodes and their associated data.
 
@@ -310,6 +711,269 @@ class GraphBase:
         """
         return self._cgraph.num_edges()
 
+    def has_nodes(self, nodes: np.ndarray) -> np.ndarray:
+        """Check which of the given nodes are in the graph.
+
+        Parameters
+        ----------
+        nodes : np.ndarray
+            Array of node identifiers to look up.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean array, `True` for each node that is in the graph.
+        """
+        return self._cgraph.has_nodes(nodes)
+
+    def has_edges(self, edges: np.ndarray) -> np.ndarray:
+        """Check which of the given edges are in the graph.
+
+        For undirected graphs, the order of the nodes in an edge does not
+        matter.
+
+        Parameters
+        ----------
+        edges : np.ndarray
+            Array of shape `(n, 2)` with the edges to look up.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean array, `True` for each edge that is in the graph.
+        """
+        return self._cgraph.has_edges(edges)
+
+    def connected_components(
+        self, edge_attr: str | None = None, threshold: float | None = None
+    ) -> np.ndarray:
+        """Label the connected components of the graph.
+
+        For directed graphs, the weakly connected components are labelled,
+        i.e., edge directions are ignored.
+
+        Parameters
+        ----------
+        edge_attr : str, optional
+            The name of a scalar edge attribute. If given, only edges with a
+            value larger than `threshold` for this attribute connect nodes.
+        threshold : float, optional
+            The threshold for `edge_attr`.
+
+        Returns
+        -------
+        np.ndarray
+            Array of component labels, aligned with `nodes`. Labels are
+            numbered consecutively from 0, in the order of `nodes`.
+        """
+        if edge_attr is None:
+            return self._cgraph.connected_components()
+        if edge_attr not in self.edge_attr_dtypes or (
+            DType(self.edge_attr_dtypes[edge_attr]).is_array
+        ):
+            raise ValueError(f"{edge_attr!r} is not a scalar edge attribute")
+        if threshold is None:
+            raise ValueError("A threshold is needed to filter by edge attribute")
+        edge_attr_index = list(self.edge_attr_dtypes).index(edge_attr)
+        return self._cgraph.connected_components(edge_attr_index, threshold)
+
+    def node_arrays(self) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """Get all nodes and their attributes as arrays.
+
+        Returns
+        -------
+        tuple[np.ndarray, dict[str, np.ndarray]]
+            The node IDs (in the order of `nodes`) and a dictionary mapping
+            each node attribute name to an array of its values, aligned with
+            the node IDs.
+        """
+        return self._cgraph.node_arrays()
+
+    def edge_arrays(self) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """Get all edges and their attributes as arrays.
+
+        Edges and attribute values are collected in a single pass over the
+        graph, which is much faster than iterating over `edges` or reading
+        each attribute separately.
+
+        Returns
+        -------
+        tuple[np.ndarray, dict[str, np.ndarray]]
+            Array of shape `(n, 2)` with all edges (each undirected edge once,
+            as `(u, v)` with `u < v`) and a dictionary mapping each edge
+            attribute name to an array of its values, aligned with the edges.
+        """
+        return self._cgraph.edge_arrays()
+
+    def aggregate_edges(
+        self, attr: str, op: str = "sum", nodes: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Reduce an edge attribute over the incident edges of each node.
+
+        For directed graphs, both incoming and outgoing edges are incident.
+
+        Parameters
+        ----------
+        attr : str
+            The name of the edge attribute to reduce.
+        op : str
+            The reduction, one of "sum", "max", "min", or "mean".
+        nodes : np.ndarray, optional
+            Array of node IDs to compute the reduction for. If not given, all
+            nodes in the order of `nodes`.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape `(len(nodes),)` for scalar attributes, or
+            `(len(nodes), n)` for array attributes of size `n`, with the
+            reduced values as `float64`. Nodes without edges get 0 for "sum"
+            and NaN otherwise.
+        """
+        if attr not in self.edge_attr_dtypes:
+            raise ValueError(f"{attr!r} is not an edge attribute")
+        index = list(self.edge_attr_dtypes).index(attr)
+        dtype = DType(self.edge_attr_dtypes[attr])
+        return self._aggregate(nodes, op, dtype, edge_attr_index=index)
+
+    def aggregate_neighbors(
+        self, attr: str, op: str = "mean", nodes: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Reduce a node attribute over the neighbors of each node.
+
+        For directed graphs, both predecessors and successors are neighbors.
+        A neighbor connected by several edges is counted once per edge.
+
+        Parameters
+        ----------
+        attr : str
+            The name of the node attribute to reduce.
+        op : str
+            The reduction, one of "sum", "max", "min", or "mean".
+        nodes : np.ndarray, optional
+            Array of node IDs to compute the reduction for. If not given, all
+            nodes in the order of `nodes`.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape `(len(nodes),)` for scalar attributes, or
+            `(len(nodes), n)` for array attributes of size `n`, with the
+            reduced values as `float64`. Nodes without neighbors get 0 for
+            "sum" and NaN otherwise.
+        """
+        if attr not in self.node_attr_dtypes:
+            raise ValueError(f"{attr!r} is not a node attribute")
+        index = list(self.node_attr_dtypes).index(attr)
+        dtype = DType(self.node_attr_dtypes[attr])
+        return self._aggregate(nodes, op, dtype, node_attr_index=index)
+
+    def _aggregate(self, nodes, op, dtype, **indices) -> np.ndarray:
+        if op not in AGGREGATION_OPS:
+            raise ValueError(
+                f"Invalid aggregation {op!r}, must be one of {list(AGGREGATION_OPS)}"
+            )
+        if nodes is None:
+            nodes = self.nodes
+        nodes = np.ascontiguousarray(nodes, dtype=self.node_dtype)
+        self._check_nodes_exist(nodes)
+        size = dtype.size if dtype.is_array else 1
+        result = self._cgraph.aggregate(nodes, size, AGGREGATION_OPS[op], **indices)
+        return result if dtype.is_array else result[:, 0]
+
+    def shortest_path(self, source, target, weight: str | None = None) -> np.ndarray:
+        """Find the shortest path between two nodes.
+
+        For directed graphs, paths follow the direction of the edges.
+
+        Parameters
+        ----------
+        source : node
+            The node to start from.
+        target : node
+            The node to reach.
+        weight : str, optional
+            Determines the length of each edge, which has to be non-negative
+            (a `ValueError` is raised otherwise). Either the name of a scalar
+            edge attribute, or the name of an array node attribute (like the
+            position of a spatial graph), in which case the Euclidean distance
+            between the two nodes is used. If not given, each edge has length
+            1.
+
+        Returns
+        -------
+        np.ndarray
+            The nodes along the path, starting with `source` and ending with
+            `target`. Empty if `target` can not be reached from `source`.
+        """
+        self._check_nodes_exist([source, target])
+        return self._cgraph.shortest_path(source, target, *self._weight_indices(weight))
+
+    def shortest_path_lengths(
+        self, sources, cutoff: float | None = None, weight: str | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the distances of all nodes to the closest of the given sources.
+
+        For directed graphs, paths follow the direction of the edges.
+
+        Parameters
+        ----------
+        sources : node or array-like of nodes
+            The nodes to measure distances from.
+        cutoff : float, optional
+            If given, only nodes with a distance of at most `cutoff` are
+            reported.
+        weight : str, optional
+            Determines the length of each edge, see `shortest_path`.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            The reached nodes (including the sources) and their distances, in
+            order of increasing distance.
+        """
+        sources = np.atleast_1d(np.asarray(sources, dtype=self.node_dtype))
+        self._check_nodes_exist(sources)
+        if cutoff is None:
+            cutoff = np.inf
+        return self._cgraph.shortest_path_lengths(
+            np.ascontiguousarray(sources), cutoff, *self._weight_indices(weight)
+        )
+
+    def _neighbors_csr(self, cgraph_method, nodes, edge_attrs) -> tuple:
+        # shared implementation of (in_/out_)neighbors_csr
+        if nodes is None:
+            nodes = self.nodes
+        nodes = np.ascontiguousarray(nodes, dtype=self.node_dtype)
+        self._check_nodes_exist(nodes)
+        if edge_attrs is None:
+            return cgraph_method(nodes)[:2]
+        for name in edge_attrs:
+            if name not in self.edge_attr_dtypes:
+                raise ValueError(f"{name!r} is not an edge attribute")
+        return cgraph_method(nodes, edge_attrs)
+
+    def _check_nodes_exist(self, nodes) -> None:
+        nodes = np.asarray(nodes, dtype=self.node_dtype)
+        missing = nodes[~self._cgraph.has_nodes(nodes)]
+        if len(missing) > 0:
+            raise IndexError(f"Nodes {missing.tolist()} are not in the graph")
+
+    def _weight_indices(self, weight: str | None) -> tuple[int, int]:
+        # map a weight name to the (edge_attr_index, position_index) pair
+        # understood by the compiled shortest path methods
+        if weight is None:
+            return -1, -1
+        if weight in self.edge_attr_dtypes:
+            if DType(self.edge_attr_dtypes[weight]).is_array:
+                raise ValueError(f"Edge attribute {weight!r} is not a scalar")
+            return list(self.edge_attr_dtypes).index(weight), -1
+        if weight in self.node_attr_dtypes:
+            if not DType(self.node_attr_dtypes[weight]).is_array:
+                raise ValueError(f"Node attribute {weight!r} is not an array")
+            return -1, list(self.node_attr_dtypes).index(weight)
+        raise ValueError(f"{weight!r} is neither an edge nor a node attribute")
+
     def __len__(self) -> int:
         """Return the number of nodes in the graph.
 
@@ -8,6 +8,9 @@
 #include <unordered_map>
 #include <set>
 #include <unordered_set>
+#include <optional>
+#include <tuple>
+#include <stdexcept>
 #include <algorithm>
 #include <memory>
 #include <type_traits>
@@ -39,7 +42,8 @@ namespace graph_lite {
 
     // map for adj list
     enum class Map {
-        MAP, UNORDERED_MAP
+        MAP, UNORDERED_MAP,
+        DENSE  // vector indexed by node; for small, non-negative integer nodes
     };
 
     // Logging permission
@@ -92,6 +96,147 @@ namespace graph_lite::detail {
     template<typename T>
     constexpr bool is_either_map_v = is_map_v<T> or is_unordered_map_v<T>;
 
+    // a map from non-negative integers to values, stored in a vector indexed
+    // by key; implements the subset of the map interface used for adj lists
+    template<typename Key, typename T>
+    class DenseMap {
+        static_assert(std::is_integral_v<Key>, "DenseMap requires integer keys");
+    public:
+        using key_type = Key;
+        using mapped_type = T;
+        using value_type = std::pair<const Key, T>;
+        using size_type = size_t;
+    private:
+        using SlotsType = std::vector<std::optional<value_type>>;
+        SlotsType slots;
+        size_t num_values{};
+
+        template<bool IsConst>
+        class Iter {
+        public:
+            using difference_type = std::ptrdiff_t;
+            using value_type = std::pair<const Key, T>;
+            using reference = std::conditional_t<IsConst, const value_type&, value_type&>;
+            using pointer = std::conditional_t<IsConst, const value_type*, value_type*>;
+            using iterator_category = std::bidirectional_iterator_tag;
+        private:
+            friend class DenseMap;
+            template<bool>
+            friend class Iter;
+            using SlotsPtr = std::conditional_t<IsConst, const SlotsType*, SlotsType*>;
+            SlotsPtr slots{};
+            size_t index{};
+        public:
+            Iter()=default;
+            Iter(SlotsPtr slots, size_t index): slots{slots}, index{index} {}
+
+            // enables implicit conversion from non-const to const
+            template<bool WasConst, typename=std::enable_if_t<IsConst or !WasConst>>
+            Iter(const Iter<WasConst>& other): slots{other.slots}, index{other.index} {}
+
+            Iter& operator++() {  // prefix, skips empty slots
+                do { ++index; } while (index < slots->size() and !(*slots)[index]);
+                return *this;
+            }
+            Iter operator++(int) & {  // postfix
+                Iter tmp = *this;
+                ++(*this);
+                return tmp;
+            }
+            Iter& operator--() {  // prefix, skips empty slots
+                do { --index; } while (!(*slots)[index]);
+                return *this;
+            }
+            Iter operator--(int) & {  // postfix
+                Iter tmp = *this;
+                --(*this);
+                return tmp;
+            }
+            reference operator*() const { return *(*slots)[index]; }
+            pointer operator->() const { return &*(*slots)[index]; }
+            friend bool operator==(const Iter& lhs, const Iter& rhs) { return lhs.index == rhs.index; }
+            friend bool operator!=(const Iter& lhs, const Iter& rhs) { return lhs.index != rhs.index; }
+        };
+
+        size_t first_index() const {
+            size_t index = 0;
+            while (index < slots.size() and !slots[index]) { ++index; }
+            return index;
+        }
+        bool contains(const Key& key) const {
+            if constexpr(std::is_signed_v<Key>) {
+                if (key < 0) { return false; }
+            }
+            return static_cast<size_t>(key) < slots.size() and slots[key];
+        }
+    public:
+        using iterator = Iter<false>;
+        using const_iterator = Iter<true>;
+
+        iterator begin() noexcept { return {&slots, first_index()}; }
+        iterator end() noexcept { return {&slots, slots.size()}; }
+        const_iterator begin() const noexcept { return {&slots, first_index()}; }
+        const_iterator end() const noexcept { return {&slots, slots.size()}; }
+        const_iterator cbegin() const noexcept { return begin(); }
+        const_iterator cend() const noexcept { return end(); }
+
+        [[nodiscard]] size_t size() const noexcept { return num_values; }
+        [[nodiscard]] size_t count(const Key& key) const { return contains(key); }
+
+        // prepare storage for keys smaller than num_slots
+        void reserve(size_t num_slots) { slots.reserve(num_slots); }
+
+        iterator find(const Key& key) {
+            return {&slots, contains(key) ? static_cast<size_t>(key) : slots.size()};
+        }
+        const_iterator find(const Key& key) const {
+            return {&slots, contains(key) ? static_cast<size_t>(key) : slots.size()};
+        }
+
+        template<typename KeyTuple, typename ValueTuple>
+        std::pair<iterator, bool> emplace(std::piecewise_construct_t, KeyTuple&& key_args, ValueTuple&& value_args) {
+            Key key{std::make_from_tuple<Key>(std::forward<KeyTuple>(key_args))};
+            if constexpr(std::is_signed_v<Key>) {
+                if (key < 0) {
+                    throw std::out_of_range("dense node IDs have to be non-negative");
+                }
+            }
+            size_t index = static_cast<size_t>(key);
+            if (index < slots.size() and slots[index]) {
+                return {{&slots, index}, false};
+            }
+            if (index >= slots.size()) {
+                // grow geometrically, nodes are usually added in increasing order
+                if (index >= slots.capacity()) {
+                    slots.reserve(std::max(index + 1, 2 * slots.capacity()));
+                }
+                slots.resize(index + 1);
+            }
+            slots[index].emplace(std::piecewise_construct, std::forward_as_tuple(key),
+                                 std::forward<ValueTuple>(value_args));
+            ++num_values;
+            return {{&slots, index}, true};
+        }
+
+        T& operator[](const Key& key) {
+            if (!contains(key)) {
+                emplace(std::piecewise_construct, std::forward_as_tuple(key), std::forward_as_tuple());
+            }
+            return slots[key]->second;
+        }
+
+        iterator erase(const_iterator pos) {
+            slots[pos.index].reset();
+            --num_values;
+            iterator next{&slots, pos.index};
+            return ++next;
+        }
+        iterator erase(const_iterator first, const_iterator last) {
+            while (first != last) { first = erase(first); }
+            return {&slots, last.index};
+        }
+    };
+
     // CREDIT: https://stackoverflow.com/questions/765148/how-to-remove-constness-of-const-iterator
     template <typename ContainerType, typename ConstIterator>
     typename ContainerType::iterator const_iter_to_iter(ContainerType& c, ConstIterator it) {
@@ -430,7 +575,7 @@ namespace graph_lite::detail {
         }
 
         template<typename NT, typename ...NPT>
-        int add_node_with_prop(NT&& new_node, NPT&&... prop) noexcept {
+        int add_node_with_prop(NT&& new_node, NPT&&... prop) {
             static_assert(std::is_same_v<remove_cv_ref_t<NT>, typename GType::node_type>);
             static_assert(std::is_constructible_v<NodePropType, NPT...>);
             auto* self = static_cast<GType*>(this);
@@ -619,6 +764,8 @@ namespace graph_lite {
                             or neighbors_container_spec == Container::MULTISET
                             or adj_list_spec == Map::MAP)
                         and !detail::is_comparable_v<NodeType>), "NodeType does not support operator <");
+        static_assert(not (adj_list_spec == Map::DENSE
+                        and !std::is_integral_v<NodeType>), "dense adj list requires an integer NodeType");
         static_assert(not (detail::MultiEdgeTraits<neighbors_container_spec>::value == MultiEdge::DISALLOWED
                         and multi_edge == MultiEdge::ALLOWED), "node container does not support multi-edge");
         static_assert(not ((neighbors_container_spec == Container::MULTISET or neighbors_container_spec == Container::UNORDERED_MULTISET)
@@ -788,7 +935,9 @@ namespace graph_lite {
         using AdjListValueType = std::conditional_t<not has_node_prop, NeighborsType, PropNode>;
         using AdjListType = std::conditional_t<adj_list_spec == Map::MAP,
                                                std::map<NodeType, AdjListValueType>,
-                                               std::unordered_map<NodeType, AdjListValueType>>;
+                                               std::conditional_t<adj_list_spec == Map::DENSE,
+                                                                  detail::DenseMap<NodeType, AdjListValueType>,
+                                                                  std::unordered_map<NodeType, AdjListValueType>>>;
     public:  // iterator types
         using NeighborsConstIterator = typename NeighborsContainerType::const_iterator;
     private:
@@ -1080,6 +1229,33 @@ namespace graph_lite {
 
         [[nodiscard]] int num_edges() const noexcept { return num_of_edges; }
 
+        // reserve storage for num_nodes nodes (node IDs below num_nodes for
+        // Map::DENSE), no-op for Map::MAP
+        void reserve(size_t num_nodes) {
+            if constexpr(adj_list_spec != Map::MAP) { adj_list.reserve(num_nodes); }
+        }
+
+        // reserve storage for num_out (num_in) more out- (in-) neighbors of a node,
+        // no-op for ordered neighbor containers and lists; num_in is ignored for
+        // undirected graphs
+        template<typename T>
+        void reserve_neighbors(const T& node_iv, size_t num_out, size_t num_in) {
+            AdjListIterType pos = find_by_iter_or_by_value(node_iv);
+            if (pos==adj_list.end()) {
+                throw std::runtime_error("reserving neighbors of a non-existent node");
+            }
+            if constexpr(neighbors_container_spec == Container::VEC
+                         or neighbors_container_spec == Container::UNORDERED_SET
+                         or neighbors_container_spec == Container::UNORDERED_MULTISET) {
+                NeighborsContainerType& out_neighbors = get_out_neighbors(pos);
+                out_neighbors.reserve(out_neighbors.size() + num_out);
+                if constexpr(direction != EdgeDirection::UNDIRECTED) {
+                    NeighborsContainerType& in_neighbors = get_in_neighbors(pos);
+                    in_neighbors.reserve(in_neighbors.size() + num_in);
+                }
+            }
+        }
+
         template<typename T>
         bool has_node(const T& node_identifier) const noexcept {
             auto pos = find_node(node_identifier);
@@ -1247,9 +1423,8 @@ namespace graph_lite {
                     }
                     return 0;
                 }
-                remove_edge(ConstIterator{src_pos}, src_remove_pos);
-                --num_of_edges;
-                return 1;
+                // the edge count is decremented by the iterator version
+                return remove_edge(ConstIterator{src_pos}, src_remove_pos);
             } else {  // remove all edges between src and tgt, potentially removing no edge at all
                 static_assert(multi_edge==MultiEdge::ALLOWED);
                 static_assert(neighbors_container_spec != Container::SET and neighbors_container_spec != Container::UNORDERED_SET);
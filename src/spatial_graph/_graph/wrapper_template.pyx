@@ -1,11 +1,15 @@
 from cython cimport view
 from cython.operator cimport dereference as deref, preincrement as inc
 from libc.stdint cimport *
+from libc.math cimport INFINITY, NAN, sqrt
+from libcpp.queue cimport priority_queue
+from libcpp.unordered_map cimport unordered_map
 from libcpp.utility cimport pair
+from libcpp.vector cimport vector
 import numpy as np
 
 
-cdef extern from *:
+cdef extern from * nogil:
     """
     #include "src/graph_lite.h"
 
@@ -23,8 +27,12 @@ cdef extern from *:
         %end if
         graph_lite::MultiEdge::DISALLOWED,
         graph_lite::SelfLoop::DISALLOWED,
+        %if $dense_ids
+        graph_lite::Map::DENSE,
+        %else
         graph_lite::Map::UNORDERED_MAP,
-        graph_lite::Container::VEC
+        %end if
+        graph_lite::Container::$neighbor_container
     > {};
     """
 
@@ -45,7 +53,7 @@ cdef extern from *:
             bint operator==(NeighborsIterator)
             bint operator!=(NeighborsIterator)
 
-        int add_node_with_prop(NodeType& node, NodeData& prop)
+        int add_node_with_prop(NodeType& node, NodeData& prop) except +
 
         int add_edge_with_prop(NodeType& source, NodeType& target, EdgeData& prop)
 
@@ -65,6 +73,12 @@ cdef extern from *:
 
         int remove_nodes(NodeType& node)
 
+        int remove_edge(NodeType& source, NodeType& target)
+
+        bint has_node(NodeType& node)
+
+        int count_edges(NodeType& source, NodeType& target)
+
         %if $directed
         int count_in_neighbors(NodeType& node)
         int count_out_neighbors(NodeType& node)
@@ -76,14 +90,24 @@ cdef extern from *:
 
         size_t num_edges() const
 
+        void reserve(size_t num_nodes)
+
+        void reserve_neighbors(NodeType& node, size_t num_out, size_t num_in) except +
+
         Iterator begin()
 
         Iterator end()
 
 ctypedef $node_dtype.to_pyxtype() NodeType
 
+%if $columnar
+## node attributes are stored in columns, nodes only store their row
+%set $node_data_dtypes = {"row": $row_dtype}
+%else
+%set $node_data_dtypes = $node_attr_dtypes
+%end if
 %for class_name, dtypes in [
-    ("NodeData", $node_attr_dtypes),
+    ("NodeData", $node_data_dtypes),
     ("EdgeData", $edge_attr_dtypes)
 ]
 cdef extern from *:
@@ -162,6 +186,58 @@ cdef class ${class_name}View:
 
 %end for
 
+%if $columnar
+cdef class NodeRowView:
+
+    cdef dict _columns
+    cdef Py_ssize_t _row
+
+    def __init__(self, dict columns):
+        self._columns = columns
+
+    cdef set_row(self, Py_ssize_t row):
+        self._row = row
+
+    %for name, dtype in $node_attr_dtypes.items():
+    @property
+    def ${name}(self):
+        return self._columns["$name"][self._row]
+
+    @${name}.setter
+    def ${name}(self, value):
+        self._columns["$name"][self._row] = value
+
+    %end for
+
+
+def _resized(array, Py_ssize_t capacity, Py_ssize_t size):
+    resized = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    resized[:size] = array[:size]
+    return resized
+
+%end if
+cdef inline void _accumulate(
+        double* result, vector[double]& values, int op, bint first) noexcept nogil:
+    # combine values into result with op (0: sum/mean, 1: max, 2: min)
+    cdef size_t d
+    for d in range(values.size()):
+        if first or (op == 0):
+            result[d] = values[d] if first else result[d] + values[d]
+        elif op == 1:
+            result[d] = max(result[d], values[d])
+        else:
+            result[d] = min(result[d], values[d])
+
+
+cdef inline Py_ssize_t _find_root(
+        vector[Py_ssize_t]& parent, Py_ssize_t i) noexcept nogil:
+    # union-find root lookup with path halving
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
 ctypedef GraphTmpl[NodeType, NodeData, EdgeData] GraphType
 ctypedef GraphType.Iterator NodeIterator
 ctypedef GraphType.NeighborsIterator NeighborsIterator
@@ -171,10 +247,129 @@ cdef class Graph:
 
     cdef GraphType _graph
 
+    %if $columnar
+    # node attributes are stored in one array per attribute, the NodeData of
+    # each node holds the node's row in these arrays. Rows are dense: when a
+    # node is removed, the last row takes its place.
+    cdef Py_ssize_t _num_rows
+    cdef object _node_ids
+    %for name, dtype in $node_attr_dtypes.items()
+    cdef object _column_${name}
+    %end for
+
+    def __cinit__(self):
+        self._num_rows = 0
+        self._node_ids = np.empty((0,), dtype="$node_dtype.base")
+        %for name, dtype in $node_attr_dtypes.items()
+        self._column_${name} = np.empty((0,) + $dtype.shape, dtype="$dtype.base")
+        %end for
+
+    cdef _reserve_rows(self, Py_ssize_t num_rows):
+        cdef Py_ssize_t capacity = len(self._node_ids)
+        if num_rows <= capacity:
+            return
+        capacity = max(num_rows, 2 * capacity)
+        self._node_ids = _resized(self._node_ids, capacity, self._num_rows)
+        %for name, dtype in $node_attr_dtypes.items()
+        self._column_${name} = _resized(
+            self._column_${name}, capacity, self._num_rows)
+        %end for
+
+    cdef _node_rows(self, NodeType[:] nodes):
+        cdef Py_ssize_t i
+        cdef Py_ssize_t num_nodes = len(nodes)
+        rows = np.empty((num_nodes,), dtype=np.intp)
+        cdef Py_ssize_t[::1] _rows = rows
+        with nogil:
+            for i in range(num_nodes):
+                _rows[i] = self._graph.node_prop(nodes[i]).row
+        return rows
+
+    cdef _remove_row(self, Py_ssize_t row):
+        cdef Py_ssize_t last = self._num_rows - 1
+        cdef NodeType[::1] node_ids = self._node_ids
+        %for name, dtype in $node_attr_dtypes.items()
+        cdef $dtype.to_pyxtype(add_dim=True) column_${name} = self._column_${name}
+        %end for
+        if row != last:
+            node_ids[row] = node_ids[last]
+            %for name, dtype in $node_attr_dtypes.items()
+            %if $dtype.is_array
+            %for j in range($dtype.size)
+            column_${name}[row, $j] = column_${name}[last, $j]
+            %end for
+            %else
+            column_${name}[row] = column_${name}[last]
+            %end if
+            %end for
+            self._graph.node_prop(node_ids[row]).row = row
+        self._num_rows -= 1
+
+    %end if
     %for kind, Kind, dtypes in [
         ("node", "Node", $node_attr_dtypes),
         ("edge", "Edge", $edge_attr_dtypes)
     ]
+    %if kind == "node" and $columnar
+    def add_node(
+            self,
+            NodeType node,
+            %set sep=""
+            %for name, dtype in $dtypes.items()
+            $sep${dtype.to_pyxtype(use_memory_view=True)} $name
+            %set $sep=", "
+            %end for
+    ):
+
+        self._reserve_rows(self._num_rows + 1)
+        cdef size_t row = self._num_rows
+        if not self._graph.add_node_with_prop(node, NodeData(row)):
+            return 0
+        self._node_ids[row] = node
+        %for name, dtype in $dtypes.items()
+        self._column_${name}[row] = $name
+        %end for
+        self._num_rows += 1
+
+        return 1
+
+    def add_nodes(
+            self,
+            NodeType[::1] nodes,
+            %set sep=""
+            %for name, dtype in $dtypes.items()
+            $sep${dtype.to_pyxtype(use_memory_view=True, add_dim=True)} $name
+            %set $sep=", "
+            %end for
+    ):
+
+        cdef Py_ssize_t i
+        cdef Py_ssize_t num_nodes = len(nodes)
+        cdef Py_ssize_t num_added = 0
+        cdef size_t first_row = self._num_rows
+        self._reserve_rows(self._num_rows + num_nodes)
+        cdef NodeType[::1] node_ids = self._node_ids
+        # the index in "nodes" of each added node
+        added = np.empty((num_nodes,), dtype=np.intp)
+        cdef Py_ssize_t[::1] _added = added
+
+        for i in range(num_nodes):
+            if self._graph.add_node_with_prop(
+                    nodes[i], NodeData(first_row + num_added)):
+                node_ids[first_row + num_added] = nodes[i]
+                _added[num_added] = i
+                num_added += 1
+
+        added = added[:num_added]
+        %for name, dtype in $dtypes.items()
+        self._column_${name}[first_row:first_row + num_added] = np.take(
+            np.asarray($name), added, axis=0)
+        %end for
+        self._num_rows += num_added
+
+        return num_added
+
+    %else
     def add_${kind}(
             self,
             %if kind == "node"
@@ -264,11 +459,16 @@ cdef class Graph:
 
         return num_added
 
+    %end if
     %end for
 
     def nodes(self):
         """Get all node IDs."""
 
+        %if $columnar
+        return self._node_ids[:self._num_rows].copy()
+        %else
+
         cdef NodeIterator it = self._graph.begin()
         cdef NodeIterator end = self._graph.end()
         node_ids = np.empty((self._graph.size(),), dtype="$node_dtype.base")
@@ -277,9 +477,126 @@ cdef class Graph:
             node_ids[i] = deref(it)
             inc(it)
 
+        %if $dense_ids
+        # nodes are stored by ID
+        return node_ids
+        %else
         # graph_lite iterates over nodes in reverse order of addition, fix that
         # here
         return node_ids[::-1]
+        %end if
+        %end if
+
+    def node_arrays(self):
+        """Get all nodes and their attributes as arrays.
+
+        Returns the nodes (in the order of nodes()) and a dictionary with one
+        column per node attribute, in the same order.
+        """
+
+        %if $columnar
+        return self.nodes(), {
+            %for name, dtype in $node_attr_dtypes.items()
+            "$name": self._column_${name}[:self._num_rows].copy(),
+            %end for
+        }
+        %else
+        cdef NodeIterator it = self._graph.begin()
+        cdef NodeIterator end = self._graph.end()
+        cdef Py_ssize_t num_nodes = self._graph.size()
+        cdef Py_ssize_t i = 0, j
+
+        nodes = np.empty((num_nodes,), dtype="$node_dtype.base")
+        cdef NodeType[::1] _nodes = nodes
+        %for name, dtype in $node_attr_dtypes.items()
+        column_${name} = np.empty((num_nodes,) + $dtype.shape, dtype="$dtype.base")
+        cdef $dtype.to_pyxtype(add_dim=True) _column_${name} = column_${name}
+        %end for
+
+        with nogil:
+            while it != end:
+                %if $dense_ids
+                j = i
+                %else
+                # graph_lite iterates over nodes in reverse order of addition
+                j = num_nodes - 1 - i
+                %end if
+                _nodes[j] = deref(it)
+                %for name, dtype in $node_attr_dtypes.items()
+                %if $dtype.is_array
+                %for d in range($dtype.size)
+                _column_${name}[j, $d] = self._graph.node_prop(it).${name}[$d]
+                %end for
+                %else
+                _column_${name}[j] = self._graph.node_prop(it).$name
+                %end if
+                %end for
+                i += 1
+                inc(it)
+
+        return nodes, {
+            %for name, dtype in $node_attr_dtypes.items()
+            "$name": column_${name},
+            %end for
+        }
+        %end if
+
+    def edge_arrays(self):
+        """Get all edges and their attributes as arrays, in one pass over the
+        adjacency.
+
+        Returns an (n, 2) array of edges (with u < v for undirected graphs) and
+        a dictionary with one column per edge attribute, in the same order.
+        """
+
+        cdef NodeIterator node_it = self._graph.begin()
+        cdef NodeIterator node_end = self._graph.end()
+        cdef pair[NeighborsIterator, NeighborsIterator] view
+        cdef NeighborsIterator it, end
+        cdef NodeType u, v
+        cdef Py_ssize_t num_edges = self._graph.num_edges()
+        cdef Py_ssize_t i = 0
+
+        edges = np.empty((num_edges, 2), dtype="$node_dtype.base")
+        cdef NodeType[:, ::1] _edges = edges
+        %for name, dtype in $edge_attr_dtypes.items()
+        column_${name} = np.empty((num_edges,) + $dtype.shape, dtype="$dtype.base")
+        cdef $dtype.to_pyxtype(add_dim=True) _column_${name} = column_${name}
+        %end for
+
+        with nogil:
+            while node_it != node_end:
+                %if $directed
+                view = self._graph.out_neighbors(node_it)
+                %else
+                view = self._graph.neighbors(node_it)
+                %end if
+                u = deref(node_it)
+                it = view.first
+                end = view.second
+                while it != end:
+                    v = deref(it).first
+                    if ${directed} or u < v:
+                        _edges[i, 0] = u
+                        _edges[i, 1] = v
+                        %for name, dtype in $edge_attr_dtypes.items()
+                        %if $dtype.is_array
+                        %for d in range($dtype.size)
+                        _column_${name}[i, $d] = deref(it).second.prop().${name}[$d]
+                        %end for
+                        %else
+                        _column_${name}[i] = deref(it).second.prop().$name
+                        %end if
+                        %end for
+                        i += 1
+                    inc(it)
+                inc(node_it)
+
+        return edges, {
+            %for name, dtype in $edge_attr_dtypes.items()
+            "$name": column_${name},
+            %end for
+        }
 
     %if $directed
     %set $prefixes=["in_", "out_"]
@@ -370,11 +687,187 @@ cdef class Graph:
                 inc(it)
 
         return data[:i]
+
+    def ${prefix}neighbors_csr(self, NodeType[::1] nodes, edge_attrs=()):
+        """Get the neighbors of the given nodes in CSR format.
+
+        The neighbors of nodes[i] are indices[indptr[i]:indptr[i + 1]]. For
+        each edge attribute in edge_attrs, a column with the attribute value
+        of each of those edges is returned as well.
+        """
+
+        cdef Py_ssize_t num_nodes = nodes.shape[0]
+        cdef Py_ssize_t i, j = 0
+        cdef pair[NeighborsIterator, NeighborsIterator] view
+        cdef NeighborsIterator it, end
+
+        indptr = np.empty((num_nodes + 1,), dtype=np.int64)
+        cdef int64_t[::1] _indptr = indptr
+        with nogil:
+            _indptr[0] = 0
+            for i in range(num_nodes):
+                _indptr[i + 1] = (
+                    _indptr[i] + self._graph.count_${prefix}neighbors(nodes[i]))
+        cdef Py_ssize_t num_edges = _indptr[num_nodes]
+
+        indices = np.empty((num_edges,), dtype="$node_dtype.base")
+        cdef NodeType[::1] _indices = indices
+        columns = {}
+        %for name, dtype in $edge_attr_dtypes.items()
+        cdef bint fill_${name} = "$name" in edge_attrs
+        if fill_${name}:
+            columns["$name"] = np.empty(
+                (num_edges,) + $dtype.shape, dtype="$dtype.base")
+        cdef $dtype.to_pyxtype(add_dim=True) column_${name} = columns.get(
+            "$name", np.empty((0,) + $dtype.shape, dtype="$dtype.base"))
+        %end for
+
+        with nogil:
+            for i in range(num_nodes):
+                view = self._graph.${prefix}neighbors(nodes[i])
+                it = view.first
+                end = view.second
+                while it != end:
+                    _indices[j] = deref(it).first
+                    %for name, dtype in $edge_attr_dtypes.items()
+                    if fill_${name}:
+                        %if $dtype.is_array
+                        %for d in range($dtype.size)
+                        column_${name}[j, $d] = deref(it).second.prop().${name}[$d]
+                        %end for
+                        %else
+                        column_${name}[j] = deref(it).second.prop().$name
+                        %end if
+                    %end for
+                    j += 1
+                    inc(it)
+
+        return indptr, indices, {name: columns[name] for name in edge_attrs}
     %end for
 
+    def copy(self):
+        """Create a copy of this graph, including all attributes."""
+
+        cdef Graph graph = Graph()
+        cdef NodeIterator node_it = self._graph.begin()
+        cdef NodeIterator node_end = self._graph.end()
+        cdef vector[NodeType] nodes
+        cdef pair[NeighborsIterator, NeighborsIterator] edges_view
+        cdef NeighborsIterator it, end
+        cdef NodeType u, v
+        cdef size_t i
+
+        with nogil:
+            # graph_lite iterates over nodes in reverse order of addition, add
+            # them in reverse to preserve the order
+            nodes.reserve(self._graph.size())
+            while node_it != node_end:
+                nodes.push_back(deref(node_it))
+                inc(node_it)
+            for i in range(nodes.size()):
+                u = nodes[nodes.size() - 1 - i]
+                graph._graph.add_node_with_prop(u, self._graph.node_prop(u))
+
+            node_it = self._graph.begin()
+            while node_it != node_end:
+                %if $directed
+                edges_view = self._graph.out_neighbors(node_it)
+                %else
+                edges_view = self._graph.neighbors(node_it)
+                %end if
+                u = deref(node_it)
+                it = edges_view.first
+                end = edges_view.second
+                while it != end:
+                    v = deref(it).first
+                    if ${directed} or u < v:
+                        graph._graph.add_edge_with_prop(u, v, deref(it).second.prop())
+                    inc(it)
+                inc(node_it)
+
+        %if $columnar
+        # the NodeData (rows) were copied with the nodes, copy the columns
+        graph._num_rows = self._num_rows
+        graph._node_ids = self._node_ids[:self._num_rows].copy()
+        %for name, dtype in $node_attr_dtypes.items()
+        graph._column_${name} = self._column_${name}[:self._num_rows].copy()
+        %end for
+
+        %end if
+        return graph
+
+    def subgraph(self, NodeType[:] nodes):
+        """Create the subgraph induced by the given nodes, including all
+        attributes. Nodes that are not in this graph are ignored."""
+
+        cdef Graph graph = Graph()
+        cdef vector[NodeType] added
+        cdef pair[NeighborsIterator, NeighborsIterator] edges_view
+        cdef NeighborsIterator it, end
+        cdef NodeType u, v
+        cdef Py_ssize_t i
+        %if $columnar
+        cdef vector[Py_ssize_t] rows
+        %end if
+
+        with nogil:
+            for i in range(nodes.shape[0]):
+                u = nodes[i]
+                if not self._graph.has_node(u):
+                    continue
+                if graph._graph.add_node_with_prop(u, self._graph.node_prop(u)):
+                    %if $columnar
+                    rows.push_back(self._graph.node_prop(u).row)
+                    graph._graph.node_prop(u).row = added.size()
+                    %end if
+                    added.push_back(u)
+
+            for i in range(added.size()):
+                u = added[i]
+                %if $directed
+                edges_view = self._graph.out_neighbors(u)
+                %else
+                edges_view = self._graph.neighbors(u)
+                %end if
+                it = edges_view.first
+                end = edges_view.second
+                while it != end:
+                    v = deref(it).first
+                    if (${directed} or u < v) and graph._graph.has_node(v):
+                        graph._graph.add_edge_with_prop(u, v, deref(it).second.prop())
+                    inc(it)
+
+        %if $columnar
+        # the rows of the copied nodes are numbered in order of addition
+        row_indices = np.array(rows, dtype=np.intp)
+        graph._num_rows = len(row_indices)
+        graph._node_ids = self._node_ids[row_indices]
+        %for name, dtype in $node_attr_dtypes.items()
+        graph._column_${name} = self._column_${name}[row_indices]
+        %end for
+
+        %end if
+        return graph
+
     # generator access to node and edge data
 
     def nodes_data(self, NodeType[::1] nodes = None):
+        %if $columnar
+        cdef NodeRowView node_data = NodeRowView({
+            %for name, dtype in $node_attr_dtypes.items()
+            "$name": self._column_${name},
+            %end for
+        })
+        cdef Py_ssize_t row
+        if nodes is None:
+            for row in range(self._num_rows):
+                node_data.set_row(row)
+                yield self._node_ids[row], node_data
+        else:
+            for node in nodes:
+                node_data.set_row(self._graph.node_prop(node).row)
+                yield node, node_data
+        %else
         cdef NodeIterator node_it = self._graph.begin()
         cdef NodeIterator node_end = self._graph.end()
         cdef NodeDataView node_data = NodeDataView()
@@ -387,6 +880,7 @@ cdef class Graph:
             for node in nodes:
                 node_data.set_ptr(&self._graph.node_prop(node))
                 yield node, node_data
+        %end if
 
     def edges_data(self, NodeType[::1] us, NodeType[::1] vs):
         cdef EdgeDataView edge_data = EdgeDataView()
@@ -398,6 +892,43 @@ cdef class Graph:
     # access to individual attributes (single and multiple nodes/edges)
 
     %for name, dtype in $node_attr_dtypes.items()
+    %if $columnar
+    def get_node_data_${name}(self, NodeType node):
+        value = self._column_${name}[self._graph.node_prop(node).row]
+        %if $dtype.is_array
+        return value.copy()
+        %else
+        return value
+        %end if
+
+    def get_nodes_data_${name}(self, NodeType[:] nodes):
+
+        # all nodes requested: a read-only view of the column, in the order of
+        # nodes()
+        if nodes is None:
+            data = self._column_${name}[:self._num_rows].view()
+            data.flags.writeable = False
+            return data
+
+        return np.take(self._column_${name}, self._node_rows(nodes), axis=0)
+
+    def set_node_data_${name}(
+            self,
+            NodeType node,
+            $dtype.to_pyxtype(use_memory_view=True) $name):
+        self._column_${name}[self._graph.node_prop(node).row] = $name
+
+    def set_nodes_data_${name}(
+            self,
+            NodeType[:] nodes,
+            $dtype.to_pyxtype(add_dim=True) $name):
+
+        if nodes is None:
+            self._column_${name}[:self._num_rows] = $name
+        else:
+            assert len(nodes) == len($name)
+            self._column_${name}[self._node_rows(nodes)] = $name
+    %else
     def get_node_data_${name}(self, NodeType node):
         %if $dtype.is_array
         return np.array(self._graph.node_prop(node).${name})
@@ -420,30 +951,32 @@ cdef class Graph:
             num_nodes = len(nodes)
         data = np.empty(shape=(num_nodes,) + $dtype.shape, dtype="$dtype.base")
         cdef $dtype.to_pyxtype(add_dim=True) view = data
+        cdef bint all_nodes = nodes is None
 
-        # all nodes requested
-        if nodes is None:
-            while node_it != node_end:
-                %if $dtype.is_array
-                node_data = &self._graph.node_prop(node_it)
-                %for j in range($dtype.size)
-                view[i, $j] = node_data.${name}[$j]
-                %end for
-                %else
-                view[i] = self._graph.node_prop(node_it).${name}
-                %end if
-                inc(node_it)
-                i += 1
-        else:
-            for i in range(num_nodes):
-                %if $dtype.is_array
-                node_data = &self._graph.node_prop(nodes[i])
-                %for j in range($dtype.size)
-                view[i, $j] = node_data.${name}[$j]
-                %end for
-                %else
-                view[i] = self._graph.node_prop(nodes[i]).${name}
-                %end if
+        with nogil:
+            # all nodes requested
+            if all_nodes:
+                while node_it != node_end:
+                    %if $dtype.is_array
+                    node_data = &self._graph.node_prop(node_it)
+                    %for j in range($dtype.size)
+                    view[i, $j] = node_data.${name}[$j]
+                    %end for
+                    %else
+                    view[i] = self._graph.node_prop(node_it).${name}
+                    %end if
+                    inc(node_it)
+                    i += 1
+            else:
+                for i in range(num_nodes):
+                    %if $dtype.is_array
+                    node_data = &self._graph.node_prop(nodes[i])
+                    %for j in range($dtype.size)
+                    view[i, $j] = node_data.${name}[$j]
+                    %end for
+                    %else
+                    view[i] = self._graph.node_prop(nodes[i]).${name}
+                    %end if
 
         return data
 
@@ -492,6 +1025,7 @@ cdef class Graph:
                 %else
                 self._graph.node_prop(nodes[i]).$name = ${name}[i]
                 %end if
+    %end if
     %end for
 
     %for name, dtype in $edge_attr_dtypes.items()
@@ -521,48 +1055,50 @@ cdef class Graph:
             num_edges = len(us)
         data = np.empty(shape=(num_edges,) + $dtype.shape, dtype="$dtype.base")
         cdef $dtype.to_pyxtype(add_dim=True) view = data
+        cdef NeighborsIterator it, end
+        cdef bint all_edges = us is None
 
-        if us is None:
+        with nogil:
+            if all_edges:
 
-
-            while node_it != node_end:
-                %if $directed
-                # iterate over all edges by iterating over all nodes u and
-                # their out neighbors
-                edges_view = self._graph.out_neighbors(node_it)
-                %else
-                # iterate over all edges by iterating over all nodes u and
-                # their neighbors v with u < v
-                edges_view = self._graph.neighbors(node_it)
-                %end if
-                u = deref(node_it)
-                it = edges_view.first
-                end = edges_view.second
-                while it != end:
-                    v = deref(it).first
-                    if ${directed} or u < v:
-                        %if $dtype.is_array
-                        edge_data = &deref(it).second.prop()
-                        %for j in range($dtype.size)
-                        view[i, $j] = edge_data.${name}[$j]
-                        %end for
-                        %else
-                        view[i] = deref(it).second.prop().$name
-                        %end if
-                        i += 1
-                    inc(it)
-                inc(node_it)
-
-        else:
-            for i in range(num_edges):
-                %if $dtype.is_array
-                edge_data = &self._graph.edge_prop(us[i], vs[i])
-                %for j in range($dtype.size)
-                view[i, $j] = edge_data.${name}[$j]
-                %end for
-                %else
-                view[i] = self._graph.edge_prop(us[i], vs[i]).$name
-                %end if
+                while node_it != node_end:
+                    %if $directed
+                    # iterate over all edges by iterating over all nodes u and
+                    # their out neighbors
+                    edges_view = self._graph.out_neighbors(node_it)
+                    %else
+                    # iterate over all edges by iterating over all nodes u and
+                    # their neighbors v with u < v
+                    edges_view = self._graph.neighbors(node_it)
+                    %end if
+                    u = deref(node_it)
+                    it = edges_view.first
+                    end = edges_view.second
+                    while it != end:
+                        v = deref(it).first
+                        if ${directed} or u < v:
+                            %if $dtype.is_array
+                            edge_data = &deref(it).second.prop()
+                            %for j in range($dtype.size)
+                            view[i, $j] = edge_data.${name}[$j]
+                            %end for
+                            %else
+                            view[i] = deref(it).second.prop().$name
+                            %end if
+                            i += 1
+                        inc(it)
+                    inc(node_it)
+
+            else:
+                for i in range(num_edges):
+                    %if $dtype.is_array
+                    edge_data = &self._graph.edge_prop(us[i], vs[i])
+                    %for j in range($dtype.size)
+                    view[i, $j] = edge_data.${name}[$j]
+                    %end for
+                    %else
+                    view[i] = self._graph.edge_prop(us[i], vs[i]).$name
+                    %end if
 
         return data
 
@@ -604,11 +1140,34 @@ cdef class Graph:
     # modify graph
 
     def remove_node(self, NodeType node):
+        %if $columnar
+        cdef Py_ssize_t row
+        if self._graph.has_node(node):
+            row = self._graph.node_prop(node).row
+            self._graph.remove_nodes(node)
+            self._remove_row(row)
+        %else
         self._graph.remove_nodes(node)
+        %end if
 
     def remove_nodes(self, NodeType[::1] nodes):
         for i in range(len(nodes)):
+            %if $columnar
+            self.remove_node(nodes[i])
+            %else
             self._graph.remove_nodes(nodes[i])
+            %end if
+
+    def remove_edge(self, NodeType u, NodeType v):
+        return self._graph.remove_edge(u, v)
+
+    def remove_edges(self, NodeType[:, :] edges):
+        cdef Py_ssize_t i
+        cdef int num_removed = 0
+        with nogil:
+            for i in range(edges.shape[0]):
+                num_removed += self._graph.remove_edge(edges[i, 0], edges[i, 1])
+        return num_removed
 
     # read-only graph properties
 
@@ -619,13 +1178,15 @@ cdef class Graph:
     %end if
     %for prefix in $prefixes
     def num_${prefix}neighbors(self, NodeType[:] nodes):
-        num_nodes = len(nodes)
+        cdef Py_ssize_t i
+        cdef Py_ssize_t num_nodes = len(nodes)
         cdef int[:] counts = view.array(
             shape=(num_nodes,),
             itemsize=sizeof(int),
             format="i")
-        for i in range(num_nodes):
-            counts[i] = self._graph.count_${prefix}neighbors(nodes[i])
+        with nogil:
+            for i in range(num_nodes):
+                counts[i] = self._graph.count_${prefix}neighbors(nodes[i])
         return counts
 
     def _${prefix}neighbors(self, NodeType node, bint data):
@@ -655,3 +1216,478 @@ cdef class Graph:
 
     def num_edges(self):
         return self._graph.num_edges()
+
+    def reserve_nodes(self, const NodeType[::1] nodes):
+        """Prepare the node storage for adding the given nodes."""
+
+        cdef Py_ssize_t num_nodes = nodes.shape[0]
+        if num_nodes == 0:
+            return
+        %if $dense_ids
+        # nodes are stored by ID
+        self._graph.reserve(max(np.max(nodes) + 1, self._graph.size()))
+        %else
+        self._graph.reserve(self._graph.size() + num_nodes)
+        %end if
+        %if $columnar
+        self._reserve_rows(self._num_rows + num_nodes)
+        %end if
+
+    def reserve_neighbors(
+            self,
+            const NodeType[::1] nodes,
+            int64_t[::1] num_out,
+            int64_t[::1] num_in):
+        """Prepare the neighbor storage of nodes for the given number of
+        additional (out- and in-) neighbors. num_in is ignored for undirected
+        graphs."""
+
+        cdef Py_ssize_t i
+        with nogil:
+            for i in range(nodes.shape[0]):
+                self._graph.reserve_neighbors(nodes[i], num_out[i], num_in[i])
+
+    def has_nodes(self, NodeType[:] nodes):
+        cdef Py_ssize_t i
+        result = np.empty((nodes.shape[0],), dtype=bool)
+        cdef uint8_t[::1] _result = result.view(np.uint8)
+        with nogil:
+            for i in range(nodes.shape[0]):
+                _result[i] = self._graph.has_node(nodes[i])
+        return result
+
+    def has_edges(self, NodeType[:, :] edges):
+        cdef Py_ssize_t i
+        result = np.empty((edges.shape[0],), dtype=bool)
+        cdef uint8_t[::1] _result = result.view(np.uint8)
+        with nogil:
+            for i in range(edges.shape[0]):
+                _result[i] = self._graph.count_edges(edges[i, 0], edges[i, 1]) > 0
+        return result
+
+    def connected_components(
+            self,
+            Py_ssize_t edge_attr_index=-1,
+            double threshold=0):
+        """Label the (weakly) connected components of the graph.
+
+        Returns one label per node, aligned with nodes(). Labels are numbered
+        consecutively in the order of nodes(). If edge_attr_index is not -1,
+        only edges with a value larger than threshold for the (scalar) edge
+        attribute with this index connect nodes.
+        """
+
+        cdef Py_ssize_t num_nodes = self._graph.size()
+        cdef unordered_map[NodeType, Py_ssize_t] node_index
+        # union-find forest over the nodes in iteration order
+        cdef vector[Py_ssize_t] parent
+        # the iteration index of each position in nodes()
+        cdef vector[Py_ssize_t] index_at
+        cdef vector[Py_ssize_t] root_label
+        cdef NodeIterator node_it = self._graph.begin()
+        cdef NodeIterator node_end = self._graph.end()
+        cdef pair[NeighborsIterator, NeighborsIterator] view
+        cdef NeighborsIterator it, end
+        cdef Py_ssize_t i, j, root, num_labels = 0
+
+        labels = np.empty((num_nodes,), dtype=np.int64)
+        cdef int64_t[::1] _labels = labels
+
+        with nogil:
+
+            node_index.reserve(num_nodes)
+            parent.resize(num_nodes)
+            index_at.resize(num_nodes)
+            i = 0
+            while node_it != node_end:
+                node_index[deref(node_it)] = i
+                parent[i] = i
+                %if $columnar
+                index_at[self._graph.node_prop(node_it).row] = i
+                %elif $dense_ids
+                index_at[i] = i
+                %else
+                # graph_lite iterates in reverse order of nodes()
+                index_at[num_nodes - 1 - i] = i
+                %end if
+                i += 1
+                inc(node_it)
+
+            node_it = self._graph.begin()
+            i = 0
+            while node_it != node_end:
+                %if $directed
+                view = self._graph.out_neighbors(node_it)
+                %else
+                view = self._graph.neighbors(node_it)
+                %end if
+                it = view.first
+                end = view.second
+                while it != end:
+                    %set $k = 0
+                    %for name, dtype in $edge_attr_dtypes.items()
+                    %if not $dtype.is_array
+                    if edge_attr_index == $k and not (
+                            deref(it).second.prop().$name > threshold):
+                        inc(it)
+                        continue
+                    %end if
+                    %set $k = $k + 1
+                    %end for
+                    j = _find_root(parent, node_index[deref(it).first])
+                    root = _find_root(parent, i)
+                    if root < j:
+                        parent[j] = root
+                    elif j < root:
+                        parent[root] = j
+                    inc(it)
+                i += 1
+                inc(node_it)
+
+            root_label.resize(num_nodes, -1)
+            for j in range(num_nodes):
+                i = _find_root(parent, index_at[j])
+                if root_label[i] == -1:
+                    root_label[i] = num_labels
+                    num_labels += 1
+                _labels[j] = root_label[i]
+
+        return labels
+
+    def shortest_path(
+            self,
+            NodeType source,
+            NodeType target,
+            Py_ssize_t edge_attr_index=-1,
+            Py_ssize_t position_index=-1):
+        """Find the shortest path from source to target.
+
+        See _dijkstra for the meaning of the indices. Returns the nodes along
+        the path, or an empty array if target can not be reached.
+        """
+
+        cdef NodeType[::1] sources = np.array([source], dtype="$node_dtype.base")
+        cdef unordered_map[NodeType, double] distances
+        cdef unordered_map[NodeType, NodeType] predecessors
+        cdef vector[NodeType] settled
+        cdef vector[NodeType] path
+        %if $columnar
+        %for name, dtype in $node_attr_dtypes.items()
+        %if $dtype.is_array
+        cdef $dtype.to_pyxtype(add_dim=True) column_${name} = self._column_${name}
+        %end if
+        %end for
+        %end if
+
+        if self._has_negative_lengths(edge_attr_index):
+            raise ValueError("Edge lengths have to be non-negative")
+
+        with nogil:
+            self._dijkstra(
+                sources, target, True, INFINITY,
+                edge_attr_index, position_index,
+                %if $columnar
+                %for name, dtype in $node_attr_dtypes.items()
+                %if $dtype.is_array
+                column_${name},
+                %end if
+                %end for
+                %end if
+                distances, predecessors, settled)
+            if distances.count(target):
+                path.push_back(target)
+                while path.back() != source:
+                    path.push_back(predecessors[path.back()])
+
+        return np.array(path, dtype="$node_dtype.base")[::-1].copy()
+
+    def shortest_path_lengths(
+            self,
+            NodeType[::1] sources,
+            double cutoff=INFINITY,
+            Py_ssize_t edge_attr_index=-1,
+            Py_ssize_t position_index=-1):
+        """Find the distance to the closest source for all nodes within cutoff.
+
+        See _dijkstra for the meaning of the indices. Returns the reached
+        nodes and their distances, in order of increasing distance.
+        """
+
+        cdef unordered_map[NodeType, double] distances
+        cdef unordered_map[NodeType, NodeType] predecessors
+        cdef vector[NodeType] settled
+        cdef Py_ssize_t i
+        %if $columnar
+        %for name, dtype in $node_attr_dtypes.items()
+        %if $dtype.is_array
+        cdef $dtype.to_pyxtype(add_dim=True) column_${name} = self._column_${name}
+        %end if
+        %end for
+        %end if
+
+        if self._has_negative_lengths(edge_attr_index):
+            raise ValueError("Edge lengths have to be non-negative")
+
+        with nogil:
+            self._dijkstra(
+                sources, sources[0] if sources.shape[0] else 0, False, cutoff,
+                edge_attr_index, position_index,
+                %if $columnar
+                %for name, dtype in $node_attr_dtypes.items()
+                %if $dtype.is_array
+                column_${name},
+                %end if
+                %end for
+                %end if
+                distances, predecessors, settled)
+
+        nodes = np.empty((settled.size(),), dtype="$node_dtype.base")
+        lengths = np.empty((settled.size(),), dtype=np.float64)
+        cdef NodeType[::1] _nodes = nodes
+        cdef double[::1] _lengths = lengths
+        for i in range(settled.size()):
+            _nodes[i] = settled[i]
+            _lengths[i] = distances[settled[i]]
+
+        return nodes, lengths
+
+    %if $columnar
+    cdef double[:, ::1] _node_column(self, Py_ssize_t node_attr_index):
+        # the column of a node attribute as (rows, size) doubles
+        %set $k = 0
+        %for name, dtype in $node_attr_dtypes.items()
+        if node_attr_index == $k:
+            return np.ascontiguousarray(
+                self._column_${name}[:self._num_rows], dtype=np.float64
+            %if $dtype.is_array
+            ).reshape((self._num_rows, $dtype.size))
+            %else
+            ).reshape((self._num_rows, 1))
+            %end if
+        %set $k = $k + 1
+        %end for
+        return np.empty((0, 0), dtype=np.float64)
+
+    %end if
+    cdef bint _has_negative_lengths(
+            self,
+            Py_ssize_t edge_attr_index) noexcept nogil:
+        # whether any edge has a negative (scalar) edge attribute with index
+        # edge_attr_index, which Dijkstra's algorithm can not handle
+
+        cdef NodeIterator node_it = self._graph.begin()
+        cdef NodeIterator node_end = self._graph.end()
+        cdef pair[NeighborsIterator, NeighborsIterator] view
+        cdef NeighborsIterator it, end
+
+        if edge_attr_index == -1:
+            return False
+
+        while node_it != node_end:
+            %if $directed
+            view = self._graph.out_neighbors(node_it)
+            %else
+            view = self._graph.neighbors(node_it)
+            %end if
+            it = view.first
+            end = view.second
+            while it != end:
+                %set $k = 0
+                %for name, dtype in $edge_attr_dtypes.items()
+                %if not $dtype.is_array
+                if edge_attr_index == $k and deref(it).second.prop().$name < 0:
+                    return True
+                %end if
+                %set $k = $k + 1
+                %end for
+                inc(it)
+            inc(node_it)
+
+        return False
+
+    cdef void _dijkstra(
+            self,
+            NodeType[::1] sources,
+            NodeType target,
+            bint stop_at_target,
+            double cutoff,
+            Py_ssize_t edge_attr_index,
+            Py_ssize_t position_index,
+            %if $columnar
+            %for name, dtype in $node_attr_dtypes.items()
+            %if $dtype.is_array
+            $dtype.to_pyxtype(add_dim=True) column_${name},
+            %end if
+            %end for
+            %end if
+            unordered_map[NodeType, double]& distances,
+            unordered_map[NodeType, NodeType]& predecessors,
+            vector[NodeType]& settled) noexcept nogil:
+        # Dijkstra's algorithm along out-edges, starting from all sources.
+        #
+        # The length of an edge is the (scalar) edge attribute with index
+        # edge_attr_index, or the Euclidean distance between the (array) node
+        # attribute with index position_index of its nodes, or 1 if both are
+        # -1. Fills distances and predecessors for all reached nodes, and
+        # settled with the reached nodes in order of increasing distance.
+
+        # max-heap of (-distance, node)
+        cdef priority_queue[pair[double, NodeType]] queue
+        cdef pair[double, NodeType] top
+        cdef pair[NeighborsIterator, NeighborsIterator] view
+        cdef NeighborsIterator it, end
+        cdef NodeType u, v
+        cdef double distance, distance_v, length, diff
+        cdef Py_ssize_t i
+
+        for i in range(sources.shape[0]):
+            distances[sources[i]] = 0
+            predecessors[sources[i]] = sources[i]
+            queue.push(pair[double, NodeType](0, sources[i]))
+
+        while not queue.empty():
+            top = queue.top()
+            queue.pop()
+            u = top.second
+            distance = -top.first
+            if distance > distances[u]:
+                # outdated entry, u was reached on a shorter path since
+                continue
+            settled.push_back(u)
+            if stop_at_target and u == target:
+                break
+
+            %if $directed
+            view = self._graph.out_neighbors(u)
+            %else
+            view = self._graph.neighbors(u)
+            %end if
+            it = view.first
+            end = view.second
+            while it != end:
+                v = deref(it).first
+                length = 1
+                %set $k = 0
+                %for name, dtype in $edge_attr_dtypes.items()
+                %if not $dtype.is_array
+                if edge_attr_index == $k:
+                    length = deref(it).second.prop().$name
+                %end if
+                %set $k = $k + 1
+                %end for
+                if position_index != -1:
+                    length = 0
+                %set $k = 0
+                %for name, dtype in $node_attr_dtypes.items()
+                %if $dtype.is_array
+                    if position_index == $k:
+                        %for d in range($dtype.size)
+                        %if $columnar
+                        diff = (
+                            <double>column_${name}[self._graph.node_prop(v).row, $d] -
+                            <double>column_${name}[self._graph.node_prop(u).row, $d])
+                        %else
+                        diff = (
+                            <double>self._graph.node_prop(v).${name}[$d] -
+                            <double>self._graph.node_prop(u).${name}[$d])
+                        %end if
+                        length += diff * diff
+                        %end for
+                %end if
+                %set $k = $k + 1
+                %end for
+                    length = sqrt(length)
+                distance_v = distance + length
+                if distance_v <= cutoff and (
+                        not distances.count(v) or distance_v < distances[v]):
+                    distances[v] = distance_v
+                    predecessors[v] = u
+                    queue.push(pair[double, NodeType](-distance_v, v))
+                inc(it)
+
+    def aggregate(
+            self,
+            NodeType[::1] nodes,
+            Py_ssize_t size,
+            int op,
+            Py_ssize_t edge_attr_index=-1,
+            Py_ssize_t node_attr_index=-1):
+        """Reduce an edge attribute over the incident edges (or a node
+        attribute over the neighbors) of each of the given nodes.
+
+        The attribute is selected by edge_attr_index (or node_attr_index) and
+        has size values per edge (node). op is 0 (sum), 1 (max), 2 (min), or 3
+        (mean). Returns an array of shape (len(nodes), size), NaN for nodes
+        without edges unless summing.
+        """
+
+        cdef Py_ssize_t num_nodes = nodes.shape[0]
+        cdef Py_ssize_t i, d, count
+        cdef pair[NeighborsIterator, NeighborsIterator] view
+        cdef NeighborsIterator it, end
+        cdef NodeType v
+        cdef vector[double] values
+        cdef int reduce_op = 0 if op == 3 else op
+        %if $columnar
+        cdef double[:, ::1] column = self._node_column(node_attr_index)
+        %end if
+
+        result = np.zeros((num_nodes, size), dtype=np.float64)
+        cdef double[:, ::1] _result = result
+        values.resize(size)
+
+        with nogil:
+            for i in range(num_nodes):
+                count = 0
+                %if $directed
+                %set $prefixes=["out_", "in_"]
+                %else
+                %set $prefixes=[""]
+                %end if
+                %for prefix in $prefixes
+                view = self._graph.${prefix}neighbors(nodes[i])
+                it = view.first
+                end = view.second
+                while it != end:
+                    v = deref(it).first
+                    %set $k = 0
+                    %for name, dtype in $edge_attr_dtypes.items()
+                    if edge_attr_index == $k:
+                        %if $dtype.is_array
+                        for d in range($dtype.size):
+                            values[d] = deref(it).second.prop().${name}[d]
+                        %else
+                        values[0] = deref(it).second.prop().$name
+                        %end if
+                    %set $k = $k + 1
+                    %end for
+                    %if $columnar
+                    if node_attr_index != -1:
+                        for d in range(size):
+                            values[d] = column[self._graph.node_prop(v).row, d]
+                    %else
+                    %set $k = 0
+                    %for name, dtype in $node_attr_dtypes.items()
+                    if node_attr_index == $k:
+                        %if $dtype.is_array
+                        for d in range($dtype.size):
+                            values[d] = self._graph.node_prop(v).${name}[d]
+                        %else
+                        values[0] = self._graph.node_prop(v).$name
+                        %end if
+                    %set $k = $k + 1
+                    %end for
+                    %end if
+                    _accumulate(&_result[i, 0], values, reduce_op, count == 0)
+                    count += 1
+                    inc(it)
+                %end for
+                if count == 0:
+                    if op != 0:
+                        for d in range(size):
+                            _result[i, d] = NAN
+                elif op == 3:
+                    for d in range(size):
+                        _result[i, d] /= count
+
+        return result
@@ -1,4 +1,4 @@
-from .line_rtree import LineRTree
+from .line_rtree import LineRTree, UndirectedLineRTree
 from .point_rtree import PointRTree
 
-__all__ = ["LineRTree", "PointRTree"]
+__all__ = ["LineRTree", "PointRTree", "UndirectedLineRTree"]
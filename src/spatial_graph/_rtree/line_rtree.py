@@ -150,3 +150,44 @@ extern inline coord_t distance(
         # we just forward to bb insert, "start" and "end" will be used to compute
         # the bounding box in our custom converter above
         return self.insert_bb_items(lines, starts, ends)
+
+    def update_lines(self, lines, starts, ends, new_starts, new_ends):
+        """Move lines to new start and end coordinates.
+
+        Parameters
+        ----------
+        lines : np.ndarray, shape `(n, [m])`:
+            Array containing the line identifiers (as passed as the
+            `item_dtype` to the constructor).
+
+        starts : np.ndarray, shape `(n, d)`:
+            The current coordinates of the start of each line.
+
+        ends : np.ndarray, shape `(n, d)`:
+            The current coordinates of the end of each line.
+
+        new_starts : np.ndarray, shape `(n, d)`:
+            The new coordinates of the start of each line.
+
+        new_ends : np.ndarray, shape `(n, d)`:
+            The new coordinates of the end of each line.
+
+        Returns
+        -------
+        int
+            The number of updated lines.
+        """
+        return self.update_items(lines, starts, ends, new_starts, new_ends)
+
+
+class UndirectedLineRTree(LineRTree):
+    """A `LineRTree` for undirected lines: lines `(u, v)` and `(v, u)` are
+    considered equal when deleting or updating items."""
+
+    c_equal_function = """
+inline int equal(const item_t a, const item_t b) {
+    return (
+        (a.u == b.u && a.v == b.v) ||
+        (a.u == b.v && a.v == b.u));
+}
+"""
@@ -8,6 +8,7 @@ import numpy as np
 import witty
 from Cheetah.Template import Template
 
+from spatial_graph import _aot
 from spatial_graph._dtypes import DType
 
 DEFINE_MACROS = [("RTREE_NOATOMICS", "1")] if sys.platform == "win32" else []
@@ -18,6 +19,9 @@ else:
 
 SRC_DIR = Path(__file__).parent
 
+# compiled tree classes of this process, by RTree subclass and dtypes
+_COMPILED_TREES: dict[tuple, type] = {}
+
 
 def _build_wrapper(
     cls: type[RTree], item_dtype: str, coord_dtype: str, dims: int
@@ -42,23 +46,57 @@ def _build_wrapper(
     return str(wrapper_template)
 
 
+def _is_compiled(
+    cls: type[RTree], item_dtype: str, coord_dtype: str, dims: int
+) -> bool:
+    return (cls, item_dtype, coord_dtype, dims) in _COMPILED_TREES
+
+
 def _compile_tree(
     cls: type[RTree], item_dtype: str, coord_dtype: str, dims: int
 ) -> type:
-    wrapper = _build_wrapper(cls, item_dtype, coord_dtype, dims)
-    module = witty.compile_cython(
-        wrapper,
-        source_files=[
-            SRC_DIR / "src" / "rtree.h",
-            SRC_DIR / "src" / "rtree.c",
-            SRC_DIR / "src" / "config.h",
-        ],
-        extra_compile_args=EXTRA_COMPILE_ARGS,
-        include_dirs=[str(SRC_DIR)],
-        language="c",
-        quiet=True,
-        define_macros=DEFINE_MACROS,
+    key = (cls, item_dtype, coord_dtype, dims)
+    output_dir = _aot.output_dir()
+    if key in _COMPILED_TREES and output_dir is None:
+        return _COMPILED_TREES[key]
+
+    signature = ("rtree", f"{cls.__module__}.{cls.__qualname__}", *key[1:])
+    source_files = [
+        SRC_DIR / "src" / "rtree.h",
+        SRC_DIR / "src" / "rtree.c",
+        SRC_DIR / "src" / "config.h",
+    ]
+    sources_hash = _aot.source_hash(
+        SRC_DIR / "wrapper_template.pyx",
+        *source_files,
+        _aot.DTYPES_SOURCE,
+        cls.pyx_item_t_declaration,
+        cls.c_item_t_declaration,
+        cls.c_converter_functions,
+        cls.c_equal_function,
+        cls.c_distance_function,
+        args=EXTRA_COMPILE_ARGS,
     )
+    module = None
+    if output_dir is None:
+        module = _aot.load_module(signature, sources_hash)
+
+    if module is None:
+        wrapper = _build_wrapper(cls, item_dtype, coord_dtype, dims)
+        module = witty.compile_cython(
+            wrapper,
+            source_files=source_files,
+            extra_compile_args=EXTRA_COMPILE_ARGS,
+            include_dirs=[str(SRC_DIR)],
+            language="c",
+            quiet=True,
+            define_macros=DEFINE_MACROS,
+            output_dir=output_dir,
+        )
+        if output_dir is not None:
+            _aot.register_module(output_dir, signature, sources_hash, module)
+
+    _COMPILED_TREES[key] = module.RTree
     return module.RTree
 
 
@@ -81,6 +119,18 @@ class RTree:
 
             The dimension of the r-tree.
 
+    Thread safety:
+
+        Queries release the GIL and can run in parallel from several
+        threads. They are not synchronized with modifications, though: a
+        query is only thread-safe as long as no other thread inserts,
+        deletes, or updates items of the same tree at the same time (holding
+        the GIL while modifying does not prevent that). To query while the
+        tree is modified, ``clone`` it in the modifying thread and query the
+        clone. Clones share their nodes copy-on-write with atomic reference
+        counts, except on Windows, where atomics are disabled and clones
+        must not be used from different threads either.
+
     Subclassing:
 
         This generic implementation can be subclassed and modified in the
@@ -128,6 +178,17 @@ class RTree:
         tree_cls = _compile_tree(self.__class__, item_dtype, coord_dtype, dims)
         self._ctree = tree_cls()
 
+    def clone(self):
+        """Create a copy of this RTree.
+
+        This is a constant-time operation: both trees share their nodes until
+        one of them is modified (copy-on-write).
+        """
+        tree = self.__class__.__new__(self.__class__)
+        tree.__dict__.update(self.__dict__)
+        tree._ctree = self._ctree.clone()
+        return tree
+
     def insert_point_item(self, item, position):
         """Insert a single point item.
 
@@ -185,6 +246,40 @@ class RTree:
         """
         return self._ctree.delete_items(items, bb_mins, bb_maxs)
 
+    def update_items(self, items, bb_mins, bb_maxs, new_bb_mins, new_bb_maxs):
+        """Update the bounding boxes of items.
+
+        Items are found as in `delete_items`. If the new bounding box of an
+        item fits into the leaf node holding it, the item is updated in place,
+        otherwise it is deleted and inserted again.
+
+        Args:
+
+            items (ndarray):
+
+                Array of shape `(n,)` (one scalar per item) or `(n, k)` (one
+                array of `k` scalars per item).
+
+            bb_mins/bb_maxs (ndarray):
+
+                Array of shape `(n, dims)`, the current minimum/maximum points
+                of the bounding boxes per item. For points, `bb_maxs` can be
+                `None`.
+
+            new_bb_mins/new_bb_maxs (ndarray):
+
+                Array of shape `(n, dims)`, the new minimum/maximum points of
+                the bounding boxes per item. For points, `new_bb_maxs` can be
+                `None`.
+
+        Returns:
+
+            The number of updated items.
+        """
+        return self._ctree.update_items(
+            items, bb_mins, bb_maxs, new_bb_mins, new_bb_maxs
+        )
+
     def count(self, bb_min, bb_max):
         """Count the number of items in a bounding box.
 
@@ -194,14 +289,42 @@ class RTree:
         """
         return self._ctree.count(bb_min, bb_max)
 
-    def search(self, bb_min, bb_max):
+    def search(self, bb_min, bb_max, out=None):
         """Search for items in a bounding box.
 
+        The tree is traversed only once. By default, found items are collected
+        in a growing buffer and returned as a new array.
+
         Args:
             bb_min (np.ndarray): The minimum point of the bounding box.
             bb_max (np.ndarray): The maximum point of the bounding box.
+            out (np.ndarray, optional): An array of shape `(n,)` or `(n, k)`
+                (for array items) to store the found items in. If given, at
+                most `n` items are written and the total number of items in
+                the bounding box is returned instead. A return value larger
+                than `n` indicates that `out` was too small.
         """
-        return self._ctree.search(bb_min, bb_max)
+        return self._ctree.search(bb_min, bb_max, out)
+
+    def search_many(self, bb_mins, bb_maxs):
+        """Search for items in several bounding boxes.
+
+        All bounding boxes are processed in a single call without holding the
+        GIL.
+
+        Args:
+
+            bb_mins/bb_maxs (ndarray):
+
+                Array of shape `(m, dims)`, the minimum/maximum points of the
+                bounding boxes to search in.
+
+        Returns:
+
+            A tuple `(items, indptr)` in CSR format: the items found in the
+            `i`-th bounding box are `items[indptr[i]:indptr[i + 1]]`.
+        """
+        return self._ctree.search_many(bb_mins, bb_maxs)
 
     def nearest(self, point, k=1, return_distances=False):
         """Find the nearest items to a given point.
@@ -224,6 +347,92 @@ class RTree:
         """
         return self._ctree.nearest(point, k, return_distances)
 
+    def nearest_many(self, points, k=1, return_distances=False):
+        """Find the nearest items to each of several points.
+
+        All queries are processed in a single call without holding the GIL.
+
+        Args:
+
+            points (ndarray):
+
+                Array of shape `(m, dims)`, the coordinates of the query
+                points.
+
+            k (int):
+
+                The maximal number of items to return per query point.
+
+            return_distances (bool):
+
+                If `True`, also return the distances of the found items to
+                their query point.
+
+        Returns:
+
+            A tuple `(items, counts)` or, if `return_distances` is set,
+            `(items, distances, counts)`. `items` has shape `(m, k)` (or
+            `(m, k, s)` for array items of size `s`) and `distances` has
+            shape `(m, k)`, both sorted by distance. `counts` holds the number
+            of items found per query point, entries after that are padded
+            with zeros (items) and `inf` (distances). As for `nearest`,
+            distances are squared.
+        """
+        return self._ctree.nearest_many(points, k, return_distances)
+
+    def within(self, point, radius, return_distances=False):
+        """Find all items within a given distance to a point.
+
+        Args:
+
+            point (ndarray):
+
+                The coordinates of the query point.
+
+            radius (float):
+
+                The maximal distance of items to the query point, has to be
+                non-negative.
+
+            return_distances (bool):
+
+                If `True`, return a tuple of `(items, distances)`, where
+                `distances` contains the squared distance of each found item
+                to the query point.
+        """
+        return self._ctree.within(point, radius, return_distances)
+
+    def within_many(self, points, radius, return_distances=False):
+        """Find all items within a given distance to each of several points.
+
+        All queries are processed in a single call without holding the GIL.
+
+        Args:
+
+            points (ndarray):
+
+                Array of shape `(m, dims)`, the coordinates of the query
+                points.
+
+            radius (float or ndarray):
+
+                The maximal distance of items to the query points, either
+                one for all points or an array of shape `(m,)`. Has to be
+                non-negative.
+
+            return_distances (bool):
+
+                If `True`, also return the squared distance of each found item
+                to its query point.
+
+        Returns:
+
+            A tuple `(items, indptr)` or, if `return_distances` is set,
+            `(items, distances, indptr)` in CSR format: the items found for
+            the `i`-th point are `items[indptr[i]:indptr[i + 1]]`.
+        """
+        return self._ctree.within_many(points, radius, return_distances)
+
     def insert_bb_items(self, items, bb_mins, bb_maxs):
         """Insert items with bounding boxes.
         Args:
@@ -240,6 +449,56 @@ class RTree:
         """
         return self._ctree.insert_bb_items(items, bb_mins, bb_maxs)
 
+    def bulk_load(self, items, bb_mins, bb_maxs=None):
+        """Insert many items at once.
+
+        If the tree is empty, the items are packed into full nodes using the
+        sort-tile-recursive (STR) algorithm. This is much faster than
+        inserting items one by one and results in a tree with better query
+        performance. Otherwise, the items are inserted one by one.
+
+        ``insert_point_items`` and ``insert_bb_items`` use this automatically
+        when called on an empty tree.
+
+        Args:
+
+            items (ndarray):
+
+                Array of shape `(n,)` (one scalar per item) or `(n, k)` (one
+                array of `k` scalars per item).
+
+            bb_mins/bb_maxs (ndarray):
+
+                Array of shape `(n, dims)`, the minimum/maximum points of the
+                bounding boxes per item to insert. For points, `bb_maxs` can
+                be omitted.
+        """
+        return self._ctree.bulk_load(items, bb_mins, bb_maxs)
+
+    def flatten(self):
+        """Get the nodes of this RTree as flat arrays.
+
+        Nodes are stored in depth-first order. Together with `unflatten`, this
+        can be used to store and restore an RTree without inserting the items
+        again.
+
+        Returns:
+
+            A tuple `(kinds, counts, rects, items)` of the kind (leaf or
+            branch) and number of entries per node, the bounding boxes of all
+            entries as an array of shape `(n, 2, dims)`, and the raw bytes of
+            all items.
+        """
+        return self._ctree.flatten()
+
+    def unflatten(self, kinds, counts, rects, items):
+        """Restore the nodes of this RTree from arrays created by `flatten`.
+
+        The RTree has to be empty. Read-only arrays (e.g., memory-mapped ones)
+        are accepted.
+        """
+        return self._ctree.unflatten(kinds, counts, rects, items)
+
     def bounding_box(self):
         """Get the total bounding box of all items in this RTree."""
         return self._ctree.bounding_box()
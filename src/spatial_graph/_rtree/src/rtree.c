@@ -193,7 +193,6 @@ struct element peek(struct priority_queue* queue) {
 struct rtree {
 	struct rect rect;
 	struct node *root;
-	struct priority_queue *queue;
 	size_t count;
 	size_t height;
 #ifdef USE_PATHHINT
@@ -640,13 +639,381 @@ bool rtree_insert(struct rtree *tr, const coord_t *min,
 	return false;
 }
 
+// bulk loading (sort-tile-recursive packing)
+
+// rects to sort during bulk loading, either the input rects of the items or
+// the rects of already packed nodes
+struct bulk_rects {
+	const coord_t *min;
+	const coord_t *max;
+	size_t stride;
+};
+
+static inline coord_t bulk_center(const struct bulk_rects *rects, size_t i,
+	int axis)
+{
+	// twice the center, but that doesn't matter for sorting
+	return rects->min[i*rects->stride + axis] +
+		rects->max[i*rects->stride + axis];
+}
+
+// a rect index and its sort key
+struct bulk_entry {
+	coord_t key;
+	size_t index;
+};
+
+static void bulk_swap(struct bulk_entry *entries, size_t i, size_t j) {
+	struct bulk_entry tmp = entries[i];
+	entries[i] = entries[j];
+	entries[j] = tmp;
+}
+
+// sort entries[0..n) by their keys
+static void bulk_sort(struct bulk_entry *entries, size_t n) {
+	while (n > 16) {
+		// median of three as pivot, moved to the end
+		size_t mid = n / 2;
+		if (entries[mid].key < entries[0].key) bulk_swap(entries, 0, mid);
+		if (entries[n-1].key < entries[0].key) bulk_swap(entries, 0, n-1);
+		if (entries[mid].key < entries[n-1].key) bulk_swap(entries, mid, n-1);
+		coord_t pivot = entries[n-1].key;
+		size_t left = 0;
+		for (size_t i = 0; i < n-1; i++) {
+			if (entries[i].key < pivot) {
+				bulk_swap(entries, i, left);
+				left++;
+			}
+		}
+		bulk_swap(entries, left, n-1);
+		// recurse into the smaller part, iterate over the larger one
+		if (left < n - left - 1) {
+			bulk_sort(entries, left);
+			entries += left + 1;
+			n -= left + 1;
+		} else {
+			bulk_sort(entries + left + 1, n - left - 1);
+			n = left;
+		}
+	}
+	// insertion sort for small ranges
+	for (size_t i = 1; i < n; i++) {
+		struct bulk_entry tmp = entries[i];
+		size_t j = i;
+		while (j > 0 && tmp.key < entries[j-1].key) {
+			entries[j] = entries[j-1];
+			j--;
+		}
+		entries[j] = tmp;
+	}
+}
+
+// order entries[0..n) such that each run of MAXITEMS consecutive rects forms a
+// spatially compact group (sort-tile-recursive)
+static void bulk_str(const struct bulk_rects *rects, struct bulk_entry *entries,
+	size_t n, int axis)
+{
+	for (size_t i = 0; i < n; i++) {
+		entries[i].key = bulk_center(rects, entries[i].index, axis);
+	}
+	bulk_sort(entries, n);
+	if (axis == DIMS - 1) {
+		return;
+	}
+	// number of nodes needed to pack n rects, and number of slabs to split
+	// those nodes into along this axis
+	size_t num_nodes = (n + MAXITEMS - 1) / MAXITEMS;
+	size_t num_slabs = (size_t)ceil(pow((double)num_nodes, 1.0/(DIMS - axis)));
+	size_t slab_size = MAXITEMS * ((num_nodes + num_slabs - 1) / num_slabs);
+	for (size_t s = 0; s < n; s += slab_size) {
+		bulk_str(rects, entries + s, n - s < slab_size ? n - s : slab_size,
+			axis + 1);
+	}
+}
+
+// bulk_load_level packs n nodes (with their rects) into parent branches,
+// writes the parents into nodes/rects and returns their number (0 on OOM)
+static size_t bulk_load_level(struct rtree *tr, struct node **nodes,
+	struct rect *rects, size_t n, struct bulk_entry *entries)
+{
+	size_t num_parents = (n + MAXITEMS - 1) / MAXITEMS;
+	struct node **parents = (struct node **)tr->malloc(
+		sizeof(struct node*)*num_parents);
+	if (!parents) {
+		return 0;
+	}
+	for (size_t p = 0; p < num_parents; p++) {
+		parents[p] = node_new(tr, BRANCH);
+		if (!parents[p]) {
+			for (size_t q = 0; q < p; q++) {
+				tr->free(parents[q]);
+			}
+			tr->free(parents);
+			return 0;
+		}
+	}
+	for (size_t i = 0; i < n; i++) {
+		entries[i].index = i;
+	}
+	struct bulk_rects node_rects = {
+		.min = rects[0].min, .max = rects[0].max, .stride = 2*DIMS };
+	bulk_str(&node_rects, entries, n, 0);
+	// gather the children in packing order
+	struct node **children = (struct node **)tr->malloc(sizeof(struct node*)*n);
+	struct rect *child_rects = (struct rect *)tr->malloc(sizeof(struct rect)*n);
+	if (!children || !child_rects) {
+		if (children) tr->free(children);
+		if (child_rects) tr->free(child_rects);
+		for (size_t p = 0; p < num_parents; p++) {
+			tr->free(parents[p]);
+		}
+		tr->free(parents);
+		return 0;
+	}
+	for (size_t i = 0; i < n; i++) {
+		children[i] = nodes[entries[i].index];
+		child_rects[i] = rects[entries[i].index];
+	}
+	for (size_t i = 0; i < n; i++) {
+		struct node *parent = parents[i / MAXITEMS];
+		parent->rects[parent->count] = child_rects[i];
+		parent->nodes[parent->count] = children[i];
+		parent->count++;
+	}
+	for (size_t p = 0; p < num_parents; p++) {
+		nodes[p] = parents[p];
+		rects[p] = node_rect_calc(parents[p]);
+	}
+	tr->free(children);
+	tr->free(child_rects);
+	tr->free(parents);
+	return num_parents;
+}
+
+bool rtree_bulk_load(struct rtree *tr, const coord_t *min, const coord_t *max,
+	const item_t *items, size_t n)
+{
+	if (tr->root) {
+		// not empty, fall back to regular inserts
+		for (size_t i = 0; i < n; i++) {
+			if (!rtree_insert(tr, &min[i*DIMS], max ? &max[i*DIMS] : NULL,
+				items[i]))
+			{
+				return false;
+			}
+		}
+		return true;
+	}
+	if (n == 0) {
+		return true;
+	}
+
+	size_t num_leaves = (n + MAXITEMS - 1) / MAXITEMS;
+	struct bulk_entry *entries = (struct bulk_entry *)tr->malloc(
+		sizeof(struct bulk_entry)*n);
+	struct node **nodes = (struct node **)tr->malloc(
+		sizeof(struct node*)*num_leaves);
+	struct rect *rects = (struct rect *)tr->malloc(
+		sizeof(struct rect)*num_leaves);
+	if (!entries || !nodes || !rects) {
+		goto oom;
+	}
+
+	// pack items into leaves
+	for (size_t i = 0; i < n; i++) {
+		entries[i].index = i;
+	}
+	struct bulk_rects item_rects = {
+		.min = min, .max = max ? max : min, .stride = DIMS };
+	bulk_str(&item_rects, entries, n, 0);
+	for (size_t l = 0; l < num_leaves; l++) {
+		nodes[l] = node_new(tr, LEAF);
+		if (!nodes[l]) {
+			for (size_t k = 0; k < l; k++) {
+				node_free(tr, nodes[k]);
+			}
+			goto oom;
+		}
+		size_t end = (l + 1)*MAXITEMS < n ? (l + 1)*MAXITEMS : n;
+		for (size_t i = l*MAXITEMS; i < end; i++) {
+			struct node *leaf = nodes[l];
+			size_t j = entries[i].index;
+			memcpy(leaf->rects[leaf->count].min, &min[j*DIMS],
+				sizeof(coord_t)*DIMS);
+			memcpy(leaf->rects[leaf->count].max, &item_rects.max[j*DIMS],
+				sizeof(coord_t)*DIMS);
+			leaf->items[leaf->count] = items[j];
+			leaf->count++;
+		}
+		rects[l] = node_rect_calc(nodes[l]);
+	}
+
+	// pack nodes into branches until a single root is left
+	size_t num_nodes = num_leaves;
+	size_t height = 1;
+	while (num_nodes > 1) {
+		size_t num_parents = bulk_load_level(tr, nodes, rects, num_nodes, entries);
+		if (num_parents == 0) {
+			for (size_t k = 0; k < num_nodes; k++) {
+				node_free(tr, nodes[k]);
+			}
+			goto oom;
+		}
+		num_nodes = num_parents;
+		height++;
+	}
+
+	tr->root = nodes[0];
+	tr->rect = rects[0];
+	tr->count = n;
+	tr->height = height;
+	tr->free(entries);
+	tr->free(nodes);
+	tr->free(rects);
+	return true;
+
+oom:
+	if (entries) tr->free(entries);
+	if (nodes) tr->free(nodes);
+	if (rects) tr->free(rects);
+	return false;
+}
+
+// flattening (for serialization)
+
+static void node_flat_size(const struct node *node, size_t *num_nodes,
+	size_t *num_rects)
+{
+	(*num_nodes)++;
+	*num_rects += node->count;
+	if (node->kind == BRANCH) {
+		for (int i = 0; i < node->count; i++) {
+			node_flat_size(node->nodes[i], num_nodes, num_rects);
+		}
+	}
+}
+
+void rtree_flat_size(const struct rtree *tr, size_t *num_nodes,
+	size_t *num_rects)
+{
+	*num_nodes = 0;
+	*num_rects = 0;
+	if (tr->root) {
+		node_flat_size(tr->root, num_nodes, num_rects);
+	}
+}
+
+// state of a flattened rtree while writing or reading it
+struct flat_rtree {
+	uint8_t *kinds;
+	int32_t *counts;
+	struct rect *rects;
+	item_t *items;
+	size_t num_nodes;
+	size_t node_index;
+	size_t rect_index;
+	size_t item_index;
+};
+
+static void node_flatten(const struct node *node, struct flat_rtree *flat) {
+	flat->kinds[flat->node_index] = (uint8_t)node->kind;
+	flat->counts[flat->node_index] = node->count;
+	flat->node_index++;
+	memcpy(&flat->rects[flat->rect_index], node->rects,
+		sizeof(struct rect)*node->count);
+	flat->rect_index += node->count;
+	if (node->kind == LEAF) {
+		memcpy(&flat->items[flat->item_index], node->items,
+			sizeof(item_t)*node->count);
+		flat->item_index += node->count;
+	} else {
+		for (int i = 0; i < node->count; i++) {
+			node_flatten(node->nodes[i], flat);
+		}
+	}
+}
+
+void rtree_flatten(const struct rtree *tr, uint8_t *kinds, int32_t *counts,
+	coord_t *rects, item_t *items)
+{
+	struct flat_rtree flat = {
+		.kinds = kinds, .counts = counts, .rects = (struct rect *)rects,
+		.items = items };
+	if (tr->root) {
+		node_flatten(tr->root, &flat);
+	}
+}
+
+// returns NULL if the system is out of memory or the flattened rtree is
+// malformed
+static struct node *node_unflatten(struct rtree *tr, struct flat_rtree *flat,
+	size_t depth, size_t *height)
+{
+	if (flat->node_index >= flat->num_nodes) {
+		return NULL;
+	}
+	enum kind kind = (enum kind)flat->kinds[flat->node_index];
+	int count = flat->counts[flat->node_index];
+	flat->node_index++;
+	if ((kind != LEAF && kind != BRANCH) || count < 0 || count > MAXITEMS) {
+		return NULL;
+	}
+	struct node *node = node_new(tr, kind);
+	if (!node) {
+		return NULL;
+	}
+	memcpy(node->rects, &flat->rects[flat->rect_index],
+		sizeof(struct rect)*count);
+	flat->rect_index += count;
+	if (kind == LEAF) {
+		memcpy(node->items, &flat->items[flat->item_index],
+			sizeof(item_t)*count);
+		flat->item_index += count;
+		tr->count += count;
+		if (depth > *height) {
+			*height = depth;
+		}
+	} else {
+		for (int i = 0; i < count; i++) {
+			node->nodes[i] = node_unflatten(tr, flat, depth + 1, height);
+			if (!node->nodes[i]) {
+				node->count = i;
+				node_free(tr, node);
+				return NULL;
+			}
+		}
+	}
+	node->count = count;
+	return node;
+}
+
+bool rtree_unflatten(struct rtree *tr, const uint8_t *kinds,
+	const int32_t *counts, const coord_t *rects, const item_t *items,
+	size_t num_nodes)
+{
+	if (tr->root || num_nodes == 0) {
+		return num_nodes == 0;
+	}
+	struct flat_rtree flat = {
+		.kinds = (uint8_t *)kinds, .counts = (int32_t *)counts,
+		.rects = (struct rect *)rects, .items = (item_t *)items,
+		.num_nodes = num_nodes };
+	size_t height = 0;
+	struct node *root = node_unflatten(tr, &flat, 1, &height);
+	if (!root) {
+		tr->count = 0;
+		return false;
+	}
+	tr->root = root;
+	tr->rect = node_rect_calc(root);
+	tr->height = height;
+	return true;
+}
+
 void rtree_free(struct rtree *tr) {
 	if (tr->root) {
 		node_free(tr, tr->root);
 	}
-	if (tr->queue) {
-		priority_queue_free(tr->queue);
-	}
 	tr->free(tr);
 }
 
@@ -710,26 +1077,19 @@ coord_t distance_bb(const coord_t point[], struct rect *rect) {
 	return dist2;
 }
 
-bool rtree_nearest(struct rtree *tr, const coord_t point[],
+static bool node_nearest(struct node *root, struct priority_queue *queue,
+	const coord_t point[],
 	bool (*iter)(const item_t item, coord_t distance, void *udata),
 	void *udata) {
 
-	if (!tr->root)
-		return true;
-
-	if (!tr->queue)
-		tr->queue = priority_queue_new();
-	else
-		tr->queue->size = 0;
-
-	struct element root = { .distance = 0.0, .kind = tr->root->kind, .node = tr->root };
-	if (!enqueue(tr->queue, root)) {
+	struct element root_element = { .distance = 0.0, .kind = root->kind, .node = root };
+	if (!enqueue(queue, root_element)) {
 		return false;
 	}
 
-	while (tr->queue->size > 0) {
+	while (queue->size > 0) {
 
-		struct element next_element = dequeue(tr->queue);
+		struct element next_element = dequeue(queue);
 
 		if (next_element.kind == ITEM) {
 			// We found an ITEM with an exact distance that is the next closest
@@ -754,9 +1114,9 @@ bool rtree_nearest(struct rtree *tr, const coord_t point[],
 
 #ifdef KNN_USE_EXACT_DISTANCE
 			next_element.distance = distance(point, next_element.rect, next_element.item);
-			if (next_element.distance > peek(tr->queue).distance) {
+			if (next_element.distance > peek(queue).distance) {
 				next_element.kind = ITEM;
-				if (!enqueue(tr->queue, next_element)) {
+				if (!enqueue(queue, next_element)) {
 					return false;
 				}
 				continue;
@@ -784,7 +1144,7 @@ bool rtree_nearest(struct rtree *tr, const coord_t point[],
 					.item = leaf->items[i],
 					.rect = &leaf->rects[i]
 				};
-				if (!enqueue(tr->queue, item_element)) {
+				if (!enqueue(queue, item_element)) {
 					return false;
 				}
 			}
@@ -802,7 +1162,7 @@ bool rtree_nearest(struct rtree *tr, const coord_t point[],
 					.kind = branch->nodes[i]->kind,  // BRANCH or LEAF
 					.node = branch->nodes[i]
 				};
-				if (!enqueue(tr->queue, node_element)) {
+				if (!enqueue(queue, node_element)) {
 					return false;
 				}
 			}
@@ -811,6 +1171,69 @@ bool rtree_nearest(struct rtree *tr, const coord_t point[],
 	return true;
 }
 
+bool rtree_nearest(const struct rtree *tr, const coord_t point[],
+	bool (*iter)(const item_t item, coord_t distance, void *udata),
+	void *udata) {
+
+	if (!tr->root)
+		return true;
+
+	// each search uses its own queue, such that concurrent searches on the
+	// same tree don't interfere with each other
+	struct priority_queue *queue = priority_queue_new();
+	if (!queue)
+		return false;
+
+	bool all_good = node_nearest(tr->root, queue, point, iter, udata);
+
+	priority_queue_free(queue);
+	return all_good;
+}
+
+static bool node_within(struct node *node, const coord_t point[],
+	coord_t max_dist2,
+	bool (*iter)(const item_t item, coord_t distance, void *udata),
+	void *udata)
+{
+	if (node->kind == LEAF) {
+		for (int i = 0; i < node->count; i++) {
+			coord_t dist2 = distance_bb(point, &node->rects[i]);
+			if (dist2 > max_dist2) {
+				continue;
+			}
+#ifdef KNN_USE_EXACT_DISTANCE
+			// the bounding box is within reach, check the exact distance
+			dist2 = distance(point, &node->rects[i], node->items[i]);
+			if (dist2 > max_dist2) {
+				continue;
+			}
+#endif
+			if (!iter(node->items[i], dist2, udata)) {
+				return false;
+			}
+		}
+		return true;
+	}
+	for (int i = 0; i < node->count; i++) {
+		if (distance_bb(point, &node->rects[i]) <= max_dist2) {
+			if (!node_within(node->nodes[i], point, max_dist2, iter, udata)) {
+				return false;
+			}
+		}
+	}
+	return true;
+}
+
+void rtree_within(const struct rtree *tr, const coord_t point[],
+	coord_t max_dist2,
+	bool (*iter)(const item_t item, coord_t distance, void *udata),
+	void *udata)
+{
+	if (tr->root) {
+		node_within(tr->root, point, max_dist2, iter, udata);
+	}
+}
+
 static bool node_scan(struct node *node,
 	bool (*iter)(const coord_t *min, const coord_t *max, const item_t item,
 		void *udata),
@@ -1003,6 +1426,110 @@ int rtree_delete_with_comparator(struct rtree *tr, const coord_t *min,
 	return rtree_delete0(tr, min, max, item, compare, udata);
 }
 
+// node_update searches for item (with rect ir) and replaces it with new_item
+// (with rect nir), if nir is contained in the rect nr of the leaf holding the
+// item
+static bool node_update(struct rtree *tr, struct rect *nr, struct node *node,
+	struct rect *ir, item_t item, struct rect *nir, item_t new_item,
+	bool *found, bool *updated, bool *shrunk)
+{
+	*found = false;
+	*updated = false;
+	*shrunk = false;
+	if (node->kind == LEAF) {
+		for (int i = 0; i < node->count; i++) {
+			if (!rect_equals_bin(ir, &node->rects[i])) {
+				// different bounding box, keep going
+				continue;
+			}
+			if (!equal(node->items[i], item)) {
+				// different content, keep going
+				continue;
+			}
+			*found = true;
+			if (!rect_contains(nr, nir)) {
+				// doesn't fit into this leaf, the caller has to move it
+				return true;
+			}
+			node->rects[i] = *nir;
+			node->items[i] = new_item;
+			*updated = true;
+			if (rect_onedge(ir, nr)) {
+				// The old item rect was on the edge of the node rect.
+				// We need to recalculate the node rect.
+				*nr = node_rect_calc(node);
+				*shrunk = true;
+			}
+			return true;
+		}
+		return true;
+	}
+	for (int h = 0; h < node->count; h++) {
+		if (!rect_contains(&node->rects[h], ir)) {
+			continue;
+		}
+		struct rect crect = node->rects[h];
+		cow_node_or(node->nodes[h], return false);
+		if (!node_update(tr, &node->rects[h], node->nodes[h], ir, item, nir,
+			new_item, found, updated, shrunk))
+		{
+			return false;
+		}
+		if (!*found) {
+			continue;
+		}
+		if (*shrunk) {
+			*shrunk = !rect_equals(&node->rects[h], &crect);
+			if (*shrunk) {
+				*nr = node_rect_calc(node);
+			}
+		}
+		return true;
+	}
+	return true;
+}
+
+int rtree_update(struct rtree *tr, const coord_t *min, const coord_t *max,
+	const item_t item, const coord_t *new_min, const coord_t *new_max,
+	const item_t new_item)
+{
+	// copy input rects
+	struct rect rect;
+	memcpy(&rect.min[0], min, sizeof(coord_t)*DIMS);
+	memcpy(&rect.max[0], max?max:min, sizeof(coord_t)*DIMS);
+	struct rect new_rect;
+	memcpy(&new_rect.min[0], new_min, sizeof(coord_t)*DIMS);
+	memcpy(&new_rect.max[0], new_max?new_max:new_min, sizeof(coord_t)*DIMS);
+
+	if (!tr->root) {
+		return 0;
+	}
+	bool found = false;
+	bool updated = false;
+	bool shrunk = false;
+	cow_node_or(tr->root, return -1);
+	if (!node_update(tr, &tr->rect, tr->root, &rect, item, &new_rect, new_item,
+		&found, &updated, &shrunk))
+	{
+		return -1; // OOM
+	}
+	if (!found) {
+		return 0;
+	}
+	if (updated) {
+		return 1;
+	}
+	// the item moved out of its leaf, delete and insert it again
+	int deleted = rtree_delete(tr, min, max, item);
+	if (deleted != 1) {
+		return deleted;
+	}
+	if (!rtree_insert(tr, new_min, new_max, new_item)) {
+		return -1; // OOM
+	}
+	return 1;
+}
+
 struct rtree *rtree_clone(struct rtree *tr) {
 	if (!tr) return NULL;
 	struct rtree *tr2 = tr->malloc(sizeof(struct rtree));
@@ -7,6 +7,7 @@
 
 #include <stdlib.h>
 #include <stdbool.h>
+#include <stdint.h>
 #include "config.h"
 
 // rtree_new returns a new rtree
@@ -42,6 +43,43 @@ struct rtree *rtree_clone(struct rtree *tr);
 bool rtree_insert(struct rtree *tr, const coord_t *min, const coord_t *max, const item_t item);
 
 
+// rtree_bulk_load inserts n items at once.
+//
+// The rects of the items are given as two arrays of n*N coord_ts each (the
+// minimum and maximum corners), where N is the number of dimensions. For
+// points, max is optional (set to NULL).
+//
+// If the rtree is empty, the items are packed into full nodes using the
+// sort-tile-recursive algorithm, which is much faster than inserting the items
+// one by one and results in a tree with better query performance. Otherwise,
+// the items are inserted one by one.
+//
+// Returns false if the system is out of memory.
+bool rtree_bulk_load(struct rtree *tr, const coord_t *min, const coord_t *max,
+	const item_t *items, size_t n);
+
+// rtree_flat_size returns the number of nodes and the total number of rects
+// (over all nodes) of an rtree, i.e., the sizes of the arrays needed for
+// rtree_flatten.
+void rtree_flat_size(const struct rtree *tr, size_t *num_nodes,
+	size_t *num_rects);
+
+// rtree_flatten writes all nodes of the rtree in depth-first order into flat
+// arrays: the kind and number of rects of each node, the rects of each node
+// (2*N coord_ts per rect, the minimum and maximum corner), and the items of
+// each leaf node.
+void rtree_flatten(const struct rtree *tr, uint8_t *kinds, int32_t *counts,
+	coord_t *rects, item_t *items);
+
+// rtree_unflatten restores an rtree from the arrays written by
+// rtree_flatten. The rtree has to be empty.
+//
+// Returns false if the system is out of memory, the arrays are malformed, or
+// the rtree is not empty.
+bool rtree_unflatten(struct rtree *tr, const uint8_t *kinds,
+	const int32_t *counts, const coord_t *rects, const item_t *items,
+	size_t num_nodes);
+
 // rtree_search searches the rtree and iterates over each item that intersect
 // the provided rectangle.
 //
@@ -52,8 +90,24 @@ void rtree_search(const struct rtree *tr, const coord_t *min, const coord_t *max
 
 // Find the nearest neighbors to the given query point.
 //
+// Returning false from the iter will stop the search. Concurrent searches on
+// the same rtree are safe, as long as the rtree is not modified.
+//
+// Returns false if the system is out of memory.
+bool rtree_nearest(const struct rtree *tr, const coord_t *point,
+	bool (*iter)(const item_t item, coord_t distance, void *udata),
+	void *udata);
+
+// rtree_within iterates over each item whose squared distance to the given
+// query point is at most max_dist2.
+//
+// Subtrees are pruned by the distance to their bounding boxes. If
+// KNN_USE_EXACT_DISTANCE is defined, items are tested and reported with their
+// exact distance, otherwise with the distance to their bounding box.
+//
 // Returning false from the iter will stop the search.
-bool rtree_nearest(struct rtree *tr, const coord_t *point,
+void rtree_within(const struct rtree *tr, const coord_t *point,
+	coord_t max_dist2,
 	bool (*iter)(const item_t item, coord_t distance, void *udata),
 	void *udata);
 
@@ -90,6 +144,17 @@ int rtree_delete_with_comparator(struct rtree *tr, const coord_t *min,
 	int (*compare)(const item_t a, const item_t b, void *udata),
 	void *udata);
 
+// rtree_update replaces an item with a new item and rectangle.
+//
+// The item is searched for as in rtree_delete. If the new rectangle fits into
+// the leaf node holding the item, the item is updated in place. Otherwise, it
+// is deleted and the new item is inserted.
+//
+// Returns the number of updated items (0 or 1) or -1 if an OOM error occured.
+int rtree_update(struct rtree *tr, const coord_t *min, const coord_t *max,
+	const item_t item, const coord_t *new_min, const coord_t *new_max,
+	const item_t new_item);
+
 // rtree_opt_relaxed_atomics activates memory_order_relaxed for all atomic
 // loads. This may increase performance for single-threaded programs.
 // Optionally, define RTREE_NOATOMICS to disbale all atomics.
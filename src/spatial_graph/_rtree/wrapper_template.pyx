@@ -1,8 +1,10 @@
 from libc.stdint cimport *
+from libc.stdlib cimport malloc, realloc, free
+from libc.string cimport memcpy
 from libcpp cimport bool
 import numpy as np
 
-cdef extern from *:
+cdef extern from * nogil:
     """
     %if $c_distance_function
     #define KNN_USE_EXACT_DISTANCE
@@ -107,11 +109,18 @@ cdef extern from *:
     cdef struct rtree
     cdef rtree *rtree_new()
     cdef void rtree_free(rtree *tr)
+    cdef rtree *rtree_clone(rtree *tr)
     cdef bool rtree_insert(
         rtree *tr,
         const coord_t *min,
         const coord_t *max,
         const item_t item)
+    cdef bool rtree_bulk_load(
+        rtree *tr,
+        const coord_t *min,
+        const coord_t *max,
+        const item_t *items,
+        size_t n)
     cdef void rtree_search(
         const rtree *tr,
         const coord_t *min,
@@ -123,18 +132,52 @@ cdef extern from *:
             void *udata),
         void *udata)
     cdef bool rtree_nearest(
-        rtree *tr,
+        const rtree *tr,
         const coord_t *point,
         bool (*iter)(
             const item_t item,
             coord_t distance,
             void *udata),
         void *udata)
+    cdef void rtree_within(
+        const rtree *tr,
+        const coord_t *point,
+        coord_t max_dist2,
+        bool (*iter)(
+            const item_t item,
+            coord_t distance,
+            void *udata),
+        void *udata)
     cdef int rtree_delete(
         rtree *tr,
         const coord_t *min,
         const coord_t *max,
         const item_t item)
+    cdef void rtree_flat_size(
+        const rtree *tr,
+        size_t *num_nodes,
+        size_t *num_rects)
+    cdef void rtree_flatten(
+        const rtree *tr,
+        uint8_t *kinds,
+        int32_t *counts,
+        coord_t *rects,
+        item_t *items)
+    cdef bool rtree_unflatten(
+        rtree *tr,
+        const uint8_t *kinds,
+        const int32_t *counts,
+        const coord_t *rects,
+        const item_t *items,
+        size_t num_nodes)
+    cdef int rtree_update(
+        rtree *tr,
+        const coord_t *min,
+        const coord_t *max,
+        const item_t item,
+        const coord_t *new_min,
+        const coord_t *new_max,
+        const item_t new_item)
     cdef size_t rtree_count(const rtree *tr)
     cdef void rtree_bb(const rtree *tr, coord_t *min, coord_t *max)
 
@@ -153,7 +196,7 @@ cdef bool count_iterator(
         const coord_t* bb_max,
         const item_t item,
         void* udata
-    ) noexcept:
+    ) noexcept nogil:
 
     cdef size_t* count = <size_t*>udata
     count[0] = count[0] + 1
@@ -162,12 +205,14 @@ cdef bool count_iterator(
 
 cdef struct search_results:
     size_t size
+    size_t max_size
     pyx_items_t items
 
 
 cdef init_search_results_from_memview(search_results* r, $item_dtype.to_pyxtype(add_dim=True) items):
     r.size = 0
-    r.items = memview_to_pyx_items_t(items)
+    r.max_size = len(items)
+    r.items = memview_to_pyx_items_t(items) if r.max_size > 0 else NULL
 
 
 cdef bool search_iterator(
@@ -175,14 +220,110 @@ cdef bool search_iterator(
         const coord_t* bb_max,
         const item_t item,
         void* udata
-    ) noexcept:
+    ) noexcept nogil:
 
+    # store up to max_size items, but keep counting to report overflows
     cdef search_results* results = <search_results*>udata
-    copy_c_to_pyx_item(item, &results.items[results.size])
+    if results.size < results.max_size:
+        copy_c_to_pyx_item(item, &results.items[results.size])
     results.size += 1
     return True
 
 
+cdef struct search_buffer:
+    size_t size
+    size_t capacity
+    pyx_items_t items
+    coord_t* distances
+    bool store_distances
+    bool out_of_memory
+
+
+cdef void init_search_buffer(search_buffer* b, bool store_distances) noexcept nogil:
+    b.size = 0
+    b.capacity = 0
+    b.items = NULL
+    b.distances = NULL
+    b.store_distances = store_distances
+    b.out_of_memory = False
+
+
+cdef void free_search_buffer(search_buffer* b) noexcept nogil:
+    free(b.items)
+    free(b.distances)
+    b.items = NULL
+    b.distances = NULL
+
+
+cdef bool search_buffer_append(
+        search_buffer* b,
+        const item_t item,
+        coord_t distance
+    ) noexcept nogil:
+
+    cdef pyx_items_t items
+    cdef coord_t* distances
+    cdef size_t capacity
+    if b.size == b.capacity:
+        capacity = 2 * b.capacity if b.capacity > 0 else 1024
+        items = <pyx_items_t>realloc(b.items, capacity * sizeof(pyx_item_t))
+        if items == NULL:
+            b.out_of_memory = True
+            return False
+        b.items = items
+        if b.store_distances:
+            distances = <coord_t*>realloc(b.distances, capacity * sizeof(coord_t))
+            if distances == NULL:
+                b.out_of_memory = True
+                return False
+            b.distances = distances
+        b.capacity = capacity
+    copy_c_to_pyx_item(item, &b.items[b.size])
+    if b.store_distances:
+        b.distances[b.size] = distance
+    b.size += 1
+    return True
+
+
+cdef search_buffer_items(search_buffer* b):
+    # copy the found items into a new numpy array
+    items = np.zeros((b.size, $item_dtype.size), dtype="$item_dtype.base")
+    if b.size > 0:
+        memcpy(
+            <void*>memview_to_pyx_items_t(items),
+            <void*>b.items,
+            b.size * sizeof(pyx_item_t))
+    return items
+
+
+cdef search_buffer_distances(search_buffer* b):
+    # copy the distances of the found items into a new numpy array
+    distances = np.zeros((b.size,), dtype="$coord_dtype.base")
+    cdef coord_t[::1] _distances = distances
+    if b.size > 0:
+        memcpy(<void*>&_distances[0], <void*>b.distances, b.size * sizeof(coord_t))
+    return distances
+
+
+cdef bool search_buffer_iterator(
+        const coord_t* bb_min,
+        const coord_t* bb_max,
+        const item_t item,
+        void* udata
+    ) noexcept nogil:
+
+    return search_buffer_append(<search_buffer*>udata, item, 0)
+
+
+cdef bool within_buffer_iterator(
+        const item_t item,
+        coord_t distance,
+        void* udata
+    ) noexcept nogil:
+
+    return search_buffer_append(<search_buffer*>udata, item, distance)
+
+
 cdef struct nearest_results:
     size_t size
     size_t max_size
@@ -203,7 +344,7 @@ cdef bool nearest_iterator(
         const item_t item,
         coord_t distance,
         void* udata
-    ) noexcept:
+    ) noexcept nogil:
 
     cdef nearest_results* results = <nearest_results*>udata
     copy_c_to_pyx_item(item, &results.items[results.size])
@@ -223,12 +364,26 @@ cdef class RTree:
     def __dealloc__(self):
         rtree_free(self._rtree)
 
+    def clone(self):
+
+        cdef RTree other = RTree()
+        cdef rtree* tr = rtree_clone(self._rtree)
+        if tr == NULL:
+            raise MemoryError("RTree clone ran out of memory.")
+        rtree_free(other._rtree)
+        other._rtree = tr
+        return other
+
     def insert_point_items(
             self,
             $item_dtype.to_pyxtype(add_dim=True) items,
             coord_t[:, ::1] points
     ):
 
+        if rtree_count(self._rtree) == 0:
+            self.bulk_load(items, points, None)
+            return
+
         cdef pyx_items_t pyx_items = memview_to_pyx_items_t(items)
 
         for i in range(len(items)):
@@ -245,6 +400,10 @@ cdef class RTree:
             coord_t[:, ::1] bb_maxs
     ):
 
+        if rtree_count(self._rtree) == 0:
+            self.bulk_load(items, bb_mins, bb_maxs)
+            return
+
         cdef pyx_items_t pyx_items = memview_to_pyx_items_t(items)
 
         for i in range(len(items)):
@@ -254,15 +413,48 @@ cdef class RTree:
                 &bb_maxs[i, 0],
                 convert_pyx_to_c_item(&pyx_items[i], &bb_mins[i, 0], &bb_maxs[i, 0]))
 
+    def bulk_load(
+            self,
+            $item_dtype.to_pyxtype(add_dim=True) items,
+            coord_t[:, ::1] bb_mins,
+            coord_t[:, ::1] bb_maxs=None
+    ):
+
+        cdef size_t num_items = len(items)
+        if num_items == 0:
+            return
+
+        cdef pyx_items_t pyx_items = memview_to_pyx_items_t(items)
+        cdef coord_t* bb_max = NULL
+        cdef item_t* c_items = <item_t*>malloc(num_items * sizeof(item_t))
+        if c_items == NULL:
+            raise MemoryError("RTree bulk load ran out of memory.")
+
+        for i in range(num_items):
+            bb_max = &bb_maxs[i, 0] if bb_maxs is not None else NULL
+            c_items[i] = convert_pyx_to_c_item(&pyx_items[i], &bb_mins[i, 0], bb_max)
+
+        all_good = rtree_bulk_load(
+            self._rtree,
+            &bb_mins[0, 0],
+            &bb_maxs[0, 0] if bb_maxs is not None else NULL,
+            c_items,
+            num_items)
+        free(c_items)
+
+        if not all_good:
+            raise RuntimeError("RTree bulk load ran out of memory.")
+
     def count(self, coord_t[::1] bb_min, coord_t[::1] bb_max):
 
         cdef size_t num = 0
-        rtree_search(
-            self._rtree,
-            &bb_min[0],
-            &bb_max[0],
-            &count_iterator,
-            &num)
+        with nogil:
+            rtree_search(
+                self._rtree,
+                &bb_min[0],
+                &bb_max[0],
+                &count_iterator,
+                &num)
 
         return num
 
@@ -274,28 +466,145 @@ cdef class RTree:
         rtree_bb(self._rtree, &_bb_min[0], &_bb_max[0])
         return (bb_min, bb_max)
 
-    def search(self, coord_t[::1] bb_min, coord_t[::1] bb_max):
+    def search(
+            self,
+            coord_t[::1] bb_min,
+            coord_t[::1] bb_max,
+            $item_dtype.to_pyxtype(add_dim=True) out=None
+    ):
 
         cdef search_results results
-        cdef size_t num_results = self.count(bb_min, bb_max)
-
-        items = np.zeros((num_results, $item_dtype.size), dtype="$item_dtype.base")
-        if num_results == 0:
-            return items
-        init_search_results_from_memview(&results, items)
-
-        rtree_search(
-            self._rtree,
-            &bb_min[0],
-            &bb_max[0],
-            &search_iterator,
-            &results)
+        cdef search_buffer buffer
+
+        if out is not None:
+            init_search_results_from_memview(&results, out)
+            with nogil:
+                rtree_search(
+                    self._rtree,
+                    &bb_min[0],
+                    &bb_max[0],
+                    &search_iterator,
+                    &results)
+            return results.size
+
+        init_search_buffer(&buffer, False)
+        try:
+            with nogil:
+                rtree_search(
+                    self._rtree,
+                    &bb_min[0],
+                    &bb_max[0],
+                    &search_buffer_iterator,
+                    &buffer)
+            if buffer.out_of_memory:
+                raise MemoryError("RTree search ran out of memory.")
+            return search_buffer_items(&buffer)
+        finally:
+            free_search_buffer(&buffer)
+
+    def search_many(self, coord_t[:, ::1] bb_mins, coord_t[:, ::1] bb_maxs):
+
+        cdef search_buffer buffer
+        cdef size_t num_rois = len(bb_mins)
+        cdef size_t i
+
+        indptr = np.zeros((num_rois + 1,), dtype="int64")
+        cdef int64_t[::1] _indptr = indptr
+
+        init_search_buffer(&buffer, False)
+        try:
+            with nogil:
+                for i in range(num_rois):
+                    rtree_search(
+                        self._rtree,
+                        &bb_mins[i, 0],
+                        &bb_maxs[i, 0],
+                        &search_buffer_iterator,
+                        &buffer)
+                    if buffer.out_of_memory:
+                        break
+                    _indptr[i + 1] = buffer.size
+            if buffer.out_of_memory:
+                raise MemoryError("RTree search ran out of memory.")
+            return search_buffer_items(&buffer), indptr
+        finally:
+            free_search_buffer(&buffer)
+
+    def within(self, coord_t[::1] point, coord_t radius, return_distances=False):
+
+        cdef search_buffer buffer
+
+        if radius < 0:
+            raise ValueError("The radius has to be non-negative")
+
+        init_search_buffer(&buffer, return_distances)
+        try:
+            with nogil:
+                rtree_within(
+                    self._rtree,
+                    &point[0],
+                    radius * radius,
+                    &within_buffer_iterator,
+                    &buffer)
+            if buffer.out_of_memory:
+                raise MemoryError("RTree search ran out of memory.")
+            if return_distances:
+                return search_buffer_items(&buffer), search_buffer_distances(&buffer)
+            else:
+                return search_buffer_items(&buffer)
+        finally:
+            free_search_buffer(&buffer)
+
+    def within_many(
+            self,
+            coord_t[:, ::1] points,
+            radius,
+            return_distances=False
+    ):
 
-        return items
+        cdef search_buffer buffer
+        cdef size_t num_points = len(points)
+        cdef size_t i
+
+        if np.any(np.asarray(radius) < 0):
+            raise ValueError("The radius has to be non-negative")
+
+        # one radius for all points or one per point
+        cdef const coord_t[::1] radii = np.ascontiguousarray(
+            np.broadcast_to(radius, (num_points,)), dtype="$coord_dtype.base")
+
+        indptr = np.zeros((num_points + 1,), dtype="int64")
+        cdef int64_t[::1] _indptr = indptr
+
+        init_search_buffer(&buffer, return_distances)
+        try:
+            with nogil:
+                for i in range(num_points):
+                    rtree_within(
+                        self._rtree,
+                        &points[i, 0],
+                        radii[i] * radii[i],
+                        &within_buffer_iterator,
+                        &buffer)
+                    if buffer.out_of_memory:
+                        break
+                    _indptr[i + 1] = buffer.size
+            if buffer.out_of_memory:
+                raise MemoryError("RTree search ran out of memory.")
+            if return_distances:
+                return (
+                    search_buffer_items(&buffer),
+                    search_buffer_distances(&buffer),
+                    indptr)
+            else:
+                return search_buffer_items(&buffer), indptr
+        finally:
+            free_search_buffer(&buffer)
 
     def nearest(self, coord_t[::1] point, size_t k, return_distances=False):
 
         cdef nearest_results results
+        cdef bool all_good
 
         items = np.zeros((k, $item_dtype.size), dtype="$item_dtype.base")
         if return_distances:
@@ -306,11 +615,12 @@ cdef class RTree:
             return items
         init_nearest_results_from_memview(&results, items, distances)
 
-        all_good = rtree_nearest(
-            self._rtree,
-            &point[0],
-            &nearest_iterator,
-            &results)
+        with nogil:
+            all_good = rtree_nearest(
+                self._rtree,
+                &point[0],
+                &nearest_iterator,
+                &results)
 
         if not all_good:
             raise RuntimeError("RTree nearest neighbor search ran out of memory.")
@@ -320,6 +630,50 @@ cdef class RTree:
         else:
             return items[:results.size]
 
+    def nearest_many(self, coord_t[:, ::1] points, size_t k, return_distances=False):
+
+        cdef nearest_results results
+        cdef pyx_items_t pyx_items
+        cdef coord_t[:, ::1] _distances
+        cdef int64_t[::1] _counts
+        cdef size_t num_points = len(points)
+        cdef size_t i
+        cdef bool all_good = True
+
+        items = np.zeros((num_points, k, $item_dtype.size), dtype="$item_dtype.base")
+        distances = np.full((num_points, k), np.inf, dtype="$coord_dtype.base")
+        counts = np.zeros((num_points,), dtype="int64")
+
+        if num_points > 0 and k > 0:
+
+            pyx_items = memview_to_pyx_items_t(
+                items.reshape((num_points * k, $item_dtype.size)))
+            _distances = distances
+            _counts = counts
+
+            with nogil:
+                for i in range(num_points):
+                    results.size = 0
+                    results.max_size = k
+                    results.items = &pyx_items[i * k]
+                    results.distances = &_distances[i, 0]
+                    if not rtree_nearest(
+                            self._rtree,
+                            &points[i, 0],
+                            &nearest_iterator,
+                            &results):
+                        all_good = False
+                        break
+                    _counts[i] = results.size
+
+        if not all_good:
+            raise RuntimeError("RTree nearest neighbor search ran out of memory.")
+
+        if return_distances:
+            return items, distances, counts
+        else:
+            return items, counts
+
     def delete_items(
             self,
             $item_dtype.to_pyxtype(add_dim=True) items,
@@ -347,6 +701,114 @@ cdef class RTree:
 
         return total_deleted
 
+    def flatten(self):
+
+        cdef size_t num_nodes, num_rects
+        rtree_flat_size(self._rtree, &num_nodes, &num_rects)
+
+        kinds = np.zeros((num_nodes,), dtype="uint8")
+        counts = np.zeros((num_nodes,), dtype="int32")
+        rects = np.zeros((num_rects, 2, $dims), dtype="$coord_dtype.base")
+        items = np.zeros((rtree_count(self._rtree), sizeof(item_t)), dtype="uint8")
+        if num_nodes == 0:
+            return kinds, counts, rects, items
+
+        cdef uint8_t[::1] _kinds = kinds
+        cdef int32_t[::1] _counts = counts
+        cdef coord_t[:, :, ::1] _rects = rects
+        cdef uint8_t[:, ::1] _items = items
+        with nogil:
+            rtree_flatten(
+                self._rtree,
+                &_kinds[0],
+                &_counts[0],
+                &_rects[0, 0, 0],
+                <item_t*>&_items[0, 0])
+
+        return kinds, counts, rects, items
+
+    def unflatten(
+            self,
+            const uint8_t[::1] kinds,
+            const int32_t[::1] counts,
+            const coord_t[:, :, ::1] rects,
+            const uint8_t[:, ::1] items
+    ):
+
+        cdef bool all_good
+        cdef const coord_t* c_rects = NULL
+        cdef const item_t* c_items = NULL
+
+        if rtree_count(self._rtree) > 0:
+            raise RuntimeError("Can only unflatten into an empty RTree.")
+        if len(kinds) == 0:
+            return
+
+        # make sure the arrays are consistent, the C code trusts them
+        np_kinds = np.asarray(kinds)
+        np_counts = np.asarray(counts)
+        if (
+                len(np_counts) != len(np_kinds) or
+                rects.shape[0] != np.sum(np_counts) or
+                rects.shape[2] != $dims or
+                items.shape[0] != np.sum(np_counts[np_kinds == 1]) or
+                items.shape[1] != sizeof(item_t)):
+            raise ValueError("Flattened RTree arrays are inconsistent.")
+
+        if rects.shape[0] > 0:
+            c_rects = &rects[0, 0, 0]
+        if items.shape[0] > 0:
+            c_items = <const item_t*>&items[0, 0]
+
+        with nogil:
+            all_good = rtree_unflatten(
+                self._rtree,
+                &kinds[0],
+                &counts[0],
+                c_rects,
+                c_items,
+                len(kinds))
+
+        if not all_good:
+            raise RuntimeError("RTree unflatten failed (out of memory or malformed arrays).")
+
+    def update_items(
+            self,
+            $item_dtype.to_pyxtype(add_dim=True) items,
+            coord_t[:, ::1] bb_mins,
+            coord_t[:, ::1] bb_maxs,
+            coord_t[:, ::1] new_bb_mins,
+            coord_t[:, ::1] new_bb_maxs
+        ):
+
+        if bb_maxs is None:
+            bb_maxs = bb_mins
+        if new_bb_maxs is None:
+            new_bb_maxs = new_bb_mins
+
+        cdef pyx_items_t pyx_items = memview_to_pyx_items_t(items)
+        cdef item_t item, new_item
+
+        total_updated = 0
+        for i in range(len(items)):
+            item = convert_pyx_to_c_item(
+                &pyx_items[i], &bb_mins[i, 0], &bb_maxs[i, 0])
+            new_item = convert_pyx_to_c_item(
+                &pyx_items[i], &new_bb_mins[i, 0], &new_bb_maxs[i, 0])
+            num_updated = rtree_update(
+                self._rtree,
+                &bb_mins[i, 0],
+                &bb_maxs[i, 0],
+                item,
+                &new_bb_mins[i, 0],
+                &new_bb_maxs[i, 0],
+                new_item)
+            if num_updated == -1:
+                raise RuntimeError("RTree update ran out of memory.")
+            total_updated += num_updated
+
+        return total_updated
+
     def __len__(self):
 
         return rtree_count(self._rtree)
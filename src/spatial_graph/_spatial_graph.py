@@ -1,19 +1,84 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, ClassVar
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, ClassVar, TypeVar
 
 import numpy as np
 
 from spatial_graph._dtypes import DType
-from spatial_graph._rtree import LineRTree, PointRTree
+from spatial_graph._rtree import LineRTree, PointRTree, UndirectedLineRTree
+from spatial_graph._rtree.rtree import _is_compiled
 
+from ._graph.frozen import FrozenDiGraph, FrozenGraph, FrozenGraphBase
 from ._graph.graph import DiGraph, Graph, GraphBase
 
 if TYPE_CHECKING:
     from collections.abc import Mapping
 
+# the type of a spatial graph, for methods that create a graph of their own type
+SpatialGraphT = TypeVar("SpatialGraphT", bound="SpatialGraphBase")
 
-class SpatialGraphBase(GraphBase):
+# compiles the R-trees of new spatial graph types while the graph itself is
+# compiled in the calling thread (the compilers run as subprocesses)
+_compile_pool = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix="spatial_graph_compile"
+)
+
+
+class SpatialQueries:
+    """Spatial queries of nodes and edges, using the node and edge R-trees of
+    a spatial graph."""
+
+    coord_dtype: str
+    _node_rtree: PointRTree
+    _edge_rtree: LineRTree
+
+    @property
+    def roi(self):
+        return self._node_rtree.bounding_box()
+
+    def query_nodes_in_roi(self, roi):
+        return self._node_rtree._ctree.search(roi[0], roi[1])
+
+    def query_edges_in_roi(self, roi):
+        return self._edge_rtree._ctree.search(roi[0], roi[1])
+
+    def query_nodes_in_rois(self, rois):
+        return self._node_rtree._ctree.search_many(*self._split_rois(rois))
+
+    def query_edges_in_rois(self, rois):
+        return self._edge_rtree._ctree.search_many(*self._split_rois(rois))
+
+    def query_nearest_nodes(self, point, k, return_distances=False):
+        return self._node_rtree._ctree.nearest(point, k, return_distances)
+
+    def query_nearest_edges(self, point, k, return_distances=False):
+        return self._edge_rtree._ctree.nearest(point, k, return_distances)
+
+    def query_nearest_nodes_many(self, points, k, return_distances=False):
+        return self._node_rtree._ctree.nearest_many(points, k, return_distances)
+
+    def query_nearest_edges_many(self, points, k, return_distances=False):
+        return self._edge_rtree._ctree.nearest_many(points, k, return_distances)
+
+    def query_nodes_within(self, point, radius, return_distances=False):
+        return self._node_rtree._ctree.within(point, radius, return_distances)
+
+    def query_edges_within(self, point, radius, return_distances=False):
+        return self._edge_rtree._ctree.within(point, radius, return_distances)
+
+    def query_nodes_within_many(self, points, radius, return_distances=False):
+        return self._node_rtree._ctree.within_many(points, radius, return_distances)
+
+    def query_edges_within_many(self, points, radius, return_distances=False):
+        return self._edge_rtree._ctree.within_many(points, radius, return_distances)
+
+    def _split_rois(self, rois):
+        rois = np.asarray(rois, dtype=self.coord_dtype)
+        return np.ascontiguousarray(rois[:, 0]), np.ascontiguousarray(rois[:, 1])
+
+
+class SpatialGraphBase(SpatialQueries, GraphBase):
     edge_inclusion_values: ClassVar[list[str]] = ["incident", "leaving", "entering"]
 
     def __init__(
@@ -24,6 +89,9 @@ class SpatialGraphBase(GraphBase):
         edge_attr_dtypes: Mapping[str, str] | None = None,
         position_attr: str = "position",
         directed: bool = False,
+        columnar: bool = False,
+        dense_ids: bool = False,
+        neighbor_container: str = "vec",
     ) -> None:
         node_attr_dtypes = node_attr_dtypes or {}
         if position_attr not in node_attr_dtypes:
@@ -31,13 +99,162 @@ class SpatialGraphBase(GraphBase):
                 f"position attribute {position_attr!r} not defined in "
                 "'node_attr_dtypes'"
             )
-        super().__init__(node_dtype, node_attr_dtypes, edge_attr_dtypes)
 
         self.ndims = ndims
         self.position_attr = position_attr
         self.coord_dtype = DType(node_attr_dtypes[position_attr]).base
-        self._node_rtree = PointRTree(node_dtype, self.coord_dtype, ndims)
-        self._edge_rtree = LineRTree(f"{node_dtype}[2]", self.coord_dtype, ndims)
+        line_rtree_cls = LineRTree if self.directed else UndirectedLineRTree
+        self._node_rtree_args = (node_dtype, self.coord_dtype, ndims)
+        self._edge_rtree_args = (f"{node_dtype}[2]", self.coord_dtype, ndims)
+
+        if _is_compiled(PointRTree, *self._node_rtree_args) and _is_compiled(
+            line_rtree_cls, *self._edge_rtree_args
+        ):
+            super().__init__(
+                node_dtype,
+                node_attr_dtypes,
+                edge_attr_dtypes,
+                columnar,
+                dense_ids,
+                neighbor_container,
+            )
+            self._node_rtree = PointRTree(*self._node_rtree_args)
+            self._edge_rtree = line_rtree_cls(*self._edge_rtree_args)
+        else:
+            node_rtree = _compile_pool.submit(PointRTree, *self._node_rtree_args)
+            edge_rtree = _compile_pool.submit(line_rtree_cls, *self._edge_rtree_args)
+            super().__init__(
+                node_dtype,
+                node_attr_dtypes,
+                edge_attr_dtypes,
+                columnar,
+                dense_ids,
+                neighbor_container,
+            )
+            self._node_rtree = node_rtree.result()
+            self._edge_rtree = edge_rtree.result()
+
+    def copy(self: SpatialGraphT) -> SpatialGraphT:
+        """Create a copy of this spatial graph.
+
+        The spatial indices of nodes and edges are cloned in constant time and
+        shared with this graph until either graph is modified
+        (copy-on-write). The graph storage itself is copied.
+
+        Returns
+        -------
+        SpatialGraphBase
+            A new spatial graph of the same type and with the same content.
+        """
+        graph = super().copy()
+        graph._node_rtree = self._node_rtree.clone()
+        graph._edge_rtree = self._edge_rtree.clone()
+        return graph
+
+    def subgraph(self: SpatialGraphT, nodes: np.ndarray) -> SpatialGraphT:
+        """Create the subgraph induced by the given nodes.
+
+        See `GraphBase.subgraph`. Nodes, edges, and attributes are copied in
+        one pass, and the spatial indices of the subgraph are bulk-loaded from
+        its nodes and edges.
+
+        Parameters
+        ----------
+        nodes : np.ndarray
+            Array of node IDs to include. Nodes that are not in this graph are
+            ignored.
+
+        Returns
+        -------
+        SpatialGraphBase
+            A new spatial graph of the same type, holding the selected part of
+            this graph.
+        """
+        graph = super().subgraph(nodes)
+        graph._node_rtree = PointRTree(*self._node_rtree_args)
+        graph._edge_rtree = type(self._edge_rtree)(*self._edge_rtree_args)
+        nodes, node_attrs = graph.node_arrays()
+        edges, _ = graph.edge_arrays()
+        positions = node_attrs[self.position_attr]
+        starts = getattr(graph.node_attrs[edges[:, 0]], self.position_attr)
+        ends = getattr(graph.node_attrs[edges[:, 1]], self.position_attr)
+        # inserting into empty trees bulk-loads them
+        graph._node_rtree.insert_point_items(nodes, positions)
+        graph._edge_rtree.insert_lines(edges, starts, ends)
+        return graph
+
+    def subgraph_in_roi(self: SpatialGraphT, roi: np.ndarray) -> SpatialGraphT:
+        """Create the subgraph induced by the nodes in a region of interest.
+
+        Parameters
+        ----------
+        roi : np.ndarray
+            Array of shape `(2, ndims)`, the minimum and maximum corner of the
+            region of interest.
+
+        Returns
+        -------
+        SpatialGraphBase
+            A new spatial graph of the same type, holding the nodes in `roi`
+            and all edges between them.
+        """
+        return self.subgraph(self.query_nodes_in_roi(roi))
+
+    def freeze(self) -> FrozenSpatialGraphBase:
+        """Create a read-only version of this spatial graph in CSR format.
+
+        See `GraphBase.freeze`. The spatial indices of nodes and edges are
+        cloned in constant time and shared with this graph until it is
+        modified (copy-on-write).
+
+        Returns
+        -------
+        FrozenSpatialGraphBase
+            A `FrozenSpatialDiGraph` for directed graphs, a
+            `FrozenSpatialGraph` otherwise.
+        """
+        cls = FrozenSpatialDiGraph if self.directed else FrozenSpatialGraph
+        return cls(
+            ndims=self.ndims,
+            position_attr=self.position_attr,
+            node_rtree=self._node_rtree.clone(),
+            edge_rtree=self._edge_rtree.clone(),
+            **self._freeze_args(),
+        )
+
+    def snapshot(self) -> SpatialGraphBase:
+        """Create a copy of this spatial graph for readers.
+
+        This is the same as `copy`: a full, mutable copy of the graph storage
+        (O(nodes + edges) in time and memory). Only the spatial indices are
+        shared copy-on-write. Queries on the snapshot see the state of the
+        graph at the time of the call, while this graph continues to be
+        modified. Use `freeze` for a compact, read-only version instead.
+
+        Returns
+        -------
+        SpatialGraphBase
+            A new spatial graph of the same type and with the same content.
+        """
+        return self.copy()
+
+    def from_arrays(
+        self: SpatialGraphT,
+        nodes: np.ndarray,
+        node_attrs: Mapping[str, np.ndarray] | None = None,
+        edges: np.ndarray | None = None,
+        edge_attrs: Mapping[str, np.ndarray] | None = None,
+    ) -> SpatialGraphT:
+        """Add nodes and edges with their attributes in bulk.
+
+        See `GraphBase.from_arrays`. As in `add_edges`, edges involving nodes
+        that are neither in `nodes` nor in the graph raise an `IndexError`,
+        which is checked before anything is added.
+        """
+        if edges is not None:
+            endpoints = np.unique(np.asarray(edges, dtype=self.node_dtype))
+            self._check_nodes_exist(endpoints[~np.isin(endpoints, nodes)])
+        return super().from_arrays(nodes, node_attrs, edges, edge_attrs)
 
     def add_node(self, node: Any, *data: Any, **kwargs: Any) -> int:
         position = self._get_position(kwargs)
@@ -65,39 +282,113 @@ class SpatialGraphBase(GraphBase):
         return super().add_edges(edges, *args, **kwargs)
 
     @property
-    def roi(self):
-        return self._node_rtree.bounding_box()
+    def edges(self):
+        return self.query_edges_in_roi(self.roi)
 
-    def query_nodes_in_roi(self, roi):
-        return self._node_rtree._ctree.search(roi[0], roi[1])
+    def move_nodes(self, nodes: np.ndarray, positions: np.ndarray) -> None:
+        """Move nodes to new positions.
 
-    def query_edges_in_roi(self, roi):
-        return self._edge_rtree._ctree.search(roi[0], roi[1])
+        Updates the position attribute of the given nodes, together with the
+        spatial indices of the nodes and their incident edges. Nodes and edges
+        that stay within the bounding box of their leaf in the index are
+        updated in place, all others are re-inserted.
 
-    def query_nearest_nodes(self, point, k, return_distances=False):
-        return self._node_rtree._ctree.nearest(point, k, return_distances)
+        Parameters
+        ----------
+        nodes : np.ndarray
+            Array of node IDs to move.
+        positions : np.ndarray
+            Array of shape `(n, ndims)` with the new position of each node.
+            Each node can only be moved once per call.
+        """
+        nodes = np.asarray(nodes, dtype=self.node_dtype)
+        positions = np.ascontiguousarray(positions, dtype=self.coord_dtype)
+        if len(np.unique(nodes)) != len(nodes):
+            raise ValueError("Nodes to move must be unique")
+        old_positions = getattr(self.node_attrs[nodes], self.position_attr)
+        edges = self._incident_edges(nodes)
+        old_starts = getattr(self.node_attrs[edges[:, 0]], self.position_attr)
+        old_ends = getattr(self.node_attrs[edges[:, 1]], self.position_attr)
 
-    def query_nearest_edges(self, point, k, return_distances=False):
-        return self._edge_rtree._ctree.nearest(point, k, return_distances)
+        num_updated = self._node_rtree.update_items(
+            nodes, old_positions, None, positions, None
+        )
+        setattr(self.node_attrs[nodes], self.position_attr, positions)
+        if num_updated != len(nodes):
+            raise RuntimeError(
+                f"Updated {num_updated} of {len(nodes)} nodes in the spatial index"
+            )
+        if len(edges) == 0:
+            return
 
-    @property
-    def edges(self):
-        return self.query_edges_in_roi(self.roi)
+        new_starts = getattr(self.node_attrs[edges[:, 0]], self.position_attr)
+        new_ends = getattr(self.node_attrs[edges[:, 1]], self.position_attr)
+        num_updated = self._edge_rtree.update_lines(
+            edges, old_starts, old_ends, new_starts, new_ends
+        )
+        if num_updated != len(edges):
+            raise RuntimeError(
+                f"Updated {num_updated} of {len(edges)} edges in the spatial index"
+            )
 
     def remove_nodes(self, nodes: np.ndarray) -> None:
         positions = getattr(self.node_attrs[nodes], self.position_attr)
         self._node_rtree.delete_items(nodes, positions)
-        if isinstance(self, DiGraph):
-            edges = np.concatenate(
-                self.in_edges_by_nodes(nodes), self.out_edges_by_nodes(nodes)
-            )
-        elif isinstance(self, Graph):
-            edges = self.edges_by_nodes(nodes)
+        edges = self._incident_edges(nodes)
         positions_u = getattr(self.node_attrs[edges[:, 0]], self.position_attr)
         positions_v = getattr(self.node_attrs[edges[:, 1]], self.position_attr)
         self._edge_rtree.delete_items(edges, positions_u, positions_v)
         super().remove_nodes(nodes)
 
+    def remove_edge(self, edge: Any) -> int:
+        return self.remove_edges(np.array([edge], dtype=self.node_dtype))
+
+    def remove_edges(self, edges: np.ndarray) -> int:
+        edges = np.ascontiguousarray(edges, dtype=self.node_dtype).reshape((-1, 2))
+        if len(edges) == 0:
+            return 0
+        positions_u = getattr(self.node_attrs[edges[:, 0]], self.position_attr)
+        positions_v = getattr(self.node_attrs[edges[:, 1]], self.position_attr)
+        # edges that do not exist are not in the R-tree either
+        self._edge_rtree.delete_items(edges, positions_u, positions_v)
+        return super().remove_edges(edges)
+
+    def _save_metadata(self) -> dict[str, Any]:
+        metadata = super()._save_metadata()
+        metadata["ndims"] = self.ndims
+        metadata["position_attr"] = self.position_attr
+        return metadata
+
+    def _to_save_arrays(self) -> dict[str, np.ndarray]:
+        arrays = super()._to_save_arrays()
+        for name, rtree in [("node", self._node_rtree), ("edge", self._edge_rtree)]:
+            kinds, counts, rects, items = rtree.flatten()
+            arrays[f"{name}_rtree_kinds"] = kinds
+            arrays[f"{name}_rtree_counts"] = counts
+            arrays[f"{name}_rtree_rects"] = rects
+            arrays[f"{name}_rtree_items"] = items
+        return arrays
+
+    def _from_save_arrays(self, arrays: Mapping[str, np.ndarray]) -> None:
+        super()._from_save_arrays(arrays)
+        for name, rtree in [("node", self._node_rtree), ("edge", self._edge_rtree)]:
+            rtree.unflatten(
+                arrays[f"{name}_rtree_kinds"],
+                arrays[f"{name}_rtree_counts"],
+                arrays[f"{name}_rtree_rects"],
+                arrays[f"{name}_rtree_items"],
+            )
+
+    def _incident_edges(self, nodes):
+        if self.directed:
+            edges = np.concatenate(
+                (self.in_edges_by_nodes(nodes), self.out_edges_by_nodes(nodes))
+            )
+        else:
+            edges = self.edges_by_nodes(nodes)
+        # edges between two of the given nodes are reported more than once
+        return np.unique(edges.reshape(-1, 2), axis=0)
+
     def _get_position(self, kwargs):
         if self.position_attr in kwargs:
             return kwargs[self.position_attr]
@@ -110,3 +401,46 @@ class SpatialGraph(SpatialGraphBase, Graph):
 
 class SpatialDiGraph(SpatialGraphBase, DiGraph):
     """Base class for directed spatial graph instances."""
+
+
+class FrozenSpatialGraphBase(SpatialQueries, FrozenGraphBase):
+    """A read-only spatial graph in CSR format.
+
+    Created with `SpatialGraphBase.freeze`, see `FrozenGraphBase` for details.
+
+    Parameters
+    ----------
+    ndims : int
+        The number of spatial dimensions.
+    position_attr : str
+        The name of the node attribute holding the position of nodes.
+    node_rtree : PointRTree
+        The spatial index of the nodes.
+    edge_rtree : LineRTree
+        The spatial index of the edges.
+    **kwargs : Any
+        Arguments for `FrozenGraphBase`.
+    """
+
+    def __init__(
+        self,
+        ndims: int,
+        position_attr: str,
+        node_rtree: PointRTree,
+        edge_rtree: LineRTree,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.ndims = ndims
+        self.position_attr = position_attr
+        self.coord_dtype = DType(self.node_attr_dtypes[position_attr]).base
+        self._node_rtree = node_rtree
+        self._edge_rtree = edge_rtree
+
+
+class FrozenSpatialGraph(FrozenSpatialGraphBase, FrozenGraph):
+    """A read-only, undirected spatial graph in CSR format."""
+
+
+class FrozenSpatialDiGraph(FrozenSpatialGraphBase, FrozenDiGraph):
+    """A read-only, directed spatial graph in CSR format."""
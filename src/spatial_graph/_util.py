@@ -18,6 +18,9 @@ def create_graph(
     edge_attr_dtypes: Mapping[str, str] | None = ...,
     position_attr: str | None = ...,
     directed: Literal[False] = ...,
+    columnar: bool = ...,
+    dense_ids: bool = ...,
+    neighbor_container: str = ...,
 ) -> SpatialGraph: ...
 @overload
 def create_graph(
@@ -27,6 +30,9 @@ def create_graph(
     edge_attr_dtypes: Mapping[str, str] | None = ...,
     position_attr: str | None = ...,
     directed: Literal[True] = ...,
+    columnar: bool = ...,
+    dense_ids: bool = ...,
+    neighbor_container: str = ...,
 ) -> SpatialDiGraph: ...
 @overload
 def create_graph(
@@ -36,6 +42,9 @@ def create_graph(
     edge_attr_dtypes: Mapping[str, str] | None = ...,
     position_attr: str | None = ...,
     directed: Literal[False] = ...,
+    columnar: bool = ...,
+    dense_ids: bool = ...,
+    neighbor_container: str = ...,
 ) -> Graph: ...
 @overload
 def create_graph(
@@ -45,6 +54,9 @@ def create_graph(
     edge_attr_dtypes: Mapping[str, str] | None = ...,
     position_attr: str | None = ...,
     directed: Literal[True] = ...,
+    columnar: bool = ...,
+    dense_ids: bool = ...,
+    neighbor_container: str = ...,
 ) -> DiGraph: ...
 def create_graph(
     node_dtype: str,
@@ -53,6 +65,9 @@ def create_graph(
     edge_attr_dtypes: Mapping[str, str] | None = None,
     position_attr: str | None = None,
     directed: bool = False,
+    columnar: bool = False,
+    dense_ids: bool = False,
+    neighbor_container: str = "vec",
 ) -> Graph | DiGraph | SpatialGraph | SpatialDiGraph:
     """Convenience factory function to create a graph instance.
 
@@ -75,6 +90,21 @@ def create_graph(
         The name of the attribute that holds the position of nodes in spatial graphs.
     directed : bool, optional
         Whether the graph is directed or not. Defaults to False.
+    columnar : bool, optional
+        Whether to store node attributes in one contiguous array per
+        attribute. Reading an attribute of all nodes then returns a read-only
+        view instead of a copy. Defaults to False.
+    dense_ids : bool, optional
+        Whether to store nodes in an array indexed by their ID instead of a
+        hash map, which makes node lookups plain array indexing. Requires an
+        integer `node_dtype`, and uses memory proportional to the largest node
+        ID: use it for graphs with node IDs in `[0, n)`. Defaults to False.
+    neighbor_container : str, optional
+        The container for the neighbors of each node, which determines the
+        cost of finding an edge (when adding edges or accessing their
+        attributes). One of "vec" (linear in the degree, but compact and
+        fastest for low-degree nodes), "set" (logarithmic in the degree), or
+        "unordered_set" (constant). Defaults to "vec".
     """
     if ndims is not None:  # Spatial graph
         cls = SpatialDiGraph if directed else SpatialGraph
@@ -84,6 +114,9 @@ def create_graph(
             node_attr_dtypes=node_attr_dtypes,
             edge_attr_dtypes=edge_attr_dtypes,
             position_attr=position_attr or "position",
+            columnar=columnar,
+            dense_ids=dense_ids,
+            neighbor_container=neighbor_container,
         )
     else:
         if position_attr is not None:  # pragma: no cover
@@ -98,4 +131,7 @@ def create_graph(
             node_dtype=node_dtype,
             node_attr_dtypes=node_attr_dtypes,
             edge_attr_dtypes=edge_attr_dtypes,
+            columnar=columnar,
+            dense_ids=dense_ids,
+            neighbor_container=neighbor_container,
         )
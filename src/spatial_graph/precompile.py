@@ -0,0 +1,118 @@
+"""Ahead-of-time compilation of graph and tree modules.
+
+By default, the C/C++ modules behind a graph are compiled with witty the first
+time a graph with a new combination of dtypes is created. This module builds
+them ahead of time into a directory, for example when creating a container
+image or a wheel::
+
+    python -m spatial_graph.precompile --output-dir /opt/spatial_graph
+    python -m spatial_graph.precompile --output-dir /opt/spatial_graph \\
+        --signatures signatures.json
+
+At runtime, set the environment variable `SPATIAL_GRAPH_AOT_DIR` to this
+directory (or compile into the `_precompiled` directory of the package) to
+use the precompiled modules instead of invoking the compiler. A signature file
+contains a list of keyword arguments for `create_graph`, e.g.::
+
+    [
+        {
+            "node_dtype": "uint64",
+            "ndims": 3,
+            "node_attr_dtypes": {"position": "float32[3]"},
+            "edge_attr_dtypes": {"score": "float32"},
+            "directed": false
+        }
+    ]
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from spatial_graph import _aot
+from spatial_graph._util import create_graph
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping, Sequence
+
+
+def default_signatures() -> list[dict[str, Any]]:
+    """The signatures of commonly used graphs.
+
+    These are spatial graphs with `uint64` nodes and `float32` or `float64`
+    positions in 2D or 3D, without edge attributes or with a `float32` score,
+    both directed and undirected.
+    """
+    signatures = []
+    for coord_dtype, ndims, edge_attr_dtypes, directed in itertools.product(
+        ["float32", "float64"],
+        [2, 3],
+        [{}, {"score": "float32"}],
+        [False, True],
+    ):
+        signatures.append(
+            {
+                "node_dtype": "uint64",
+                "ndims": ndims,
+                "node_attr_dtypes": {"position": f"{coord_dtype}[{ndims}]"},
+                "edge_attr_dtypes": edge_attr_dtypes,
+                "directed": directed,
+            }
+        )
+    return signatures
+
+
+def precompile(signatures: Iterable[Mapping[str, Any]], output_dir: str | Path) -> None:
+    """Compile the modules for graphs of the given signatures into a directory.
+
+    Parameters
+    ----------
+    signatures : Iterable[Mapping[str, Any]]
+        The keyword arguments to pass to `create_graph`, one mapping per graph.
+    output_dir : str or Path
+        The directory to store the compiled modules and their manifest in.
+    """
+    output_dir = Path(output_dir).absolute()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with _aot.compiling_into(output_dir):
+        for signature in signatures:
+            create_graph(**signature)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m spatial_graph.precompile",
+        description="Compile graph and tree modules ahead of time.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=_aot.PACKAGE_AOT_DIR,
+        help="directory to store the compiled modules in "
+        "(default: the package's _precompiled directory)",
+    )
+    parser.add_argument(
+        "--signatures",
+        type=Path,
+        help="JSON file with a list of keyword arguments for create_graph "
+        "(default: common signatures)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.signatures is not None:
+        signatures = json.loads(args.signatures.read_text())
+    else:
+        signatures = default_signatures()
+
+    for signature in signatures:
+        print(f"Compiling {signature}...")
+        precompile([signature], args.output_dir)
+    print(f"Stored precompiled modules in {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -58,6 +58,31 @@ def test_bench_query_nearest_nodes(n_nodes: int, k: int, num_queries: int, bench
     assert positions.shape[1] == 3
 
 
+@pytest.mark.parametrize("num_queries", [100])
+@pytest.mark.parametrize("k", [1000, 10000])
+@pytest.mark.parametrize("n_nodes", [100_000, 1_000_000])
+def test_bench_query_nearest_nodes_many(
+    n_nodes: int, k: int, num_queries: int, benchmark
+):
+    """Benchmark query_nearest_nodes_many."""
+    graph = _make_graph(n_nodes=n_nodes)
+    query_points = np.random.random((num_queries, 3))
+
+    def _run():
+        closest, distances, counts = graph.query_nearest_nodes_many(
+            query_points, k=k, return_distances=True
+        )
+        positions = graph.node_attrs[closest.ravel()].position
+        return closest, distances, counts, positions
+
+    closest, distances, counts, positions = benchmark(_run)
+
+    # Verify results
+    assert closest.shape == distances.shape == (num_queries, k)
+    assert np.all(counts == k)
+    assert positions.shape[1] == 3
+
+
 @pytest.mark.parametrize("n_nodes", [100_000, 1_000_000])
 def test_roi_query_performance(n_nodes, benchmark):
     """Benchmark ROI (region of interest) queries."""
@@ -75,3 +100,58 @@ def test_roi_query_performance(n_nodes, benchmark):
     positions = large_graph.node_attrs[nodes_in_roi].position
     assert np.all(positions >= roi[0])
     assert np.all(positions <= roi[1])
+
+
+@pytest.mark.parametrize("neighbor_container", ["vec", "set", "unordered_set"])
+@pytest.mark.parametrize("hub_degree", [10, 10_000])
+def test_bench_neighbor_container(hub_degree, neighbor_container, benchmark):
+    """Benchmark adding and reading edges of hub nodes, by neighbor container."""
+    n_nodes = 100_000
+    nodes = np.arange(n_nodes, dtype="uint64")
+    # connect each node to a hub, every hub_degree nodes share a hub
+    hubs = nodes - nodes % hub_degree
+    edges = np.stack([hubs, nodes], axis=1)[hubs != nodes]
+    scores = np.random.random(len(edges)).astype("float32")
+
+    def _run():
+        graph = sg.Graph(
+            "uint64", {}, {"score": "float32"}, neighbor_container=neighbor_container
+        )
+        graph.add_nodes(nodes)
+        graph.add_edges(edges, score=scores)
+        return graph, graph.edge_attrs[edges].score
+
+    graph, edge_scores = benchmark(_run)
+
+    assert graph.num_edges() == len(edges)
+    np.testing.assert_array_equal(edge_scores, scores)
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_bench_from_arrays(bulk, benchmark):
+    """Benchmark building a spatial graph with and without from_arrays."""
+    n_nodes = 1_000_000
+    nodes = np.arange(n_nodes, dtype="uint64")
+    positions = np.random.random((n_nodes, 3))
+    edges = np.random.randint(0, n_nodes, size=(2 * n_nodes, 2)).astype("uint64")
+    edges = np.unique(np.sort(edges[edges[:, 0] != edges[:, 1]], axis=1), axis=0)
+    scores = np.random.random(len(edges)).astype("float32")
+
+    def _run():
+        graph = sg.create_graph(
+            ndims=3,
+            node_dtype="uint64",
+            node_attr_dtypes={"position": "double[3]"},
+            edge_attr_dtypes={"score": "float32"},
+        )
+        if bulk:
+            graph.from_arrays(nodes, {"position": positions}, edges, {"score": scores})
+        else:
+            graph.add_nodes(nodes, position=positions)
+            graph.add_edges(edges, score=scores)
+        return graph
+
+    graph = benchmark(_run)
+
+    assert len(graph) == n_nodes
+    assert graph.num_edges() == len(edges)
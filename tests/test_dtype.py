@@ -17,6 +17,7 @@ def test_dtype(base: str, size: int | None) -> None:
     assert dtype.is_array == (size is not None)
     c_base = VALID_BASE_TYPES[base]
     assert dtype.base_c_type == c_base
+    assert dtype.is_integer == (size is None and "int" in base)
     assert dtype.to_c_decl("test") == f"{c_base} test" + (f"[{size}]" if size else "")
 
     assert dtype.to_pyxtype() == c_base + (f"[{size}]" if size else "")
@@ -1,7 +1,10 @@
 import numpy as np
 import pytest
+import witty
 
 import spatial_graph as sg
+from spatial_graph import _aot
+from spatial_graph._graph import graph_base
 
 node_dtypes = ["uint16"]
 node_attr_dtypes = [{"position": "double[2]"}]
@@ -18,6 +21,22 @@ def test_construction(node_dtype, node_attr_dtypes, edge_attr_dtypes, cls):
     assert type(obj1) is type(obj2)
 
 
+def test_compiled_class_reuse(monkeypatch):
+    graph1 = sg.Graph("uint64", {"score": "float32"}, {"score": "float32"})
+    graph3 = sg.DiGraph("uint64", {"score": "float32"}, {"score": "float32"})
+
+    # constructing the same graph again must neither render, load, nor compile
+    def fail(*args, **kwargs):
+        raise AssertionError("compiled graph class was not reused")
+
+    monkeypatch.setattr(graph_base, "_build_wrapper", fail)
+    monkeypatch.setattr(_aot, "load_module", fail)
+    monkeypatch.setattr(witty, "compile_cython", fail)
+    graph2 = sg.Graph("uint64", {"score": "float32"}, {"score": "float32"})
+    assert type(graph1._cgraph) is type(graph2._cgraph)
+    assert type(graph1._cgraph) is not type(graph3._cgraph)
+
+
 @pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
 def test_operations(cls):
     graph = cls("uint64", {"score": "float"}, {"score": "float"})
@@ -69,6 +88,676 @@ def test_operations(cls):
             assert attrs.score == edge[0] * 100 + edge[1]
 
 
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+def test_remove_edges(cls):
+    graph = cls("uint64", {}, {"score": "float32"})
+    graph.add_nodes(np.arange(5, dtype="uint64"))
+    edges = np.array([[0, 1], [1, 2], [2, 3], [3, 4], [4, 0]], dtype="uint64")
+    graph.add_edges(edges, score=np.arange(5, dtype="float32"))
+
+    assert graph.remove_edge((1, 2)) == 1
+    assert graph.remove_edge((1, 2)) == 0
+    assert graph.num_edges() == 4
+    # reversed edges only exist in undirected graphs
+    reversed_edges = np.array([[3, 2], [0, 4], [2, 4]], dtype="uint64")
+    num_removed = graph.remove_edges(reversed_edges)
+    assert num_removed == (0 if graph.directed else 2)
+    assert graph.num_edges() == 4 - num_removed
+    assert len(graph) == 5
+
+    remaining = [(0, 1), (3, 4)]
+    if graph.directed:
+        remaining += [(2, 3), (4, 0)]
+    assert graph.remove_edges(np.array(remaining, dtype="uint64")) == len(remaining)
+    assert graph.num_edges() == 0
+
+
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+def test_has_nodes_edges(cls):
+    graph = cls("uint64", {}, {"score": "float32"})
+    graph.add_nodes(np.array([1, 2, 3, 5], dtype="uint64"))
+    graph.add_edges(
+        np.array([[1, 2], [2, 3]], dtype="uint64"),
+        score=np.array([0.1, 0.2], dtype="float32"),
+    )
+
+    nodes = np.array([0, 1, 2, 3, 4, 5], dtype="uint64")
+    expected_nodes = [False, True, True, True, False, True]
+    edges = np.array([[1, 2], [2, 1], [2, 3], [1, 3], [4, 1], [0, 4]], dtype="uint64")
+    expected_edges = [True, not graph.directed, True, False, False, False]
+
+    for g in [graph, graph.freeze()]:
+        has_nodes = g.has_nodes(nodes)
+        assert has_nodes.dtype == bool
+        np.testing.assert_array_equal(has_nodes, expected_nodes)
+        has_edges = g.has_edges(edges)
+        assert has_edges.dtype == bool
+        np.testing.assert_array_equal(has_edges, expected_edges)
+        assert len(g.has_nodes(nodes[:0])) == 0
+        assert len(g.has_edges(edges[:0])) == 0
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+def test_connected_components(cls, columnar):
+    graph = cls(
+        "uint64",
+        {"label": "int32"},
+        {"score": "float32", "offset": "float32[2]"},
+        columnar=columnar,
+    )
+    nodes = np.array([7, 1, 2, 3, 4, 5, 6, 8], dtype="uint64")
+    graph.add_nodes(nodes, label=np.zeros(8, dtype="int32"))
+    # components {1, 2, 3}, {4, 5, 6}, {7}, {8}; the edge 3 -> 4 has a low score
+    edges = np.array([[1, 2], [3, 2], [4, 5], [6, 5], [3, 4]], dtype="uint64")
+    graph.add_edges(
+        edges,
+        score=np.array([0.9, 0.8, 0.9, 0.7, 0.1], dtype="float32"),
+        offset=np.zeros((5, 2), dtype="float32"),
+    )
+    graph.remove_node(8)
+    graph.add_node(8, label=0)
+
+    def components(labels):
+        # labels are numbered consecutively in the order of graph.nodes
+        unique_labels, first = np.unique(labels, return_index=True)
+        np.testing.assert_array_equal(unique_labels, np.arange(len(unique_labels)))
+        assert np.all(np.diff(first) > 0)
+        groups = {}
+        for node, label in zip(graph.nodes.tolist(), labels.tolist()):
+            groups.setdefault(label, set()).add(node)
+        return list(groups.values())
+
+    labels = graph.connected_components()
+    assert len(labels) == len(graph)
+    assert sorted(components(labels), key=min) == [{1, 2, 3, 4, 5, 6}, {7}, {8}]
+    labels = graph.connected_components("score", 0.5)
+    assert sorted(components(labels), key=min) == [{1, 2, 3}, {4, 5, 6}, {7}, {8}]
+    labels = graph.connected_components("score", 0.75)
+    assert sorted(components(labels), key=min) == [{1, 2, 3}, {4, 5}, {6}, {7}, {8}]
+
+    with pytest.raises(ValueError, match="not a scalar edge attribute"):
+        graph.connected_components("offset", 0.5)
+    with pytest.raises(ValueError, match="threshold"):
+        graph.connected_components("score")
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+def test_shortest_paths(cls, columnar):
+    graph = cls(
+        "uint64",
+        {"position": "double[2]"},
+        {"length": "float32", "offset": "float32[2]"},
+        columnar=columnar,
+    )
+    graph.add_nodes(
+        np.array([1, 2, 3, 4, 5], dtype="uint64"),
+        position=np.array([[0, 0], [3, 4], [6, 8], [0, 1], [9, 9]], dtype="double"),
+    )
+    # 1 -> 2 -> 3 is the direct route, 1 -> 4 -> 3 the short one by "length"
+    edges = np.array([[1, 2], [2, 3], [1, 4], [4, 3]], dtype="uint64")
+    graph.add_edges(
+        edges,
+        length=np.array([1, 1, 0.5, 0.5], dtype="float32"),
+        offset=np.zeros((4, 2), dtype="float32"),
+    )
+
+    path = graph.shortest_path(1, 3, weight="length")
+    np.testing.assert_array_equal(path, [1, 4, 3])
+    path = graph.shortest_path(1, 3, weight="position")
+    np.testing.assert_array_equal(path, [1, 2, 3])
+    assert len(graph.shortest_path(1, 3)) == 3
+    np.testing.assert_array_equal(graph.shortest_path(1, 1), [1])
+    assert len(graph.shortest_path(1, 5)) == 0
+    if cls is sg.DiGraph:
+        assert len(graph.shortest_path(3, 1)) == 0
+    else:
+        np.testing.assert_array_equal(graph.shortest_path(3, 1, "length"), [3, 4, 1])
+
+    nodes, lengths = graph.shortest_path_lengths(1, weight="position")
+    np.testing.assert_array_equal(nodes, [1, 4, 2, 3])
+    np.testing.assert_allclose(lengths, [0, 1, 5, 10])
+    nodes, lengths = graph.shortest_path_lengths(1, cutoff=5, weight="position")
+    np.testing.assert_array_equal(nodes, [1, 4, 2])
+    nodes, lengths = graph.shortest_path_lengths([1, 3], weight="length")
+    assert dict(zip(nodes.tolist(), lengths.tolist())) == {1: 0, 3: 0, 2: 1, 4: 0.5}
+
+    with pytest.raises(IndexError):
+        graph.shortest_path(1, 6)
+    with pytest.raises(IndexError):
+        graph.shortest_path_lengths([1, 6])
+    with pytest.raises(ValueError, match="not a scalar"):
+        graph.shortest_path(1, 3, weight="offset")
+    with pytest.raises(ValueError, match="neither"):
+        graph.shortest_path(1, 3, weight="foo")
+
+    graph.add_edges(
+        np.array([[2, 5]], dtype="uint64"),
+        length=np.array([-1], dtype="float32"),
+        offset=np.zeros((1, 2), dtype="float32"),
+    )
+    with pytest.raises(ValueError, match="non-negative"):
+        graph.shortest_path(1, 3, weight="length")
+    with pytest.raises(ValueError, match="non-negative"):
+        graph.shortest_path_lengths(1, weight="length")
+    # other weights are not affected by the negative edge attribute
+    np.testing.assert_array_equal(graph.shortest_path(1, 5), [1, 2, 5])
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+def test_subgraph(cls, columnar):
+    graph = cls(
+        "uint64",
+        {"position": "double[2]"},
+        {"score": "float32"},
+        columnar=columnar,
+    )
+    nodes = np.array([1, 2, 3, 4, 5], dtype="uint64")
+    positions = np.arange(10, dtype="double").reshape(5, 2)
+    graph.add_nodes(nodes, position=positions)
+    edges = np.array([[1, 2], [3, 2], [3, 4], [4, 5]], dtype="uint64")
+    graph.add_edges(edges, score=np.array([0.1, 0.2, 0.3, 0.4], dtype="float32"))
+
+    # node 6 does not exist, node 4 is given twice
+    subgraph = graph.subgraph(np.array([4, 2, 3, 6, 4], dtype="uint64"))
+    assert type(subgraph) is type(graph)
+    np.testing.assert_array_equal(subgraph.nodes, [4, 2, 3])
+    assert subgraph.num_edges() == 2
+    np.testing.assert_array_equal(
+        subgraph.node_attrs[[4, 2, 3]].position, positions[[3, 1, 2]]
+    )
+    np.testing.assert_array_equal(
+        subgraph.edge_attrs[edges[1:3]].score, np.array([0.2, 0.3], dtype="float32")
+    )
+
+    # the subgraph is independent of the graph
+    subgraph.node_attrs[2].position = np.array([-1.0, -1.0])
+    subgraph.remove_node(3)
+    np.testing.assert_array_equal(graph.node_attrs[2].position, positions[1])
+    assert graph.num_edges() == 4
+
+
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+def test_neighbors_csr(cls):
+    graph = cls("uint64", {"label": "int32"}, {"score": "float32", "offset": "int8[2]"})
+    nodes = np.array([1, 2, 3, 4], dtype="uint64")
+    graph.add_nodes(nodes, label=np.zeros(4, dtype="int32"))
+    edges = np.array([[1, 2], [1, 3], [4, 1]], dtype="uint64")
+    graph.add_edges(
+        edges,
+        score=np.array([0.5, 0.25, 0.75], dtype="float32"),
+        offset=np.array([[1, 2], [3, 4], [5, 6]], dtype="int8"),
+    )
+
+    def neighborhoods(indptr, indices, columns=None):
+        # map node -> {neighbor: (attribute values)}, independent of the order
+        # of neighbors
+        result = {}
+        for i, node in enumerate(graph.nodes.tolist()):
+            edges = range(indptr[i], indptr[i + 1])
+            result[node] = {
+                indices[j].item(): tuple(c[j].tolist() for c in columns.values())
+                for j in edges
+            }
+        return result
+
+    if cls is sg.Graph:
+        indptr, indices = graph.neighbors_csr()
+        assert indptr.tolist() == [0, 3, 4, 5, 6]
+        indptr, indices, columns = graph.neighbors_csr(edge_attrs=["score"])
+        assert list(columns) == ["score"]
+        assert neighborhoods(indptr, indices, columns) == {
+            1: {2: (0.5,), 3: (0.25,), 4: (0.75,)},
+            2: {1: (0.5,)},
+            3: {1: (0.25,)},
+            4: {1: (0.75,)},
+        }
+        indptr, indices = graph.neighbors_csr(np.array([4, 2], dtype="uint64"))
+        assert indptr.tolist() == [0, 1, 2]
+        assert indices.tolist() == [1, 1]
+    else:
+        indptr, indices, columns = graph.out_neighbors_csr(
+            edge_attrs=["offset", "score"]
+        )
+        assert indptr.tolist() == [0, 2, 2, 2, 3]
+        assert neighborhoods(indptr, indices, columns) == {
+            1: {2: ([1, 2], 0.5), 3: ([3, 4], 0.25)},
+            2: {},
+            3: {},
+            4: {1: ([5, 6], 0.75)},
+        }
+        indptr, indices = graph.in_neighbors_csr()
+        assert indptr.tolist() == [0, 1, 2, 3, 3]
+        assert indices.tolist() == [4, 1, 1]
+
+    with pytest.raises(ValueError, match="not an edge attribute"):
+        (graph.neighbors_csr if cls is sg.Graph else graph.out_neighbors_csr)(
+            edge_attrs=["label"]
+        )
+    with pytest.raises(IndexError):
+        (graph.neighbors_csr if cls is sg.Graph else graph.in_neighbors_csr)(
+            np.array([5], dtype="uint64")
+        )
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+def test_node_edge_arrays(cls, columnar):
+    graph = cls(
+        "uint64",
+        {"position": "double[2]", "label": "int32"},
+        {"score": "float32", "offset": "int8[2]"},
+        columnar=columnar,
+    )
+    nodes = np.array([5, 3, 1, 4], dtype="uint64")
+    positions = np.arange(8, dtype="double").reshape(4, 2)
+    labels = np.array([50, 30, 10, 40], dtype="int32")
+    graph.add_nodes(nodes, position=positions, label=labels)
+    edges = np.array([[5, 3], [1, 3], [4, 5]], dtype="uint64")
+    scores = np.array([0.5, 0.25, 0.75], dtype="float32")
+    offsets = np.array([[1, 2], [3, 4], [5, 6]], dtype="int8")
+    graph.add_edges(edges, score=scores, offset=offsets)
+    graph.remove_node(1)
+
+    node_ids, node_attrs = graph.node_arrays()
+    np.testing.assert_array_equal(node_ids, graph.nodes)
+    assert list(node_attrs) == ["position", "label"]
+    np.testing.assert_array_equal(
+        node_attrs["position"], graph.node_attrs[node_ids].position
+    )
+    np.testing.assert_array_equal(node_attrs["label"], node_ids.astype("int32") * 10)
+
+    edge_ids, edge_attrs = graph.edge_arrays()
+    assert edge_ids.shape == (2, 2)
+    if not graph.directed:
+        assert np.all(edge_ids[:, 0] < edge_ids[:, 1])
+    expected = {(5, 3): (0.5, [1, 2]), (4, 5): (0.75, [5, 6])}
+    if not graph.directed:
+        expected = {tuple(sorted(e)): values for e, values in expected.items()}
+    assert {
+        tuple(e): (score, offset)
+        for e, score, offset in zip(
+            edge_ids.tolist(),
+            edge_attrs["score"].tolist(),
+            edge_attrs["offset"].tolist(),
+        )
+    } == expected
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"columnar": True}, {"dense_ids": True}, {"neighbor_container": "set"}],
+)
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+def test_from_arrays(cls, options):
+    nodes = np.array([4, 0, 2, 1, 3], dtype="uint64")
+    labels = nodes.astype("int32") * 10
+    edges = np.array([[0, 1], [2, 1], [4, 0], [1, 3], [3, 4]], dtype="uint64")
+    scores = np.array([0.5, 0.25, 0.75, 1.0, 2.0], dtype="float32")
+
+    graph = cls("uint64", {"label": "int32"}, {"score": "float32"}, **options)
+    assert (
+        graph.from_arrays(nodes, {"label": labels}, edges, {"score": scores}) is graph
+    )
+    assert len(graph) == 5
+    assert graph.num_edges() == 5
+    np.testing.assert_array_equal(graph.node_attrs[nodes].label, labels)
+    np.testing.assert_array_equal(graph.edge_attrs[edges].score, scores)
+
+    # adding to a non-empty graph keeps the existing nodes and edges
+    graph.from_arrays(
+        np.array([5], dtype="uint64"),
+        {"label": np.array([50], dtype="int32")},
+        np.array([[5, 1]], dtype="uint64"),
+        {"score": np.array([3.0], dtype="float32")},
+    )
+    assert len(graph) == 6
+    assert graph.num_edges() == 6
+    assert graph.edge_attrs[(2, 1)].score == 0.25
+    assert graph.edge_attrs[(5, 1)].score == 3.0
+
+    # nodes only
+    graph = cls("uint64", {"label": "int32"}, {"score": "float32"}, **options)
+    graph.from_arrays(nodes, {"label": labels})
+    assert len(graph) == 5
+    assert graph.num_edges() == 0
+
+    # edges involving missing nodes are skipped, as in add_edges
+    graph = cls("uint64", {"label": "int32"}, {"score": "float32"}, **options)
+    graph.from_arrays(
+        nodes,
+        {"label": labels},
+        np.array([[0, 1], [0, 7], [7, 8]], dtype="uint64"),
+        {"score": np.array([0.5, 1.0, 2.0], dtype="float32")},
+    )
+    assert len(graph) == 5
+    assert graph.num_edges() == 1
+    assert graph.edge_attrs[(0, 1)].score == 0.5
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+def test_aggregate(cls, columnar):
+    graph = cls(
+        "uint64",
+        {"position": "double[2]", "label": "int32"},
+        {"score": "float32", "offset": "int8[2]"},
+        columnar=columnar,
+    )
+    nodes = np.array([1, 2, 3, 4], dtype="uint64")
+    positions = np.array([[0, 0], [2, 0], [0, 4], [9, 9]], dtype="double")
+    graph.add_nodes(nodes, position=positions, label=np.array([1, 2, 3, 4], "int32"))
+    # node 4 has no edges
+    edges = np.array([[1, 2], [3, 1], [2, 3]], dtype="uint64")
+    graph.add_edges(
+        edges,
+        score=np.array([0.5, 0.25, 2.0], dtype="float32"),
+        offset=np.array([[1, -1], [2, -2], [3, -3]], dtype="int8"),
+    )
+
+    np.testing.assert_array_equal(
+        graph.aggregate_edges("score", "sum", nodes), [0.75, 2.5, 2.25, 0]
+    )
+    np.testing.assert_array_equal(
+        graph.aggregate_edges("score", "max", nodes), [0.5, 2.0, 2.0, np.nan]
+    )
+    np.testing.assert_array_equal(
+        graph.aggregate_edges("score", "min", nodes), [0.25, 0.5, 0.25, np.nan]
+    )
+    np.testing.assert_array_equal(
+        graph.aggregate_edges("offset", "mean", nodes),
+        [[1.5, -1.5], [2, -2], [2.5, -2.5], [np.nan, np.nan]],
+    )
+    np.testing.assert_array_equal(
+        graph.aggregate_neighbors("position", "mean", nodes),
+        [[1, 2], [0, 2], [1, 0], [np.nan, np.nan]],
+    )
+    np.testing.assert_array_equal(
+        graph.aggregate_neighbors("label", "sum", nodes[:2]), [5, 4]
+    )
+    # all nodes by default
+    np.testing.assert_array_equal(
+        graph.aggregate_neighbors("label", "max"),
+        graph.aggregate_neighbors("label", "max", graph.nodes),
+    )
+
+    with pytest.raises(ValueError, match="Invalid aggregation"):
+        graph.aggregate_edges("score", "median")
+    with pytest.raises(ValueError, match="not an edge attribute"):
+        graph.aggregate_edges("label")
+    with pytest.raises(IndexError):
+        graph.aggregate_neighbors("label", nodes=np.array([5], dtype="uint64"))
+
+    empty = cls(
+        "uint64",
+        {"position": "double[2]", "label": "int32"},
+        {"score": "float32", "offset": "int8[2]"},
+        columnar=columnar,
+    )
+    assert empty.aggregate_neighbors("position", "mean").shape == (0, 2)
+    assert empty.aggregate_neighbors("label", "sum").shape == (0,)
+    assert empty.aggregate_edges("offset", "max").shape == (0, 2)
+
+
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+def test_copy(cls):
+    graph = cls("uint64", {"position": "double[2]"}, {"score": "float32"})
+    graph.add_nodes(
+        np.array([1, 2, 3], dtype="uint64"),
+        position=np.array([[0.1, 0.1], [0.2, 0.2], [0.3, 0.3]]),
+    )
+    graph.add_edges(
+        np.array([[1, 2], [3, 2]], dtype="uint64"),
+        score=np.array([0.5, 0.6], dtype="float32"),
+    )
+
+    copy = graph.copy()
+    assert type(copy) is type(graph)
+    np.testing.assert_array_equal(copy.nodes, graph.nodes)
+    np.testing.assert_array_equal(copy.node_attrs.position, graph.node_attrs.position)
+    assert copy.num_edges() == 2
+    np.testing.assert_array_equal(
+        copy.edge_attrs[[[1, 2], [3, 2]]].score, np.array([0.5, 0.6], "float32")
+    )
+
+    # the copy is independent of the original graph
+    copy.add_nodes(np.array([4], dtype="uint64"), position=np.array([[0.4, 0.4]]))
+    copy.node_attrs[1].position = np.array([1.0, 1.0])
+    copy.edge_attrs[(1, 2)].score = 1.0
+    graph.remove_node(3)
+
+    assert len(graph) == 2
+    assert len(copy) == 4
+    assert copy.num_edges() == 2
+    np.testing.assert_array_equal(graph.node_attrs[1].position, [0.1, 0.1])
+    assert graph.edge_attrs[(1, 2)].score == np.float32(0.5)
+
+
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+def test_columnar(cls):
+    graph = cls(
+        "uint64", {"position": "double[2]", "label": "int32"}, {}, columnar=True
+    )
+    nodes = np.array([3, 1, 2, 4], dtype="uint64")
+    positions = np.array([[0.3, 0.3], [0.1, 0.1], [0.2, 0.2], [0.4, 0.4]])
+    assert graph.add_nodes(nodes, position=positions, label=nodes.astype("int32"))
+    assert graph.add_node(5, position=np.array([0.5, 0.5]), label=5) == 1
+    assert graph.add_node(5, position=np.array([0.6, 0.6]), label=6) == 0
+    graph.add_edges(np.array([[1, 2], [3, 2], [2, 4]], dtype="uint64"))
+
+    # reading all nodes is a read-only view, aligned with graph.nodes
+    all_positions = graph.node_attrs.position
+    assert not all_positions.flags.writeable
+    assert not all_positions.flags.owndata
+    np.testing.assert_array_equal(graph.nodes, [3, 1, 2, 4, 5])
+    np.testing.assert_array_equal(all_positions[:4], positions)
+    np.testing.assert_array_equal(graph.node_attrs.label, [3, 1, 2, 4, 5])
+    with pytest.raises(ValueError):
+        all_positions[0] = 0.0
+
+    # gather and scatter
+    np.testing.assert_array_equal(graph.node_attrs[[4, 1]].position, positions[[3, 1]])
+    np.testing.assert_array_equal(graph.node_attrs[2].position, [0.2, 0.2])
+    graph.node_attrs[[4, 1]].label = np.array([40, 10], dtype="int32")
+    graph.node_attrs[2].label = 20
+    np.testing.assert_array_equal(graph.node_attrs.label, [3, 10, 20, 40, 5])
+    assert dict((node, data.label) for node, data in graph.node_attrs[[2, 5]]) == {
+        2: 20,
+        5: 5,
+    }
+
+    # removing a node moves the last node into its row
+    copy = graph.copy()
+    graph.remove_node(1)
+    graph.remove_node(1)
+    assert len(graph) == 4
+    assert graph.num_edges() == 2
+    np.testing.assert_array_equal(graph.nodes, [3, 5, 2, 4])
+    np.testing.assert_array_equal(graph.node_attrs.label, [3, 5, 20, 40])
+    np.testing.assert_array_equal(graph.node_attrs[5].position, [0.5, 0.5])
+    assert dict((node, data.label) for node, data in graph.node_attrs) == {
+        3: 3,
+        5: 5,
+        2: 20,
+        4: 40,
+    }
+    graph.remove_nodes(np.array([3, 4], dtype="uint64"))
+    np.testing.assert_array_equal(graph.nodes, [2, 5])
+    np.testing.assert_array_equal(graph.node_attrs[[5, 2]].label, [5, 20])
+
+    # the copy is independent
+    np.testing.assert_array_equal(copy.nodes, [3, 1, 2, 4, 5])
+    np.testing.assert_array_equal(copy.node_attrs.label, [3, 10, 20, 40, 5])
+    copy.add_node(6, position=np.array([0.6, 0.6]), label=6)
+    np.testing.assert_array_equal(graph.nodes, [2, 5])
+
+
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+def test_dense_ids(cls):
+    graph = cls("uint32", {"score": "float32"}, {"weight": "float32"}, dense_ids=True)
+    nodes = np.array([4, 0, 2, 1], dtype="uint32")
+    graph.add_nodes(nodes, score=nodes.astype("float32"))
+    assert graph.add_node(2, score=1.0) == 0
+    edges = np.array([[0, 1], [2, 1], [4, 0]], dtype="uint32")
+    weights = np.array([0.1, 0.2, 0.3], dtype="float32")
+    graph.add_edges(edges, weight=weights)
+
+    assert len(graph) == 4
+    np.testing.assert_array_equal(graph.nodes, [0, 1, 2, 4])
+    np.testing.assert_array_equal(graph.node_attrs[nodes].score, [4, 0, 2, 1])
+    np.testing.assert_array_equal(graph.edge_attrs[edges].weight, weights)
+    with pytest.raises(IndexError):
+        graph.node_attrs[3].score
+
+    graph.remove_node(1)
+    assert len(graph) == 3
+    assert graph.num_edges() == 1
+    np.testing.assert_array_equal(graph.nodes, [0, 2, 4])
+    # the slot of a removed node can be reused
+    assert graph.add_node(1, score=10.0) == 1
+    assert graph.node_attrs[1].score == 10.0
+
+    with pytest.raises(ValueError, match="integer node dtype"):
+        cls("float32", dense_ids=True)
+    signed = cls("int64", dense_ids=True)
+    with pytest.raises(IndexError):
+        signed.add_node(-1)
+
+
+@pytest.mark.parametrize("neighbor_container", ["set", "unordered_set"])
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+def test_neighbor_container(cls, neighbor_container):
+    graph = cls(
+        "uint64", {}, {"score": "float32"}, neighbor_container=neighbor_container
+    )
+    nodes = np.arange(1000, dtype="uint64")
+    graph.add_nodes(nodes)
+    # a hub connected to all other nodes
+    edges = np.stack([np.zeros(999, dtype="uint64"), nodes[1:]], axis=1)
+    scores = nodes[1:].astype("float32")
+    assert graph.add_edges(edges, score=scores) == 999
+    assert graph.add_edges(edges[:10], score=scores[:10]) == 0
+    assert graph.num_edges() == 999
+
+    np.testing.assert_array_equal(graph.edge_attrs[edges[::-1]].score, scores[::-1])
+    graph.edge_attrs[(0, 5)].score = 50.0
+    assert graph.edge_attrs[(0, 5)].score == 50.0
+    if graph.directed:
+        hub_edges = graph.out_edges_by_nodes(nodes[:1])
+    else:
+        hub_edges = graph.edges_by_nodes(nodes[:1])
+    assert sorted(map(tuple, hub_edges)) == sorted(map(tuple, edges))
+
+    copy = graph.copy()
+    graph.remove_nodes(nodes[1:500])
+    assert graph.num_edges() == 500
+    assert copy.num_edges() == 999
+
+    with pytest.raises(ValueError, match="Invalid neighbor container"):
+        cls("uint64", neighbor_container="list")
+
+
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+def test_freeze(cls):
+    graph = cls("uint64", {"position": "double[2]"}, {"score": "float32"})
+    nodes = np.array([3, 1, 2, 4], dtype="uint64")
+    graph.add_nodes(
+        nodes, position=np.array([[0.3, 0.3], [0.1, 0.1], [0.2, 0.2], [0.4, 0.4]])
+    )
+    edges = np.array([[1, 2], [3, 2], [2, 4]], dtype="uint64")
+    graph.add_edges(edges, score=np.array([0.5, 0.6, 0.7], dtype="float32"))
+
+    frozen = graph.freeze()
+    assert isinstance(frozen, sg.FrozenDiGraph if graph.directed else sg.FrozenGraph)
+    assert len(frozen) == 4
+    assert frozen.num_edges() == 3
+    np.testing.assert_array_equal(frozen.nodes, [1, 2, 3, 4])
+    np.testing.assert_array_equal(
+        frozen.node_attrs[nodes].position, graph.node_attrs[nodes].position
+    )
+    np.testing.assert_array_equal(frozen.node_attrs[2].position, [0.2, 0.2])
+    np.testing.assert_array_equal(
+        frozen.edge_attrs[edges].score, graph.edge_attrs[edges].score
+    )
+    assert frozen.edge_attrs[(3, 2)].score == np.float32(0.6)
+
+    if graph.directed:
+        np.testing.assert_array_equal(frozen.indptr, [0, 1, 2, 3, 3])
+        np.testing.assert_array_equal(frozen.nodes[frozen.indices], [2, 4, 2])
+        for method in ["num_in_neighbors", "num_out_neighbors"]:
+            np.testing.assert_array_equal(
+                getattr(frozen, method)(nodes), getattr(graph, method)(nodes)
+            )
+        for method in ["in_edges_by_nodes", "out_edges_by_nodes"]:
+            np.testing.assert_array_equal(
+                getattr(frozen, method)(nodes), getattr(graph, method)(nodes)
+            )
+        assert sorted(frozen.in_edges(2)) == [(1, 2), (3, 2)]
+        assert sorted(frozen.out_edges()) == sorted(graph.out_edges())
+    else:
+        np.testing.assert_array_equal(frozen.indptr, [0, 1, 4, 5, 6])
+        np.testing.assert_array_equal(frozen.nodes[frozen.indices], [2, 1, 3, 4, 2, 2])
+        np.testing.assert_array_equal(
+            frozen.num_neighbors(nodes), graph.num_neighbors(nodes)
+        )
+        np.testing.assert_array_equal(
+            frozen.edges_by_nodes(nodes), graph.edges_by_nodes(nodes)
+        )
+        assert sorted(frozen.edges()) == sorted(graph.edges())
+        for (u, v), attrs in frozen.edges(data=True):
+            assert attrs.score == graph.edge_attrs[(u, v)].score
+
+    # frozen graphs are read-only and independent of the graph
+    with pytest.raises(TypeError):
+        frozen.node_attrs[1].position = np.array([1.0, 1.0])
+    with pytest.raises(ValueError):
+        frozen.node_attrs.position[0] = 1.0
+    with pytest.raises(IndexError):
+        frozen.edge_attrs[(1, 4)].score
+    graph.remove_node(2)
+    assert frozen.num_edges() == 3
+
+
+@pytest.mark.parametrize("cls", [sg.Graph, sg.DiGraph])
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_load(cls, mmap, tmp_path):
+    graph = cls("uint64", {"position": "double[2]"}, {"score": "float32"})
+    graph.add_nodes(
+        np.array([3, 1, 2, 4], dtype="uint64"),
+        position=np.array([[0.3, 0.3], [0.1, 0.1], [0.2, 0.2], [0.4, 0.4]]),
+    )
+    graph.add_edges(
+        np.array([[1, 2], [3, 2], [2, 4]], dtype="uint64"),
+        score=np.array([0.5, 0.6, 0.7], dtype="float32"),
+    )
+
+    graph.save(tmp_path / "graph")
+    loaded = cls.load(tmp_path / "graph", mmap=mmap)
+
+    assert type(loaded) is type(graph)
+    np.testing.assert_array_equal(loaded.nodes, graph.nodes)
+    np.testing.assert_array_equal(
+        loaded.node_attrs[graph.nodes].position,
+        graph.node_attrs[graph.nodes].position,
+    )
+    assert loaded.num_edges() == 3
+    np.testing.assert_array_equal(
+        loaded.edge_attrs[[[1, 2], [3, 2], [2, 4]]].score,
+        np.array([0.5, 0.6, 0.7], dtype="float32"),
+    )
+
+    # the loaded graph can be modified
+    loaded.remove_node(2)
+    assert loaded.num_edges() == 0
+
+    # the stored graph type is checked
+    other_cls = sg.DiGraph if cls is sg.Graph else sg.Graph
+    with pytest.raises(TypeError):
+        other_cls.load(tmp_path / "graph")
+
+
 def test_directed_edges():
     graph = sg.DiGraph("uint64")
     graph.add_nodes(np.array([0, 1, 2], dtype="uint64"))
@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+import pytest
+import witty
+
+import spatial_graph as sg
+from spatial_graph import _aot
+from spatial_graph._graph import graph_base
+from spatial_graph._rtree import rtree
+from spatial_graph.precompile import main
+
+
+def test_precompile(tmp_path, monkeypatch):
+    signature = {
+        "node_dtype": "uint32",
+        "ndims": 2,
+        "node_attr_dtypes": {"position": "float32[2]"},
+        "directed": True,
+    }
+    signatures_file = tmp_path / "signatures.json"
+    signatures_file.write_text(json.dumps([signature]))
+    output_dir = tmp_path / "precompiled"
+
+    main(["--output-dir", str(output_dir), "--signatures", str(signatures_file)])
+
+    # one graph, one point tree, one line tree
+    manifest = json.loads((output_dir / "manifest.json").read_text())
+    assert len(manifest) == 3
+
+    # precompiled modules are used without invoking the compiler
+    def compile_cython(*args, **kwargs):
+        raise AssertionError("module should have been precompiled")
+
+    monkeypatch.setenv("SPATIAL_GRAPH_AOT_DIR", str(output_dir))
+    monkeypatch.setattr(graph_base, "_COMPILED_GRAPHS", {})
+    monkeypatch.setattr(rtree, "_COMPILED_TREES", {})
+    monkeypatch.setattr(witty, "compile_cython", compile_cython)
+
+    graph = sg.create_graph(**signature)
+    graph.add_nodes(
+        np.array([1, 2], dtype="uint32"),
+        position=np.array([[0.1, 0.1], [0.2, 0.2]], dtype="float32"),
+    )
+    graph.add_edges(np.array([[1, 2]], dtype="uint32"))
+    roi = np.array([[0.0, 0.0], [1.0, 1.0]], dtype="float32")
+    assert len(graph.query_edges_in_roi(roi)) == 1
+
+    # after a change to the dtype rendering, precompiled modules are stale
+    dtypes_source = tmp_path / "_dtypes.py"
+    dtypes_source.write_text(_aot.DTYPES_SOURCE.read_text() + "\n# changed\n")
+    monkeypatch.setattr(_aot, "DTYPES_SOURCE", dtypes_source)
+    monkeypatch.setattr(graph_base, "_COMPILED_GRAPHS", {})
+    monkeypatch.setattr(rtree, "_COMPILED_TREES", {})
+    with pytest.raises(AssertionError, match="should have been precompiled"):
+        sg.create_graph(**signature)
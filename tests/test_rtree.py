@@ -1,6 +1,10 @@
 import numpy as np
+import pytest
+import witty
 
 import spatial_graph as sg
+from spatial_graph import _aot
+from spatial_graph._rtree import rtree as rtree_module
 
 
 def test_search():
@@ -18,6 +22,38 @@ def test_search():
     assert len(points) == 100
     assert sorted(points) == sorted(range(100))
 
+    # search into a caller-provided array
+    out = np.zeros((100,), dtype="uint64")
+    num_found = rtree.search(np.array([0.5, 0.5]), np.array([50.0, 50.0]), out=out)
+    assert num_found == 50
+    assert sorted(out[:num_found]) == sorted(range(1, 51))
+
+    # too small arrays are filled and the total number of items is reported
+    out = np.zeros((10,), dtype="uint64")
+    num_found = rtree.search(np.array([0.5, 0.5]), np.array([50.0, 50.0]), out=out)
+    assert num_found == 50
+    assert set(out) <= set(range(1, 51))
+
+    out = np.zeros((0,), dtype="uint64")
+    num_found = rtree.search(np.array([0.5, 0.5]), np.array([50.0, 50.0]), out=out)
+    assert num_found == 50
+
+
+def test_compiled_class_reuse(monkeypatch):
+    rtree1 = sg.PointRTree("uint64", "double", 2)
+    rtree3 = sg.PointRTree("uint64", "double", 3)
+
+    # constructing the same tree again must neither render, load, nor compile
+    def fail(*args, **kwargs):
+        raise AssertionError("compiled tree class was not reused")
+
+    monkeypatch.setattr(rtree_module, "_build_wrapper", fail)
+    monkeypatch.setattr(_aot, "load_module", fail)
+    monkeypatch.setattr(witty, "compile_cython", fail)
+    rtree2 = sg.PointRTree("uint64", "double", 2)
+    assert type(rtree1._ctree) is type(rtree2._ctree)
+    assert type(rtree1._ctree) is not type(rtree3._ctree)
+
 
 def test_delete():
     rtree = sg.PointRTree("uint64", "double", 2)
@@ -261,3 +297,212 @@ def test_line_rtree_delete():
     assert deleted == 1000
 
     assert line_rtree.count(np.array([0.0, 0.0]), np.array([1.0, 1.0])) == 9_000
+
+
+def test_bulk_load():
+    points = np.random.random((10_000, 3))
+    items = np.arange(10_000, dtype="uint64")
+
+    # insert_point_items bulk-loads into an empty tree
+    rtree = sg.PointRTree("uint64", "double", 3)
+    rtree.insert_point_items(items, points)
+    assert len(rtree) == 10_000
+
+    bb_min = np.array([0.2, 0.3, 0.4])
+    bb_max = np.array([0.6, 0.5, 0.9])
+    expected = items[np.all((points >= bb_min) & (points <= bb_max), axis=1)]
+    found = rtree.search(bb_min, bb_max)
+    assert sorted(found) == sorted(expected)
+    assert rtree.count(bb_min, bb_max) == len(expected)
+
+    nearest = rtree.nearest(points[42], k=1)
+    assert list(nearest) == [42]
+
+    # bulk-loading into a non-empty tree inserts the items one by one
+    more_points = np.random.random((100, 3))
+    rtree.bulk_load(np.arange(10_000, 10_100, dtype="uint64"), more_points)
+    assert len(rtree) == 10_100
+
+    # bulk-loaded items can be deleted
+    rtree.delete_items(items, points)
+    assert len(rtree) == 100
+
+
+def test_nearest_many():
+    rtree = sg.PointRTree("uint64", "double", 2)
+    for i in range(100):
+        rtree.insert_point_item(i, np.array([i, i], dtype="float64"))
+
+    query_points = np.array([[0.0, 0.0], [4.1, 4.1], [99.0, 99.0]])
+    items, distances, counts = rtree.nearest_many(
+        query_points, k=3, return_distances=True
+    )
+    assert items.shape == (3, 3)
+    assert distances.shape == (3, 3)
+    np.testing.assert_array_equal(counts, [3, 3, 3])
+    np.testing.assert_array_equal(items, [[0, 1, 2], [4, 5, 3], [99, 98, 97]])
+    for i, point in enumerate(query_points):
+        found, found_distances = rtree.nearest(point, k=3, return_distances=True)
+        np.testing.assert_array_equal(items[i], found)
+        np.testing.assert_array_equal(distances[i], found_distances)
+
+    # ask for more neighbors than items, results are padded
+    items, distances, counts = rtree.nearest_many(
+        query_points[:1], k=101, return_distances=True
+    )
+    assert counts[0] == 100
+    assert items[0, 100] == 0
+    assert distances[0, 100] == np.inf
+
+    # ask an empty tree
+    rtree = sg.LineRTree("uint64[2]", "double", 2)
+    items, counts = rtree.nearest_many(query_points, k=2)
+    assert items.shape == (3, 2, 2)
+    np.testing.assert_array_equal(counts, [0, 0, 0])
+
+
+def test_search_many():
+    points = np.random.random((1000, 2))
+    items = np.arange(1000, dtype="uint64")
+    rtree = sg.PointRTree("uint64", "double", 2)
+    rtree.insert_point_items(items, points)
+
+    bb_mins = np.array([[0.0, 0.0], [0.5, 0.5], [2.0, 2.0], [0.1, 0.6]])
+    bb_maxs = np.array([[0.5, 0.5], [1.0, 1.0], [3.0, 3.0], [0.4, 0.9]])
+    found, indptr = rtree.search_many(bb_mins, bb_maxs)
+
+    assert len(indptr) == 5
+    assert indptr[0] == 0
+    assert indptr[-1] == len(found)
+    for i in range(4):
+        expected = items[np.all((points >= bb_mins[i]) & (points <= bb_maxs[i]), 1)]
+        assert sorted(found[indptr[i] : indptr[i + 1]]) == sorted(expected)
+        np.testing.assert_array_equal(
+            found[indptr[i] : indptr[i + 1]], rtree.search(bb_mins[i], bb_maxs[i])
+        )
+
+    # no bounding boxes
+    found, indptr = rtree.search_many(np.zeros((0, 2)), np.zeros((0, 2)))
+    assert len(found) == 0
+    np.testing.assert_array_equal(indptr, [0])
+
+
+def test_within():
+    points = np.random.random((1000, 2))
+    items = np.arange(1000, dtype="uint64")
+    rtree = sg.PointRTree("uint64", "double", 2)
+    rtree.insert_point_items(items, points)
+
+    query_points = np.array([[0.5, 0.5], [0.0, 0.0], [3.0, 3.0]])
+    radii = np.array([0.1, 0.3, 1.0])
+    found, distances, indptr = rtree.within_many(
+        query_points, radii, return_distances=True
+    )
+    for i, (point, radius) in enumerate(zip(query_points, radii)):
+        dist2 = np.sum((points - point) ** 2, axis=1)
+        expected = items[dist2 <= radius**2]
+        assert sorted(found[indptr[i] : indptr[i + 1]]) == sorted(expected)
+        np.testing.assert_allclose(
+            distances[indptr[i] : indptr[i + 1]],
+            dist2[found[indptr[i] : indptr[i + 1]].astype(int)],
+        )
+
+        single, _single_distances = rtree.within(point, radius, return_distances=True)
+        np.testing.assert_array_equal(single, found[indptr[i] : indptr[i + 1]])
+
+    # the same radius for all points
+    _, indptr_same = rtree.within_many(query_points, 0.3)
+    assert indptr_same[2] - indptr_same[1] == indptr[2] - indptr[1]
+
+    with pytest.raises(ValueError, match="non-negative"):
+        rtree.within(query_points[0], -0.1)
+    with pytest.raises(ValueError, match="non-negative"):
+        rtree.within_many(query_points, -0.1)
+    with pytest.raises(ValueError, match="non-negative"):
+        rtree.within_many(query_points, np.array([0.1, -0.3, 1.0]))
+
+
+def test_line_rtree_within():
+    line_rtree = sg.LineRTree("uint64[2]", "double", 2)
+    line_rtree.insert_lines(
+        np.array([[0, 1], [2, 3]], dtype="uint64"),
+        np.array([[0.0, 0.0], [0.0, 1.0]], dtype="double"),
+        np.array([[1.0, 1.0], [1.0, 0.0]], dtype="double"),
+    )
+
+    # inside the bounding box of both lines, but close to only one of them
+    lines, distances = line_rtree.within(
+        np.array([0.1, 0.0]), 0.1, return_distances=True
+    )
+    np.testing.assert_array_equal(lines, [[0, 1]])
+    np.testing.assert_allclose(distances, [0.005])
+
+    lines = line_rtree.within(np.array([0.5, 0.5]), 0.1)
+    assert len(lines) == 2
+
+
+def test_clone():
+    rtree = sg.PointRTree("uint64", "double", 2)
+    for i in range(100):
+        rtree.insert_point_item(i, np.array([i, i], dtype="float64"))
+
+    clone = rtree.clone()
+    assert len(clone) == 100
+
+    # modifications of either tree are not visible in the other one
+    for i in range(10):
+        rtree.delete_item(i, np.array([i, i], dtype="float64"))
+    clone.insert_point_item(100, np.array([100.0, 100.0]))
+
+    assert len(rtree) == 90
+    assert len(clone) == 101
+    bb_min = np.array([-1.0, -1.0])
+    bb_max = np.array([200.0, 200.0])
+    assert sorted(rtree.search(bb_min, bb_max)) == list(range(10, 100))
+    assert sorted(clone.search(bb_min, bb_max)) == list(range(101))
+
+
+def test_update():
+    rtree = sg.PointRTree("uint64", "double", 2)
+    points = np.random.random(size=(1000, 2))
+    rtree.insert_point_items(np.arange(1000, dtype="uint64"), points)
+
+    # small moves (mostly in place) and large moves (re-inserted)
+    items = np.arange(0, 1000, 2, dtype="uint64")
+    new_points = points[items] + 1e-6
+    new_points[::2] += 10.0
+    num_updated = rtree.update_items(items, points[items], None, new_points, None)
+    assert num_updated == 500
+    assert len(rtree) == 1000
+
+    moved = items[::2]
+    found = rtree.search(np.array([9.0, 9.0]), np.array([12.0, 12.0]))
+    assert sorted(found) == list(moved)
+    for item, point in zip(items, new_points):
+        assert rtree.nearest(point, k=1)[0] == item
+
+    # updating items that don't exist has no effect
+    assert rtree.update_items(items, points[items], None, new_points, None) == 0
+
+
+def test_undirected_line_rtree_update():
+    rtree = sg.UndirectedLineRTree("uint64[2]", "double", 2)
+    lines = np.array([[0, 1], [1, 2]], dtype="uint64")
+    starts = np.array([[0.0, 0.0], [1.0, 1.0]])
+    ends = np.array([[1.0, 1.0], [2.0, 0.0]])
+    rtree.insert_lines(lines, starts.copy(), ends.copy())
+
+    # lines are found regardless of their orientation
+    num_updated = rtree.update_lines(
+        lines[:, ::-1].copy(),
+        ends.copy(),
+        starts.copy(),
+        np.array([[5.0, 5.0], [5.0, 5.0]]),
+        np.array([[0.0, 0.0], [2.0, 0.0]]),
+    )
+    assert num_updated == 2
+    assert len(rtree) == 2
+
+    found = rtree.nearest(np.array([4.0, 4.0]), k=2)
+    assert sorted(map(sorted, found.tolist())) == [[0, 1], [1, 2]]
+    assert len(rtree.within(np.array([1.5, 0.5]), 0.1)) == 0
@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import pytest
 
@@ -66,6 +68,120 @@ def test_roi_query():
     assert len(nodes) == 0
     assert len(edges) == 0
 
+    # query several ROIs at once
+
+    nodes, nodes_indptr = graph.query_nodes_in_rois(
+        np.array(
+            [
+                [[0.0, 0.0, 0.0], [0.25, 0.25, 0.25]],
+                [[1.0, 1.0, 1.0], [1.25, 1.25, 1.25]],
+                [[0.35, 0.35, 0.35], [1.0, 1.0, 1.0]],
+            ]
+        )
+    )
+    edges, edges_indptr = graph.query_edges_in_rois(
+        np.array(
+            [
+                [[0.0, 0.0, 0.0], [0.25, 0.25, 0.25]],
+                [[1.0, 1.0, 1.0], [1.25, 1.25, 1.25]],
+            ]
+        )
+    )
+
+    np.testing.assert_array_equal(nodes_indptr, [0, 2, 2, 4])
+    assert list(sorted(nodes[0:2])) == [1, 2]
+    assert list(sorted(nodes[2:4])) == [4, 5]
+    np.testing.assert_array_equal(edges_indptr, [0, 2, 2])
+    np.testing.assert_array_equal(edges, [[1, 2], [5, 1]])
+
+
+def test_nearest_many_query():
+    graph = sg.SpatialGraph(
+        ndims=3,
+        node_dtype="uint64",
+        node_attr_dtypes={"position": "double[3]"},
+        edge_attr_dtypes={"score": "float32"},
+        position_attr="position",
+    )
+
+    graph.add_nodes(
+        np.array([1, 2, 3, 4, 5], dtype="uint64"),
+        position=np.array(
+            [
+                [0.1, 0.1, 0.1],
+                [0.2, 0.2, 0.2],
+                [0.3, 0.3, 0.3],
+                [0.4, 0.4, 0.4],
+                [0.5, 0.5, 0.5],
+            ],
+            dtype="double",
+        ),
+    )
+    graph.add_edges(
+        np.array([[1, 2], [3, 4]], dtype="uint64"),
+        score=np.array([0.2, 0.3], dtype="float32"),
+    )
+
+    points = np.array([[0.0, 0.0, 0.0], [0.5, 0.5, 0.5]])
+
+    nodes, counts = graph.query_nearest_nodes_many(points, k=2)
+    np.testing.assert_array_equal(nodes, [[1, 2], [5, 4]])
+    np.testing.assert_array_equal(counts, [2, 2])
+
+    edges, distances, counts = graph.query_nearest_edges_many(
+        points, k=1, return_distances=True
+    )
+    np.testing.assert_array_equal(edges, [[[1, 2]], [[3, 4]]])
+    np.testing.assert_allclose(distances, [[0.03], [0.03]])
+    np.testing.assert_array_equal(counts, [1, 1])
+
+
+def test_within_query():
+    graph = sg.SpatialGraph(
+        ndims=3,
+        node_dtype="uint64",
+        node_attr_dtypes={"position": "double[3]"},
+        edge_attr_dtypes={"score": "float32"},
+        position_attr="position",
+    )
+
+    graph.add_nodes(
+        np.array([1, 2, 3, 4, 5], dtype="uint64"),
+        position=np.array(
+            [
+                [0.1, 0.1, 0.1],
+                [0.2, 0.2, 0.2],
+                [0.3, 0.3, 0.3],
+                [0.4, 0.4, 0.4],
+                [0.5, 0.5, 0.5],
+            ],
+            dtype="double",
+        ),
+    )
+    graph.add_edges(
+        np.array([[1, 2], [3, 4]], dtype="uint64"),
+        score=np.array([0.2, 0.3], dtype="float32"),
+    )
+
+    nodes = graph.query_nodes_within(np.array([0.3, 0.3, 0.3]), 0.2)
+    assert list(sorted(nodes)) == [2, 3, 4]
+
+    edges, distances = graph.query_edges_within(
+        np.array([0.0, 0.0, 0.0]), 0.2, return_distances=True
+    )
+    np.testing.assert_array_equal(edges, [[1, 2]])
+    np.testing.assert_allclose(distances, [0.03])
+
+    points = np.array([[0.0, 0.0, 0.0], [0.5, 0.5, 0.5]])
+    nodes, indptr = graph.query_nodes_within_many(points, 0.2)
+    np.testing.assert_array_equal(indptr, [0, 1, 3])
+    assert nodes[0] == 1
+    assert list(sorted(nodes[1:])) == [4, 5]
+
+    edges, indptr = graph.query_edges_within_many(points, [0.1, 0.2])
+    np.testing.assert_array_equal(indptr, [0, 0, 1])
+    np.testing.assert_array_equal(edges, [[3, 4]])
+
 
 def test_delete():
     graph = sg.SpatialGraph(
@@ -89,3 +205,309 @@ def test_delete():
     graph.remove_nodes(nodes[:1000])
 
     assert len(graph) == 99_000
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("directed", [True, False])
+def test_move_nodes(directed, columnar):
+    graph = create_graph(
+        ndims=2,
+        node_dtype="uint64",
+        node_attr_dtypes={"position": "double[2]"},
+        edge_attr_dtypes={"score": "float32"},
+        directed=directed,
+        columnar=columnar,
+    )
+    nodes = np.arange(0, 1000).astype("uint64")
+    positions = np.random.random(size=(1000, 2))
+    graph.add_nodes(nodes, position=positions)
+    # add undirected edges in both orientations
+    edges = np.stack([nodes[1:], nodes[:-1]], axis=1)
+    edges[::2] = edges[::2, ::-1]
+    graph.add_edges(edges, score=np.random.random(size=(999,)).astype("float32"))
+
+    # move the first 10 nodes far away, and jitter the next 10
+    moved = nodes[:20]
+    new_positions = positions[:20] + 1e-6
+    new_positions[:10] += 10.0
+    graph.move_nodes(moved, new_positions)
+
+    np.testing.assert_array_equal(graph.node_attrs[moved].position, new_positions)
+    roi = np.array([[9.0, 9.0], [12.0, 12.0]])
+    assert sorted(graph.query_nodes_in_roi(roi)) == list(range(10))
+    # edges between moved nodes, and the edge from node 9 to 10
+    assert len(graph.query_edges_in_roi(roi)) == 10
+    for node, position in zip(moved, new_positions):
+        assert graph.query_nearest_nodes(position, k=1)[0] == node
+
+    # indices are still consistent, removing nodes removes all their edges
+    graph.remove_nodes(nodes[:500])
+    assert len(graph.query_nodes_in_roi(graph.roi)) == 500
+    roi = np.array([[-1.0, -1.0], [20.0, 20.0]])
+    assert len(graph.query_edges_in_roi(roi)) == 499
+
+    # moving nodes without edges
+    graph.add_nodes(np.array([1000], dtype="uint64"), position=np.array([[0.5, 0.5]]))
+    graph.move_nodes(np.array([1000], dtype="uint64"), np.array([[30.0, 30.0]]))
+    roi = np.array([[29.0, 29.0], [31.0, 31.0]])
+    assert graph.query_nodes_in_roi(roi).tolist() == [1000]
+
+    # nodes can only be moved once per call
+    with pytest.raises(ValueError, match="unique"):
+        graph.move_nodes(
+            np.array([999, 999], dtype="uint64"), np.array([[10.0, 10.0], [20.0, 20.0]])
+        )
+    np.testing.assert_array_equal(graph.node_attrs[999].position, positions[999])
+
+
+@pytest.mark.parametrize("directed", [True, False])
+def test_remove_edges(directed):
+    graph = create_graph(
+        ndims=2,
+        node_dtype="uint64",
+        node_attr_dtypes={"position": "double[2]"},
+        edge_attr_dtypes={"score": "float32"},
+        directed=directed,
+    )
+    nodes = np.arange(0, 100).astype("uint64")
+    positions = np.stack([nodes, nodes], axis=1).astype("double")
+    graph.add_nodes(nodes, position=positions)
+    edges = np.stack([nodes[:-1], nodes[1:]], axis=1)
+    graph.add_edges(edges, score=np.ones((99,), dtype="float32"))
+
+    # prune every other edge, given in reverse for undirected graphs
+    pruned = edges[::2] if directed else edges[::2, ::-1]
+    assert graph.remove_edges(pruned) == 50
+    assert graph.num_edges() == 49
+    roi = np.array([[-1.0, -1.0], [101.0, 101.0]])
+    assert sorted(map(tuple, graph.query_edges_in_roi(roi))) == sorted(
+        map(tuple, edges[1::2])
+    )
+    assert len(graph.query_nodes_in_roi(roi)) == 100
+
+    assert graph.remove_edge(edges[1]) == 1
+    assert graph.remove_edge(edges[1]) == 0
+    assert len(graph.query_edges_in_roi(np.array([[0.5, 0.5], [2.5, 2.5]]))) == 0
+    assert graph.num_edges() == 48
+
+    assert graph.remove_edges(np.empty((0, 2), dtype="uint64")) == 0
+    assert graph.num_edges() == 48
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("directed", [True, False])
+def test_subgraph_in_roi(directed, columnar):
+    graph = create_graph(
+        ndims=2,
+        node_dtype="uint64",
+        node_attr_dtypes={"position": "double[2]"},
+        edge_attr_dtypes={"score": "float32"},
+        directed=directed,
+        columnar=columnar,
+    )
+    nodes = np.arange(0, 100).astype("uint64")
+    positions = np.stack([nodes, nodes], axis=1).astype("double")
+    graph.add_nodes(nodes, position=positions)
+    edges = np.stack([nodes[:-1], nodes[1:]], axis=1)
+    graph.add_edges(edges, score=np.arange(99, dtype="float32"))
+
+    subgraph = graph.subgraph_in_roi(np.array([[9.5, 9.5], [19.5, 19.5]]))
+    assert type(subgraph) is type(graph)
+    assert sorted(subgraph.nodes.tolist()) == list(range(10, 20))
+    assert subgraph.num_edges() == 9
+    np.testing.assert_array_equal(
+        subgraph.node_attrs[nodes[10:20]].position, positions[10:20]
+    )
+    np.testing.assert_array_equal(
+        subgraph.edge_attrs[edges[10:19]].score, np.arange(10, 19, dtype="float32")
+    )
+    roi = np.array([[-1.0, -1.0], [101.0, 101.0]])
+    assert len(subgraph.query_nodes_in_roi(roi)) == 10
+    assert sorted(map(tuple, subgraph.query_edges_in_roi(roi))) == sorted(
+        map(tuple, edges[10:19])
+    )
+
+    # the subgraph is independent of the graph
+    subgraph.add_node(np.uint64(200), position=np.array([5.0, 5.0]))
+    subgraph.remove_nodes(nodes[10:12])
+    assert len(graph.query_nodes_in_roi(roi)) == 100
+    assert graph.num_edges() == 99
+    assert len(subgraph.query_nodes_in_roi(roi)) == 9
+
+
+@pytest.mark.parametrize("directed", [True, False])
+def test_from_arrays(directed):
+    nodes = np.arange(0, 100).astype("uint64")
+    positions = np.stack([nodes, nodes], axis=1).astype("double")
+    edges = np.stack([nodes[:-1], nodes[1:]], axis=1)
+    graph = create_graph(
+        ndims=2,
+        node_dtype="uint64",
+        node_attr_dtypes={"position": "double[2]"},
+        edge_attr_dtypes={"score": "float32"},
+        directed=directed,
+    ).from_arrays(
+        nodes,
+        {"position": positions},
+        edges,
+        {"score": np.arange(99, dtype="float32")},
+    )
+
+    assert len(graph) == 100
+    assert graph.num_edges() == 99
+    roi = np.array([[9.5, 9.5], [19.5, 19.5]])
+    assert sorted(graph.query_nodes_in_roi(roi).tolist()) == list(range(10, 20))
+    assert len(graph.query_edges_in_roi(roi)) == 11
+    np.testing.assert_array_equal(
+        graph.edge_attrs[edges[10:12]].score, np.array([10, 11], dtype="float32")
+    )
+
+    # edges involving missing nodes are rejected before anything is added
+    with pytest.raises(IndexError, match=r"\[200\]"):
+        graph.from_arrays(
+            np.array([100], dtype="uint64"),
+            {"position": np.array([[100, 100]], dtype="double")},
+            np.array([[99, 100], [100, 200]], dtype="uint64"),
+            {"score": np.array([1, 2], dtype="float32")},
+        )
+    assert len(graph) == 100
+    assert graph.num_edges() == 99
+    roi = np.array([[99.5, 99.5], [100.5, 100.5]])
+    assert len(graph.query_nodes_in_roi(roi)) == 0
+
+
+@pytest.mark.parametrize("directed", [True, False])
+def test_snapshot(directed):
+    graph = create_graph(
+        ndims=3,
+        node_dtype="uint64",
+        node_attr_dtypes={"position": "double[3]"},
+        edge_attr_dtypes={"score": "float32"},
+        directed=directed,
+    )
+    nodes = np.arange(0, 1000).astype("uint64")
+    graph.add_nodes(nodes, position=np.random.random(size=(1000, 3)))
+    edges = np.stack([nodes[:-1], nodes[1:]], axis=1)
+    graph.add_edges(edges, score=np.random.random(size=(999,)).astype("float32"))
+
+    snapshot = graph.snapshot()
+    assert isinstance(snapshot, type(graph))
+
+    graph.remove_nodes(nodes[:500])
+    roi = np.array([[-1.0, -1.0, -1.0], [2.0, 2.0, 2.0]])
+
+    assert len(graph) == 500
+    assert len(graph.query_nodes_in_roi(roi)) == 500
+    assert len(snapshot) == 1000
+    assert len(snapshot.query_nodes_in_roi(roi)) == 1000
+    assert len(snapshot.query_edges_in_roi(roi)) == 999
+    assert snapshot.num_edges() == 999
+    np.testing.assert_array_equal(
+        snapshot.node_attrs[nodes[:500]].position.shape, (500, 3)
+    )
+
+
+@pytest.mark.parametrize("directed", [True, False])
+def test_freeze(directed):
+    graph = create_graph(
+        ndims=3,
+        node_dtype="uint64",
+        node_attr_dtypes={"position": "double[3]"},
+        edge_attr_dtypes={"score": "float32"},
+        directed=directed,
+    )
+    nodes = np.arange(0, 1000).astype("uint64")
+    graph.add_nodes(nodes, position=np.random.random(size=(1000, 3)))
+    edges = np.stack([nodes[:-1], nodes[1:]], axis=1)
+    graph.add_edges(edges, score=np.random.random(size=(999,)).astype("float32"))
+
+    frozen = graph.freeze()
+    assert isinstance(
+        frozen, sg.FrozenSpatialDiGraph if directed else sg.FrozenSpatialGraph
+    )
+
+    graph.remove_nodes(nodes[:500])
+    roi = np.array([[0.0, 0.0, 0.0], [0.5, 0.5, 0.5]])
+    found = frozen.query_nodes_in_roi(roi)
+    np.testing.assert_array_equal(
+        np.sort(found),
+        nodes[np.all(frozen.node_attrs[nodes].position <= 0.5, axis=1)],
+    )
+    assert len(frozen.query_edges_in_roi(frozen.roi)) == 999
+    nearest = frozen.query_nearest_nodes(frozen.node_attrs[10].position, k=1)
+    assert nearest[0] == 10
+
+
+@pytest.mark.parametrize("directed", [True, False])
+def test_save_load(directed, tmp_path):
+    graph = create_graph(
+        ndims=3,
+        node_dtype="uint64",
+        node_attr_dtypes={"position": "double[3]"},
+        edge_attr_dtypes={"score": "float32"},
+        directed=directed,
+    )
+    nodes = np.arange(0, 1000).astype("uint64")
+    graph.add_nodes(nodes, position=np.random.random(size=(1000, 3)))
+    edges = np.stack([nodes[:-1], nodes[1:]], axis=1)
+    graph.add_edges(edges, score=np.random.random(size=(999,)).astype("float32"))
+
+    graph.save(tmp_path / "graph")
+    loaded = sg.SpatialGraphBase.load(tmp_path / "graph")
+
+    assert type(loaded) is type(graph)
+    assert loaded.ndims == 3
+    assert loaded.position_attr == "position"
+    assert len(loaded) == 1000
+    assert loaded.num_edges() == 999
+
+    roi = np.array([[0.2, 0.3, 0.4], [0.6, 0.7, 0.8]])
+    assert sorted(loaded.query_nodes_in_roi(roi)) == sorted(
+        graph.query_nodes_in_roi(roi)
+    )
+    np.testing.assert_array_equal(
+        np.sort(loaded.query_edges_in_roi(roi), axis=0),
+        np.sort(graph.query_edges_in_roi(roi), axis=0),
+    )
+    point = np.array([0.5, 0.5, 0.5])
+    np.testing.assert_array_equal(
+        loaded.query_nearest_edges(point, k=5), graph.query_nearest_edges(point, k=5)
+    )
+
+    # the restored indices can be modified
+    loaded.remove_nodes(nodes[:500])
+    roi = np.array([[-1.0, -1.0, -1.0], [2.0, 2.0, 2.0]])
+    assert len(loaded.query_nodes_in_roi(roi)) == 500
+    assert len(loaded.query_edges_in_roi(roi)) == 499
+
+
+def test_concurrent_queries():
+    graph = sg.SpatialGraph(
+        ndims=3,
+        node_dtype="uint64",
+        node_attr_dtypes={"position": "double[3]"},
+        edge_attr_dtypes={"score": "float32"},
+        position_attr="position",
+    )
+    nodes = np.arange(0, 10_000).astype("uint64")
+    graph.add_nodes(nodes, position=np.random.random(size=(10_000, 3)))
+    edges = np.stack([nodes[:-1], nodes[1:]], axis=1)
+    graph.add_edges(edges, score=np.random.random(size=(9_999,)).astype("float32"))
+
+    points = np.random.random(size=(64, 3))
+
+    def _query(point):
+        roi = np.array([point - 0.1, point + 0.1])
+        nearest_nodes = graph.query_nearest_nodes(point, k=10)
+        nearest_edges = graph.query_nearest_edges(point, k=10)
+        roi_nodes = graph.query_nodes_in_roi(roi)
+        positions = graph.node_attrs[roi_nodes].position
+        return nearest_nodes, nearest_edges, roi_nodes, positions
+
+    expected = [_query(point) for point in points]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(_query, points))
+
+    for result, expected_result in zip(results, expected):
+        for a, b in zip(result, expected_result):
+            np.testing.assert_array_equal(a, b)